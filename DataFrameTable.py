@@ -1,12 +1,21 @@
-from tkinter import ttk
+import tkinter as tk
+from tkinter import messagebox, ttk
 import traceback
 import pandas as pd
 from typing import Callable, Any, Optional, Union
-from sqlalchemy import text, inspect
+from sqlalchemy import text
 from components.treeview_frame import TreeViewFrame
 from components.navigation_frame import NavigationFrame
 from components.edit_modal import EditModal
-from config.DatabaseLoader import pesquisar_in_db
+from utils.change_set import KIND_DELETE, ChangeSet, to_db_value
+from utils.columnar_buffer import ColumnarBuffer, as_buffer
+from utils.job_scheduler import get_scheduler
+from utils.keyset_pagination import get_primary_key_columns
+from utils.result_cache import ResultCache
+from utils.validarText import _convert_column_type, _map_column_type
+
+# Linhas antes do fim do que já foi carregado em que `on_scroll_end` é disparado
+SCROLL_END_MARGIN = 20
 
 class DataFrameTable(ttk.Frame):
     """
@@ -16,12 +25,15 @@ class DataFrameTable(ttk.Frame):
                  columns:Optional[dict[str, Any]] = None, enum_values: Optional[dict[str,Any]] = None,
                  df: Optional[pd.DataFrame] = None, rows_per_page: int = 10, column_width: int = 100,
                  edit_enabled: bool = True, delete_enabled: bool = True, query_executed: Optional[text] = None,
-                 table_name: Optional[Union[str, list]] = None, on_data_change: Optional[Callable[[pd.DataFrame], None]] = None, **kwargs):
+                 table_name: Optional[Union[str, list]] = None, on_data_change: Optional[Callable[[pd.DataFrame], None]] = None,
+                 virtual_scroll: bool = False, page_source: Optional[Any] = None,
+                 on_scroll_end: Optional[Callable[[], None]] = None, hidden_columns: Optional[list] = None,
+                 on_load_error: Optional[Callable[[str], None]] = None, **kwargs):
         super().__init__(master, **kwargs)
 
         try:
             self.engine = engine
-            self.df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+            self.buffer = as_buffer(df if isinstance(df, (pd.DataFrame, ColumnarBuffer)) else None)
             self.rows_per_page = rows_per_page
             self.column_width = column_width
             self.edit_enabled = edit_enabled
@@ -29,6 +41,21 @@ class DataFrameTable(ttk.Frame):
             self.query_executed = query_executed
             self.table_name = table_name
             self.on_data_change = on_data_change
+            self.virtual_scroll = virtual_scroll
+            # Modo de páginas remotas: self.df contém apenas a página atual, buscada no servidor
+            self.page_source = page_source
+            self.server_total_rows = None
+            # Chamado quando a rolagem virtual chega perto da última linha carregada (ex: carregar mais do cursor)
+            self.on_scroll_end = on_scroll_end
+            # Colunas carregadas mas não exibidas (chave primária fora da seleção do usuário)
+            self.hidden_columns = list(hidden_columns or [])
+            # Chamado em segundo plano com o nome da tabela quando a busca de uma página remota falha
+            self.on_load_error = on_load_error
+            # Colunas que identificam a linha no servidor (resolvidas na primeira edição)
+            self._key_columns = None
+            # Modo grade: alterações de células/linhas acumuladas localmente e gravadas em lote
+            self.change_set: Optional[ChangeSet] = None
+            self._grid_saving = False
             self.db_type = db_type.lower()
             self.modal_edit = None
             self.log_message = log_message
@@ -38,37 +65,61 @@ class DataFrameTable(ttk.Frame):
             self.enum_values = enum_values.copy() if enum_values is not None else {}
             self.columns = columns.copy() if columns is not None else {}
             self.databse_name = databse_name
-            self.log_message( f"Data carregada com {len(self.df)} linhas e {len(self.df.columns)} colunas.")
+            self.log_message( f"Data carregada com {len(self.buffer)} linhas e {len(self.buffer.columns)} colunas.")
 
             self._create_styles()
             self.log_message( "Estilos configurados.")
 
             self.treeview_frame = TreeViewFrame(
-                master=self, show_edit_modal=self.show_edit_modal, df=self.df,columns=self.columns,
+                master=self, show_edit_modal=self.show_edit_modal, df=self.buffer,columns=self.columns,
                 column_width=self.column_width, log_message=log_message,databse_name=self.databse_name,
+                virtual=self.virtual_scroll, on_view_change=self._on_virtual_view_change if self.virtual_scroll else None,
+                hidden_columns=self.hidden_columns, decorate_row=self._decorate_row,
             )
+            for kind, options in (("update", {"background": "#fff3cd"}), ("insert", {"background": "#d4edda"}),
+                                  ("delete", {"background": "#f8d7da", "foreground": "#dc3545"})):
+                self.treeview_frame.tree.tag_configure(kind, **options)
+
+            # A edição em grade exige a tabela inteira em memória (rolagem virtual) e uma tabela única
+            self.grid_toolbar = None
+            if edit_enabled and engine is not None and isinstance(table_name, str) and table_name \
+                    and virtual_scroll and page_source is None:
+                self._create_grid_toolbar()
 
             self.navigation_frame = NavigationFrame(
                 master=self, prev_page=self.prev_page, next_page=self.next_page, update_table=self.update_table,
-                df=self.df, db_type=self.db_type, engine=self.engine, on_data_change=self.on_data_change,
+                df=self.df, get_df=lambda: self.df, db_type=self.db_type, engine=self.engine, on_data_change=self.on_data_change,
                 table_name=self.table_name, databse_name=self.databse_name, log_message=log_message, 
                 columns=self.columns,enum_values=self.enum_values, query_executed=self.query_executed,edit_table=edit_enabled
             )
 
             self.log_message( "Componentes de interface criados.")
 
-            self.update_table()
+            self._refresh_view()
             self.log_message( "Tabela atualizada com sucesso.")
 
+            if self.grid_toolbar is not None:
+                self.grid_toolbar.pack(fill="x")
             self.treeview_frame.pack(expand=True, fill="both")
             self.navigation_frame.pack(fill="x")
 
         except Exception as e:
             self.log_message( f"Erro ao inicializar DataFrameTable: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
 
+    @property
+    def df(self) -> pd.DataFrame:
+        """DataFrame do pandas com os dados carregados, montado apenas quando solicitado."""
+        return self.buffer.to_pandas()
+
+    @df.setter
+    def df(self, value) -> None:
+        self.buffer = as_buffer(value)
+
     def _calculate_total_pages(self) -> int:
         try:
-            total_pages = max(1, -(-len(self.df) // self.rows_per_page))  # Equivalente a math.ceil(len(df) / rows_per_page)
+            if self.page_source is not None:
+                return self._remote_total_pages()
+            total_pages = max(1, -(-len(self.buffer) // self.rows_per_page))  # Equivalente a math.ceil(len(df) / rows_per_page)
             self.log_message( f"Número total de páginas calculado: {total_pages}")
             return total_pages
         except Exception as e:
@@ -96,24 +147,111 @@ class DataFrameTable(ttk.Frame):
 
     def update_table(self, df: Optional[pd.DataFrame] = None) -> None:
         try:
+            if self.page_source is not None:
+                # Dados alterados ou "refrescar": as páginas em cache deixam de ser válidas
+                self.page_source.invalidate()
+                if df is None:
+                    self._go_to_remote_page(self.current_page)
+                    return
+
             if df is not None:
-                self.df = df.copy()
+                self.df = df
                 del df
                 self.total_pages = self._calculate_total_pages()
                 self.current_page = min(self.current_page, self.total_pages - 1)
 
-            self.treeview_frame.update_table(self.df, self.current_page, self.rows_per_page)
-            self.navigation_frame.update_pagination(self.current_page, self.total_pages, len(self.df))
+            self._refresh_view()
 
         except Exception as e:
             self.log_message( f"Erro ao atualizar tabela: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
 
+    def _refresh_view(self) -> None:
+        """Redesenha a página atual e a paginação."""
+        if self.page_source is not None:
+            # A página remota inteira está em self.df
+            self.treeview_frame.update_table(self.buffer, 0, self.rows_per_page)
+            self.navigation_frame.update_pagination(self.current_page, self.total_pages, len(self.buffer))
+            return
+
+        self.treeview_frame.update_table(self.buffer, self.current_page, self.rows_per_page)
+        if not self.virtual_scroll:
+            self.navigation_frame.update_pagination(self.current_page, self.total_pages, len(self.buffer))
+
+    def _remote_total_pages(self) -> int:
+        """Total de páginas no modo remoto: pelo total do servidor, pela última página conhecida ou uma além da atual."""
+        if self.server_total_rows is not None:
+            return max(1, -(-self.server_total_rows // self.rows_per_page))
+        if self.page_source.last_page is not None:
+            return self.page_source.last_page + 1
+        return self.current_page + 2
+
+    def _go_to_remote_page(self, page: int) -> None:
+        """Busca a página no servidor (ou no cache) em segundo plano e a exibe."""
+        last_page = self.page_source.last_page
+        if page < 0 or (last_page is not None and page > last_page):
+            return
+
+        def _on_error(e):
+            details = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            self.log_message( f"Erro ao buscar a página {page + 1}: {e} ({type(e).__name__})\n{details}", level="error")
+            if self.on_load_error is not None:
+                # Metadados possivelmente desatualizados: relidos fora da interface
+                get_scheduler().submit(self.on_load_error, self.table_name, group=self)
+
+        get_scheduler().submit(self.page_source.get_page, page, group=self,
+                               on_done=lambda df: self._show_remote_page(page, df), on_error=_on_error)
+
+    def _show_remote_page(self, page: int, df: pd.DataFrame) -> None:
+        """Exibe a página buscada e pré-busca a seguinte (executa na thread da interface)."""
+        if df.empty and page > 0:
+            # Passou do fim do resultado: apenas corrige o total de páginas
+            self.total_pages = self._calculate_total_pages()
+            self.navigation_frame.update_pagination(self.current_page, self.total_pages, len(self.buffer))
+            return
+        self.current_page = page
+        self.df = df
+        self.total_pages = self._calculate_total_pages()
+        self._refresh_view()
+        self.page_source.prefetch(page + 1)
+
+    def _on_virtual_view_change(self, offset: int, visible_rows: int, total: int) -> None:
+        """Atualiza a paginação a partir da janela visível no modo de rolagem virtual."""
+        self.rows_per_page = max(1, visible_rows)
+        self.total_pages = max(1, -(-total // self.rows_per_page))
+        self.current_page = min(-(-offset // self.rows_per_page), self.total_pages - 1)
+        if hasattr(self, "navigation_frame"):
+            self.navigation_frame.update_pagination(self.current_page, self.total_pages, total)
+        if self.on_scroll_end and total and offset + visible_rows >= total - SCROLL_END_MARGIN:
+            self.on_scroll_end()
+
+    def set_total_rows(self, total: int, estimated: bool = False) -> None:
+        """Informa o total de linhas da consulta no servidor (exato ou estimado)."""
+        if self.page_source is not None and not estimated:
+            self.server_total_rows = total
+            self.total_pages = self._calculate_total_pages()
+        if hasattr(self, "navigation_frame"):
+            self.navigation_frame.set_server_total(total, estimated)
+            if self.page_source is not None:
+                self.navigation_frame.update_pagination(self.current_page, self.total_pages, len(self.buffer))
+
     def prev_page(self) -> None:
+        if self.page_source is not None:
+            self._go_to_remote_page(self.current_page - 1)
+            return
+        if self.virtual_scroll:
+            self.treeview_frame.scroll_rows(-self.rows_per_page)
+            return
         if self.current_page > 0:
             self.current_page -= 1
             self.update_table()
 
     def next_page(self) -> None:
+        if self.page_source is not None:
+            self._go_to_remote_page(self.current_page + 1)
+            return
+        if self.virtual_scroll:
+            self.treeview_frame.scroll_rows(self.rows_per_page)
+            return
         if self.current_page < self.total_pages - 1:
             self.current_page += 1
             self.update_table()
@@ -127,59 +265,239 @@ class DataFrameTable(ttk.Frame):
             if self.modal_edit:
                 self.modal_edit.destroy()
 
-            if self.selected_row_index is None or self.selected_row_index >= len(self.df):
+            if self.selected_row_index is None or self.selected_row_index >= len(self.buffer):
                 self.log_message( "Nenhuma linha válida selecionada para edição.", level="warning")
                 return
 
-            campo_primary_key = None
-
-            if self.engine and not isinstance(self.table_name, list):
-                inspector = inspect(self.engine)
-                pk_constraint = inspector.get_pk_constraint(self.table_name)
-                primary_keys = pk_constraint.get("constrained_columns", [])
-                campo_primary_key = primary_keys[0] if primary_keys else None
-
-            if not campo_primary_key:
-                unique_cols = [col for col in self.df.columns if self.df[col].is_unique]
-                campo_primary_key = unique_cols[0] if unique_cols else self.df.columns[0]
-            primary_key_value = None
-            if campo_primary_key  in self.df.columns:
-                primary_key_value = self.df.at[self.selected_row_index, campo_primary_key]
-
-            if primary_key_value is None:
-                primary_key_value= pesquisar_in_db(self.engine, self.db_type, campo_primary_key, primary_key_value, self.table_name, self.selected_row_index, text, self.log_message)
-                self.log_message( f"Chave primária `{campo_primary_key}` não encontrada na linha {self.selected_row_index}.", level="error")
-                if primary_key_value is None:
-                    return
+            # Linha lida direto do buffer colunar (busca binária do bloco, sem montar o DataFrame)
+            row = self.buffer.row(self.selected_row_index)
+            key_columns = self._get_key_columns()
+            key_values = {col: row[col] for col in key_columns if col in row}
+            edit_enabled = self.edit_enabled
+            if not key_columns or len(key_values) < len(key_columns):
+                # Sem a chave carregada a linha não pode ser identificada no servidor
+                self.log_message( "Chave primária indisponível para esta tabela; registro aberto apenas para leitura.", level="warning")
+                key_values, edit_enabled = {}, False
 
-            self.log_message( f"Abrindo modal de edição para linha {self.selected_row_index} (Campo: {campo_primary_key}, ID: {primary_key_value})")
+            self.log_message( f"Abrindo modal de edição para linha {self.selected_row_index} (Chave: {key_values})")
 
             self.modal_edit = EditModal(
-                master=self, engine=self.engine, df=self.df, row_index=self.selected_row_index,is_opened_callback=_fechar_modal,
-                name_campo_primary_key=campo_primary_key, primary_key_value=primary_key_value,db_type=self.db_type,
-                table_name=self.table_name, on_data_change=self.on_data_change, edit_enabled=self.edit_enabled,
+                master=self, engine=self.engine, row=row, get_df=lambda: self.df, row_index=self.selected_row_index,
+                is_opened_callback=_fechar_modal, key_values=key_values, db_type=self.db_type,
+                table_name=self.table_name, on_data_change=self.on_data_change, edit_enabled=edit_enabled,
                 column_types=self.columns, enum_values=self.enum_values, log_message=self.log_message,databse_name =self.databse_name,
             )
 
         except Exception as e:
             self.log_message( f"Erro ao abrir modal de edição: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
-    def update_table_for_search(self, df: Optional[pd.DataFrame] = None) -> None:
+    # ------------------------------------------------------------------ modo grade
+
+    def _create_grid_toolbar(self) -> None:
+        """Barra do modo grade: edição de células no lugar, acumulada e gravada em uma transação."""
+        self.grid_toolbar = ttk.Frame(self)
+        self.grid_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.grid_toolbar, text="✏️ Edição em grade", variable=self.grid_mode,
+                        command=self._toggle_grid_mode).pack(side=tk.LEFT, padx=5)
+        self.grid_buttons = [
+            ttk.Button(self.grid_toolbar, text="➕ Nova linha", command=self._grid_new_row),
+            ttk.Button(self.grid_toolbar, text="🗑 Excluir selecionadas", command=self._grid_delete_selected),
+            ttk.Button(self.grid_toolbar, text="↩️ Descartar", command=self._grid_discard),
+            ttk.Button(self.grid_toolbar, text="💾 Salvar", command=self._grid_save),
+        ]
+        for button in self.grid_buttons:
+            button.config(state="disabled")
+            button.pack(side=tk.LEFT, padx=5)
+        self.grid_status = ttk.Label(self.grid_toolbar, text="")
+        self.grid_status.pack(side=tk.LEFT, padx=10)
+
+    def _toggle_grid_mode(self) -> None:
+        if self.grid_mode.get():
+            key_columns = self._get_key_columns()
+            if not key_columns:
+                messagebox.showwarning("Edição em grade", "A tabela não tem chave primária; a edição em grade não está disponível.")
+                self.grid_mode.set(False)
+                return
+            self.change_set = ChangeSet(self.table_name, key_columns, self.db_type)
+            self._column_converters = {col["name"]: _map_column_type(str(col["type"])) for col in self.columns}
+            self.treeview_frame.enable_cell_edit(self._grid_cell_text, self._grid_cell_edit)
+            self._set_grid_buttons("normal")
+            self.log_message( "Edição em grade ativada: duplo clique edita a célula; as alterações são gravadas ao salvar.")
+        else:
+            if self.change_set is not None and not self.change_set.is_empty:
+                if not messagebox.askyesno("Edição em grade", "Descartar as alterações pendentes?"):
+                    self.grid_mode.set(True)
+                    return
+                self._grid_discard()
+            self.treeview_frame.disable_cell_edit()
+            self.change_set = None
+            self._set_grid_buttons("disabled")
+            self._update_grid_status()
+
+    def _set_grid_buttons(self, state: str) -> None:
+        for button in self.grid_buttons:
+            button.config(state=state)
+
+    def _decorate_row(self, index: int, values: list):
+        """Sobrepõe as alterações pendentes aos valores exibidos e marca a linha pelo tipo de alteração."""
+        if self.change_set is None:
+            return values, ()
+        values, kind = self.change_set.overlay(index, self.buffer.columns, values)
+        return values, (kind,) if kind else ()
+
+    def _grid_cell_text(self, index: int, column: str) -> str:
+        """Texto inicial do editor da célula: o valor pendente ou o carregado."""
+        change = self.change_set.get(index) if self.change_set is not None else None
+        value = change.values[column] if change is not None and column in change.values else self.buffer.row(index).get(column)
+        value = to_db_value(value)
+        return "" if value is None else str(value)
+
+    def _grid_cell_edit(self, index: int, column: str, text_value: str) -> None:
+        """Converte o texto para o tipo da coluna e o registra no ChangeSet (nada vai ao servidor)."""
+        if self.change_set is None or self._grid_saving:
+            return
+        change = self.change_set.get(index)
+        if change is not None and change.kind == KIND_DELETE:
+            self.grid_status.config(text="Linha marcada para exclusão.")
+            return
+        if column in self.change_set.key_columns and not (change is not None and change.new):
+            messagebox.showwarning("Edição em grade", f"A coluna '{column}' faz parte da chave primária e não pode ser alterada.")
+            return
+        converter = self._column_converters.get(column, str)
+        try:
+            # Célula vazia grava NULL
+            text_value = text_value.strip()
+            value = _convert_column_type({column: converter}, {column: text_value})[column] if text_value else None
+            self.change_set.stage_update(index, self.buffer.row(index), column, value)
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Valor inválido", f"Valor '{text_value}' inválido para a coluna '{column}': {e}")
+            return
+        self._refresh_grid()
+
+    def _grid_new_row(self) -> None:
+        """Acrescenta uma linha vazia no fim da tabela, a ser inserida ao salvar."""
+        self.buffer.append_rows([[None] * len(self.buffer.columns)])
+        index = len(self.buffer) - 1
+        self.change_set.stage_insert(index)
+        self._refresh_grid()
+        self.treeview_frame.select_item(index)
+
+    def _grid_delete_selected(self) -> None:
+        indexes = self.treeview_frame.get_selected_indexes()
+        if not indexes:
+            messagebox.showinfo("Edição em grade", "Selecione as linhas a excluir.")
+            return
+        for index in indexes:
+            self.change_set.stage_delete(index, self.buffer.row(index))
+        self._refresh_grid()
+
+    def _grid_discard(self) -> None:
+        """Descarta as alterações pendentes e remove as linhas novas ainda não gravadas."""
+        if self.change_set is None:
+            return
+        new_rows = self.change_set.new_rows()
+        self.change_set.discard()
+        if new_rows:
+            df = self.df
+            self.update_table(df.drop(df.index[new_rows]))
+        self._refresh_grid()
+
+    def _refresh_grid(self) -> None:
+        self.total_pages = self._calculate_total_pages()
+        self.treeview_frame.update_table(self.buffer, self.current_page, self.rows_per_page)
+        self._update_grid_status()
+
+    def _update_grid_status(self) -> None:
+        if self.grid_toolbar is None:
+            return
+        if self.change_set is None or self.change_set.is_empty:
+            self.grid_status.config(text="")
+            return
+        counts = self.change_set.counts()
+        self.grid_status.config(text=f"Pendentes: {counts['update']} alteradas, {counts['insert']} novas, {counts['delete']} excluídas")
+
+    def _grid_save(self, force: bool = False) -> None:
+        """Grava o ChangeSet em segundo plano, em uma transação com lotes parametrizados."""
+        if self.change_set is None or self.change_set.is_empty:
+            messagebox.showinfo("Sem alterações", "Nenhuma alteração pendente.")
+            return
+        self._grid_saving = True
+        self._set_grid_buttons("disabled")
+        self.grid_status.config(text="Salvando...")
+        get_scheduler().submit(self.change_set.flush, self.engine, force, group=self,
+                               on_done=self._on_grid_saved, on_error=self._on_grid_save_error)
+
+    def _on_grid_saved(self, result) -> None:
+        self._grid_saving = False
+        self._set_grid_buttons("normal")
+        if result.conflicts:
+            total = len(result.conflicts)
+            details = "\n".join(str(conflict) for conflict in result.conflicts[:10])
+            if total > 10:
+                details += f"\n... e mais {total - 10}."
+            self.log_message( f"{total} conflitos ao salvar a edição em grade:\n{details}", level="warning")
+            self._update_grid_status()
+            if messagebox.askyesno("Conflitos", f"{total} linhas foram alteradas ou removidas no servidor desde o carregamento:\n\n"
+                                                f"{details}\n\nSalvar mesmo assim, sobrescrevendo?"):
+                self._grid_save(force=True)
+            return
+
+        ResultCache.for_engine(self.engine).invalidate_table(self.table_name)
+        # Linhas novas ficam com a chave gerada pelo servidor; sem ela, saem da tabela até a próxima carga
+        df = self.change_set.apply_to(self.df, drop_rows=result.unknown_keys)
+        self.change_set.discard()
+        message = f"Alterações salvas: {result.updated} atualizadas, {result.inserted} inseridas, {result.deleted} excluídas."
+        if result.skipped:
+            message += f" {result.skipped} linhas novas vazias ignoradas."
+        if result.unknown_keys:
+            message += (f" A chave de {len(result.unknown_keys)} linhas inseridas não pôde ser lida: "
+                        "recarregue a tabela para vê-las e editá-las.")
+        self.log_message( message, level="info")
+        if self.on_data_change:
+            self.on_data_change(df)
+        else:
+            self.update_table(df)
+        self._update_grid_status()
+        messagebox.showinfo("Sucesso", message)
+
+    def _on_grid_save_error(self, e: Exception) -> None:
+        self._grid_saving = False
+        self._set_grid_buttons("normal")
+        self._update_grid_status()
+        details = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        self.log_message( f"Erro ao salvar a edição em grade: {e} ({type(e).__name__})\n{details}", level="error")
+        messagebox.showerror("Erro de Banco de Dados", f"Nada foi salvo (a transação foi desfeita): {e}")
+
+    def _get_key_columns(self) -> list:
+        """Colunas da chave da tabela (cache do widget e do retrato do esquema; vazio sem tabela única)."""
+        if self._key_columns is None:
+            self._key_columns = []
+            if self.engine and isinstance(self.table_name, str) and self.table_name:
+                try:
+                    self._key_columns = get_primary_key_columns(self.engine, self.table_name)
+                except Exception as e:
+                    self.log_message( f"Não foi possível obter a chave primária de '{self.table_name}': {e}", level="warning")
+        return self._key_columns
+
+    def update_table_for_search(self, df: Optional[Union[pd.DataFrame, ColumnarBuffer]] = None) -> None:
         try:
             if df is not None and not df.empty:
-                # 🔹 Se já houver dados, concatena em vez de sobrescrever
-                if hasattr(self, "df") and isinstance(self.df, pd.DataFrame):
-                    self.df = pd.concat([self.df, df], ignore_index=True)
-                    # del df
+                # 🔹 Anexa o novo bloco ao buffer colunar (sem copiar o que já foi carregado)
+                if isinstance(df, ColumnarBuffer):
+                    self.buffer.extend(df)
                 else:
-                    self.df = df.copy()
-                    # del df
+                    self.buffer.append_dataframe(df)
 
                 # 🔹 Recalcula a paginação
                 self.total_pages = self._calculate_total_pages()
                 self.current_page = min(self.current_page, self.total_pages - 1)
 
+                # 🔹 No modo virtual, as novas linhas ficam acessíveis imediatamente pela rolagem
+                if self.virtual_scroll:
+                    self.treeview_frame.update_table(self.buffer, self.current_page, self.rows_per_page)
+                    return
+
             # 🔹 Atualiza a exibição da tabela
-            n_linha = len(self.df) if hasattr(self, "df") and isinstance(self.df, pd.DataFrame) else 0
+            n_linha = len(self.buffer)
             self.navigation_frame.update_pagination(self.current_page, self.total_pages, n_linha)
             
             self.log_message( "Tabela e paginação atualizadas com sucesso.")
@@ -5,6 +5,7 @@ import traceback
 from DatabaseManager import DatabaseManager
 from config.ConfigManager import ConfigManager
 from Theme import Theme
+from utils.job_scheduler import get_scheduler
 from utils.gui_principal import _connect_thread, _update_connection_status, delete_profile, disconnect, load_profile, log_message, new_profile, save_profile, test_connection, update_port, validate_connection_fields
 
 class DatabaseConnectorGUI:
@@ -23,6 +24,8 @@ class DatabaseConnectorGUI:
         
         self.current_profile.set(self.config_manager.open_file())
         load_profile(self)
+        # Resultados das tarefas em segundo plano chegam à interface por esta janela
+        get_scheduler().attach_ui(self.root)
         self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
     
     def _initialize_variables(self):
@@ -216,6 +219,8 @@ class DatabaseConnectorGUI:
         
         config = {key: var.get() for key, var in zip(["host", "port", "user", "password", "database"], 
                                                     [self.host_var, self.port_var, self.user_var, self.password_var, self.database_var])}
+        config["pool"] = self.config_manager.get_pool_options(self.current_profile.get())
+        config["metadata_ttl"] = self.config_manager.get_metadata_ttl(self.current_profile.get())
         
         self.connection_status.set("Conectando...")
         threading.Thread(target=_connect_thread, args=(self,self.db_type.get(), config), daemon=True).start()
@@ -224,6 +229,7 @@ class DatabaseConnectorGUI:
 
     def quit_app(self):
         """Fecha o aplicativo."""
+        DatabaseManager.dispose_all()
         self.root.quit()
         self.root.destroy()
 
@@ -1,6 +1,9 @@
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Tuple
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from config.ConfigManager import ConfigManager
+from config.SchemaSnapshot import SchemaSnapshot
 from utils.logger import logger
 
 class DatabaseManager:
@@ -16,9 +19,43 @@ class DatabaseManager:
         "MariaDB": "mariadb+mariadbconnector://{user}:{password}@{host}:{port}/{database}",
     }
 
+    # Registro global de engines por perfil: (db_type, host, port, database, user) -> (uri, opções do pool, engine)
+    _engines: Dict[Tuple[str, str, str, str, str], Tuple[str, Dict[str, Any], Any]] = {}
+    _engines_lock = threading.Lock()
+
+    @staticmethod
+    def profile_key(db_type: str, config: Dict[str, Any]) -> Tuple[str, str, str, str, str]:
+        """Retorna a chave do registro de engines para o perfil fornecido."""
+        return (
+            db_type,
+            str(config.get("host", "localhost")),
+            str(config.get("port", DatabaseUtils.get_default_port(db_type))),
+            str(config.get("database", "")),
+            str(config.get("user", "root")),
+        )
+
+    @staticmethod
+    def _pool_kwargs(db_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta os argumentos de pool do create_engine a partir das opções do perfil."""
+        options = {**ConfigManager.DEFAULT_POOL_OPTIONS, **(config.get("pool") or {})}
+        kwargs = {
+            "pool_size": int(options["pool_size"]),
+            "max_overflow": int(options["max_overflow"]),
+            "pool_recycle": int(options["pool_recycle"]),
+            "pool_pre_ping": bool(options["pool_pre_ping"]),
+            "pool_timeout": int(options["pool_timeout"]),
+        }
+        database = str(config.get("database", ""))
+        if db_type == "SQLite" and (not database or database == ":memory:" or "mode=memory" in database):
+            # SQLite em memória usa SingletonThreadPool, que não aceita overflow/timeout
+            # (em arquivo é QueuePool, que respeita as opções do perfil)
+            for key in ("pool_size", "max_overflow", "pool_timeout"):
+                kwargs.pop(key)
+        return kwargs
+
     @staticmethod
     def get_engine(db_type: str, config: Dict[str, Any]):
-        """Cria e retorna um engine SQLAlchemy"""
+        """Retorna o engine SQLAlchemy do perfil, reutilizando o do registro se já existir."""
         if db_type not in DatabaseManager.DB_URIS:
             logger.error(f"Tipo de banco de dados não suportado: {db_type}")    
             raise ValueError(f"Tipo de banco de dados não suportado: {db_type}")
@@ -31,8 +68,23 @@ class DatabaseManager:
                 database=config.get("database", ""),
                 service=config.get("service", "xe")
             )
-            logger.debug(f"Conectando a URI: {uri}")  # Debug log for the URI (be cautious with sensitive data)
-            return create_engine(uri)
+            pool_kwargs = DatabaseManager._pool_kwargs(db_type, config)
+            key = DatabaseManager.profile_key(db_type, config)
+
+            with DatabaseManager._engines_lock:
+                cached = DatabaseManager._engines.get(key)
+                if cached is not None:
+                    cached_uri, cached_kwargs, engine = cached
+                    if cached_uri == uri and cached_kwargs == pool_kwargs:
+                        logger.debug(f"Reutilizando engine do registro para {key}")
+                        return engine
+                    # Senha ou opções de pool mudaram: descarta o engine antigo
+                    engine.dispose()
+
+                logger.debug(f"Conectando a URI: {uri}")  # Debug log for the URI (be cautious with sensitive data)
+                engine = create_engine(uri, **pool_kwargs)
+                DatabaseManager._engines[key] = (uri, pool_kwargs, engine)
+                return engine
         except Exception as e:
             logger.error(f"Erro ao criar engine para {db_type}: {e}")
             raise
@@ -58,6 +110,30 @@ class DatabaseManager:
                     return DatabaseManager.connect("pg",config)
             raise  # Re-raise the error to propagate the issue
 
+    @staticmethod
+    def dispose_engine(engine) -> bool:
+        """Remove o engine do registro e fecha todas as conexões do seu pool."""
+        if engine is None:
+            return False
+        with DatabaseManager._engines_lock:
+            for key, (_, _, registered) in list(DatabaseManager._engines.items()):
+                if registered is engine:
+                    del DatabaseManager._engines[key]
+                    break
+        SchemaSnapshot.discard(engine)
+        engine.dispose()
+        logger.info("Engine descartado e pool de conexões fechado.")
+        return True
+
+    @staticmethod
+    def dispose_all() -> None:
+        """Descarta todos os engines registrados (usado ao encerrar a aplicação)."""
+        with DatabaseManager._engines_lock:
+            engines = [engine for _, _, engine in DatabaseManager._engines.values()]
+            DatabaseManager._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
 class DatabaseUtils:
     """Classe auxiliar para obter informações sobre bancos de dados"""
     
@@ -72,17 +148,18 @@ class DatabaseUtils:
 
     @staticmethod
     def test_connection(db_type: str, config: Dict[str, Any]) -> bool:
-        """Testa a conectividade com o banco de dados fornecido."""
+        """Testa a conectividade com o banco de dados fornecido usando o engine do registro."""
         try:
-            session, engine = DatabaseManager.connect(db_type, config)
-            # Testa a conexão
+            engine = DatabaseManager.get_engine(db_type, config)
+            # Reaproveita uma conexão já aberta do pool, sem criar sessão
             with engine.connect() as connection:
                 connection.execute(text("SELECT 1"))  
-            session.close()  # Fecha corretamente
             logger.info(f"✅ Conexão bem-sucedida com {db_type}.")
             return True
         except Exception as e:
             logger.error(f"❌ Falha ao conectar ao banco {db_type}: {e}")
+            if db_type == "PostgreSQL" and "SSL" in str(e):
+                return DatabaseUtils.test_connection("pg", config)
             return False
 
     @staticmethod
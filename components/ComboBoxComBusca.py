@@ -1,6 +1,6 @@
-import threading
 import tkinter as tk
 from tkinter import ttk, font
+from utils.job_scheduler import get_scheduler
 
 class ComboBoxComBusca:
     """
@@ -30,7 +30,7 @@ class ComboBoxComBusca:
         self.name_type_options = name_type_options
         self.filtered_options = options
         self.selected_option = tk.StringVar()
-        self.thread_lock = threading.Lock()
+        self._select_task = None
         
         # Configura textos personalizáveis
         self.title_text = title_text
@@ -197,11 +197,11 @@ class ComboBoxComBusca:
              self.run_ps_on_select_in_thread()
 
     def run_ps_on_select_in_thread(self):
-        """Executa a função ps_on_select em uma nova thread, mas garante que apenas uma thread seja criada por vez."""
-        # Verifica se já existe uma thread em execução
-        if not self.thread_lock.locked():
-            with self.thread_lock:  # Obtém o lock para garantir que apenas uma thread seja executada
-                threading.Thread(target=self.ps_on_select).start()
+        """Executa a função ps_on_select em segundo plano; uma seleção nova descarta a anterior ainda não iniciada."""
+        if self._select_task is not None and not self._select_task.finished.is_set():
+            if not self._select_task.cancel():
+                return  # A seleção anterior já está em execução
+        self._select_task = get_scheduler().submit(self.ps_on_select, group=self)
     
     def clear_selection(self):
         """Limpa a seleção feita na ComboBox."""
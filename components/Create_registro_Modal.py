@@ -10,6 +10,7 @@ import traceback
 from components.CheckboxWithEntry import CheckboxWithEntry
 from components.Data_wiget2 import DateTimeEntry
 from components.DataWidget import DatabaseDateWidget
+from utils.result_cache import ResultCache
 from utils.validarText import  _convert_column_type_for_string, _map_column_type, get_valor_idependente_entry, quote_identifier, validar_numero, _is_system_field, validar_numero_float
 
 class ColumnInfo(TypedDict):
@@ -343,6 +344,7 @@ class CreateModal(tk.Toplevel):
                     record_id = result.fetchone()[0] if result.returns_rows and result.rowcount > 0 else None
                 except Exception:
                     record_id = None  # Garante que não haverá erro ao acessar scalar()
+            ResultCache.for_engine(self.engine).invalidate_table(self.table_name)
             
             # Atualiza o DataFrame com os novos valores
             df = self.df.copy()
@@ -3,16 +3,20 @@ from tkinter import messagebox
 import traceback
 from typing import Any
 from components.CheckboxWithEntry import CheckboxWithEntry
-from sqlalchemy import inspect, text
+from sqlalchemy import text
 import tkinter as tk
 from tkinter import ttk
 from components.Data_wiget2 import DateTimeEntry
 from components.DataWidget import DatabaseDateWidget
 from components.filter_column_show_in_consulta import FilterColumnShowInConsulta
-from config.salavarInfoAllColumn import get_columns_by_table, save_columns_to_file
+from config.SchemaSnapshot import SchemaSnapshot
+from config.salavarInfoAllColumn import get_columns_by_table, invalidate_metadata, save_columns_to_file
 from utils.filter_util import _update_column_selection, _update_status_label, get_selected_columns
 from utils.validarText import _fetch_enum_values, validar_numero
 
+# Namespaces do catálogo com metadados por tabela (colunas, valores ENUM/CHECK e campos do sistema)
+TABLE_METADATA_FILES = ("tables_columns_data.pkl", "tables_columns_enum.pkl", "tables_columns_system_field.pkl")
+
 class FilterContainer(ttk.LabelFrame):
     def __init__(self, parent, log_message,database_name,enum_values,columns, engine: Any, db_type: str,update_table_widget, status_var: Any, table_combobox: Any, *args, **kwargs):
         super().__init__(parent, text="Filtros", *args, **kwargs)
@@ -252,9 +256,8 @@ class FilterContainer(ttk.LabelFrame):
             if self.columns:
                 columns = self.columns
             else:
-                inspector = inspect(self.engine)
-                self.columns= inspector.get_columns(self.table_name, schema=None)
-                if save_columns_to_file({table_name: self.columns}, "tables_columns_data.pkl", log_message=self.log_message):
+                self.columns = SchemaSnapshot.for_engine(self.engine).get_columns(self.table_name)
+                if save_columns_to_file({table_name: self.columns}, "tables_columns_data.pkl", log_message=self.log_message, profile=f"{self.db_type}{self.database_name}"):
                     self.log_message("salvo com sucesso","info")
                 columns = self.columns
             # print(columns)    
@@ -285,6 +288,34 @@ class FilterContainer(ttk.LabelFrame):
             messagebox.showerror("Erro", f"Erro ao obter colunas: {e}")
         # self.update_table_widget()  por enquanto não carrega a tabela logo que seleciona um item na combobox
     
+    def _catalog_key(self, table_name):
+        return f'{self.db_type}{self.database_name}{table_name}'
+
+    def invalidate_columns(self, table_name, log_message=None):
+        """
+        Descarta os metadados da tabela em todos os namespaces do catálogo e no retrato do esquema
+        (não acessa widgets). Retorna se a tabela ainda existe no servidor.
+        """
+        for ficheiro_name in TABLE_METADATA_FILES:
+            invalidate_metadata(ficheiro_name=ficheiro_name, table_name=self._catalog_key(table_name),
+                                log_message=log_message or self.log_message)
+        return SchemaSnapshot.for_engine(self.engine).refresh_table(table_name)
+
+    def refresh_columns(self, table_name, columns):
+        """
+        Aplica as colunas relidas do servidor à tabela exibida (executa na thread da interface).
+        Os filtros só são recriados se as colunas mudaram; caso contrário, os valores digitados são mantidos.
+        """
+        if self.table_name != table_name or columns is None:
+            return
+        if [col["name"] for col in self.columns or []] != [col["name"] for col in columns]:
+            self.log_message(f"As colunas da tabela {table_name} mudaram no servidor; filtros recarregados.", level="warning")
+            self.load_columns()
+            return
+        self.columns = columns
+        save_columns_to_file({self._catalog_key(table_name): columns}, "tables_columns_data.pkl",
+                             log_message=self.log_message, profile=f"{self.db_type}{self.database_name}")
+
     def get_column_filters(self):
         return self.column_filters
     
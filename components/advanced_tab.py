@@ -1,13 +1,19 @@
-import threading
-import time
 import tkinter as tk
 from tkinter import ttk
 import traceback
 from typing import Any, Union
 import pandas as pd
 import sqlparse
-from sqlalchemy import text
 from DataFrameTable import DataFrameTable
+from utils.columnar_buffer import ColumnarBuffer
+from utils.job_scheduler import get_scheduler
+from utils.query_jobs import QueryJob, current_job
+from utils.result_stream import ResultStream
+from utils.script_runner import run_script, split_statements
+from components.script_results import ScriptResultsFrame
+from components.plan_viewer import PlanViewer
+from components.export_dialog import ExportDialog, ask_export_path
+from utils.query_plan import explain_query
 
 class AdvancedTab:
     """Cria a aba de consultas SQL avançadas."""
@@ -20,7 +26,10 @@ class AdvancedTab:
         self.engine = engine
         self.current_profile = current_profile
         self.stop_event = None
-        self.thread = None
+        self.job = None
+        # Resultado com o cursor ainda aberto no servidor (há mais linhas para carregar)
+        self.result_stream = None
+        self._fetching_more = False
         self.databese_name = database_name
         self.frame = ttk.Frame(notebook, padding=10)
         self.sql_text = None
@@ -44,33 +53,105 @@ class AdvancedTab:
         self.carregar_button = ttk.Button(button_frame, text="🔍 Executar", command=self.carregar_dados_assincrono)
         self.carregar_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="🧹 Limpar", command=self.clear_sql).pack(side=tk.LEFT, padx=5)
+        self.more_button = ttk.Button(button_frame, text="⬇️ Carregar mais", command=self.load_more, state="disabled")
+        self.more_button.pack(side=tk.LEFT, padx=5)
+        self.export_button = ttk.Button(button_frame, text="💾 Exportar tudo", command=self.export_all)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        self.script_button = ttk.Button(button_frame, text="📜 Executar script", command=self.executar_script)
+        self.script_button.pack(side=tk.LEFT, padx=5)
+        self.transaction_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Em transação", variable=self.transaction_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="🧭 Plano", command=self.show_plan).pack(side=tk.LEFT, padx=5)
+        self.analyze_var = tk.BooleanVar(value=False)
+        if self.db_type == "postgresql":
+            # EXPLAIN ANALYZE executa a consulta (em transação desfeita) para obter tempos e linhas reais
+            ttk.Checkbutton(button_frame, text="ANALYZE", variable=self.analyze_var).pack(side=tk.LEFT, padx=5)
 
         ttk.Label(self.frame, textvariable=self.status_var, foreground="gray").pack(pady=5)
 
     def carregar_dados_assincrono(self):
         """Inicia uma thread para carregar os dados."""
-        if self.stop_event and not self.stop_event.is_set():
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join()
-            self.stop_event = None
+        if self.job is not None and self.job.is_running and not self.job.cancelled:
+            # Interrompe a consulta no servidor sem bloquear a interface
+            self.carregar_button.config(text="Cancelando...", state="disabled")
+            self.status_var.set("Cancelando consulta...")
+            self.job.cancel(on_cancelled=lambda job: get_scheduler().call_in_ui(self._on_query_cancelled, job))
+            return
+
+        try:
+            self.carregar_button.config(text="❌ Cancelar", state="normal")
+            self.status_var.set("Carregando dados...")
+            self.log_message("Iniciando carregamento de dados...")
+            self.load_data()
+        except Exception as e:
             self.carregar_button.config(text="🔍 Executar", state="normal")
-            self.status_var.set("Consulta cancelada.")
+            self.handle_error("Erro ao carregar dados", e)
+
+    def executar_script(self):
+        """Executa o texto como script: cada comando em sequência, com tempos e resultados próprios."""
+        if self.job is not None and self.job.is_running:
+            self.carregar_dados_assincrono()  # Cancela a execução em andamento
+            return
+        statements = split_statements(self.sql_text.get("1.0", tk.END))
+        if not statements:
+            self.status_var.set("❗ Nenhuma consulta digitada.")
             return
 
-        def carregar():
-            try:
-                self.carregar_button.config(text="❌ Cancelar", state="normal")
-                self.status_var.set("Carregando dados...")
-                self.log_message("Iniciando carregamento de dados...")
-                self.load_data()
-                self.status_var.set("Carregamento concluído.")
-                self.log_message("✅ Carregamento concluído.")
-            except Exception as e:
-                self.carregar_button.config(text="🔍 Executar", state="normal")
-                self.handle_error("Erro ao carregar dados", e)
+        self._close_stream()
+        if self.table_widget:
+            self.table_widget.destroy()
+        self.table_widget = ScriptResultsFrame(
+            self.table_frame, engine=self.engine, db_type=self.db_type, databse_name=self.databese_name,
+            log_message=self.log_message, build_columns=self.simulate_get_columns_from_df,
+        )
+        self.table_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        threading.Thread(target=carregar, daemon=True).start()
+        transactional = self.transaction_var.get()
+        self.carregar_button.config(text="❌ Cancelar", state="normal")
+        self.status_var.set(f"Executando script ({len(statements)} comandos{' em transação' if transactional else ''})...")
+        self.job = QueryJob(self.engine, self._run_script, statements, transactional, name="Script SQL", group=self).start()
+        self.stop_event = self.job.stop_event
+
+    def _run_script(self, statements, transactional):
+        """Executa o script (em segundo plano), enviando cada comando concluído para a interface."""
+        ui = get_scheduler().call_in_ui
+        job = current_job()
+        results_frame = self.table_widget
+        try:
+            results = run_script(self.engine, statements, transactional=transactional, stop_event=job.stop_event,
+                                 on_statement=lambda result: ui(results_frame.add_result, result))
+            total = sum(r.wall_time for r in results)
+            if job.stop_event.is_set():
+                message = f"Script interrompido após {len(results)} de {len(statements)} comandos."
+            else:
+                message = f"✅ Script concluído: {len(results)} comandos em {total * 1000:.1f} ms."
+            ui(self._finish_query, message)
+            ui(self.log_message, message)
+        except Exception as e:
+            if job.stop_event.is_set():
+                return
+            suffix = " Transação desfeita." if transactional else ""
+            ui(self._finish_query, f"❌ Erro no script: {e}.{suffix}")
+            ui(self.log_message, f"Erro no script: {e}.{suffix}", "error")
+
+    def show_plan(self):
+        """Executa o EXPLAIN do dialeto sobre a consulta e abre o plano em árvore."""
+        query = self.sql_text.get("1.0", tk.END).strip().rstrip(";")
+        if not query or not self.is_valid_sql(query):
+            self.status_var.set("❗ Consulta SQL inválida.")
+            return
+        analyze = self.analyze_var.get()
+        self.status_var.set("Obtendo plano de execução...")
+        get_scheduler().submit(
+            explain_query, self.engine, query, None, analyze, group=self,
+            on_done=lambda plan: self._open_plan(plan, query),
+            on_error=lambda e: self.handle_error("Erro ao obter o plano de execução", e),
+        )
+
+    def _open_plan(self, plan, query):
+        warnings = sum(len(node.warnings) for node in plan.walk())
+        self.status_var.set(f"Plano obtido ({warnings} alertas).")
+        PlanViewer(self.frame, plan, query)
 
     def is_valid_sql(self, query: str) -> bool:
         """Valida a sintaxe SQL usando sqlparse."""
@@ -81,19 +162,35 @@ class AdvancedTab:
             return False
 
     def load_data(self, max_rows=1000):
-        """Inicia a execução SQL em uma thread."""
-        if self.stop_event and not self.stop_event.is_set():
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join()
-            self.thread = None
-            self.stop_event = None
-            time.sleep(1)
-
-        self.stop_event = threading.Event()
-        self.thread = threading.Thread(target=self.execute_sql, args=(max_rows,), daemon=True)
-        self.thread.start()
-        
+        """Inicia a execução SQL em segundo plano, após interromper a consulta anterior."""
+        previous = self.job if self.job is not None and self.job.is_running else None
+        # O texto é lido aqui, na thread da interface; a tarefa em segundo plano não toca nos widgets
+        query = self.sql_text.get("1.0", tk.END).strip()
+        self._close_stream()
+        self.job = QueryJob(self.engine, self.execute_sql, max_rows, query, name="Consulta SQL", after=previous, group=self).start()
+        self.stop_event = self.job.stop_event
+
+    def _on_query_cancelled(self, job):
+        """Finaliza o cancelamento na interface (executa na thread da interface)."""
+        if job is not self.job:
+            return
+        self._fetching_more = False
+        self._close_stream()
+        self.carregar_button.config(text="🔍 Executar", state="normal")
+        self.status_var.set("Consulta cancelada.")
+        self.log_message("Cancelamento concluído: a consulta foi interrompida no servidor.")
+
+    def _close_stream(self):
+        """Fecha o cursor mantido aberto (fora da thread da interface, após a leitura em curso)."""
+        stream, self.result_stream = self.result_stream, None
+        self.more_button.config(state="disabled")
+        if stream is None:
+            return
+        if self.job is not None and self.job.is_running:
+            self.job.add_done_callback(lambda job: stream.close())
+        else:
+            get_scheduler().submit(stream.close, group=self)
+
     def extract_tables_from_query(self, query: str):
         """Extrai as tabelas da consulta SQL usando sqlparse."""
         parsed = sqlparse.parse(query)
@@ -108,33 +205,103 @@ class AdvancedTab:
 
         return list(tables)
 
-    def execute_sql(self, max_rows: int):
+    def _finish_query(self, status=None):
+        """Restaura o botão e o status (executa na thread da interface)."""
+        self.carregar_button.config(text="🔍 Executar", state="normal")
+        if status is not None:
+            self.status_var.set(status)
+
+    def execute_sql(self, max_rows: int, query: str):
         """Executa a consulta SQL validada."""
-        query = self.sql_text.get("1.0", tk.END).strip()
+        ui = get_scheduler().call_in_ui
         if not query:
-            self.carregar_button.config(text="🔍 Executar", state="normal")
-            self.status_var.set("❗ Nenhuma consulta digitada.")
+            ui(self._finish_query, "❗ Nenhuma consulta digitada.")
             return
 
         if not self.is_valid_sql(query):
-            self.carregar_button.config(text="🔍 Executar", state="normal")
-            self.status_var.set("❗ Consulta SQL inválida.")
+            ui(self._finish_query, "❗ Consulta SQL inválida.")
             return
 
+        job = current_job()
+        # O cursor fica aberto no servidor: as próximas linhas são lidas sob demanda (rolagem ou botão)
+        stream = ResultStream(self.engine, query, chunk_size=max_rows)
         try:
-            with self.engine.connect() as conn:
-                result = conn.execution_options(stream_results=True).execute(text(query))
-                df = pd.DataFrame(result.fetchmany(max_rows), columns=result.keys())
-                print(df)
-                tables = self.extract_tables_from_query(query)
-                self.frame.after(0, lambda: self.update_table_widget(df, tables))
-                if len(df) < max_rows:
-                    self.carregar_button.config(text="🔍 Executar", state="normal")
-                else:
-                    self.log_message(f"⚠️ Apenas os primeiros {max_rows} resultados foram carregados.")
+            rows = stream.fetch_next()
+            if job.stop_event.is_set():
+                stream.close()
+                return
+            df = pd.DataFrame(rows, columns=stream.columns)
+            tables = self.extract_tables_from_query(query)
+            ui(self._show_first_chunk, job, stream, df, tables)
         except Exception as e:
-            self.handle_error("Erro ao executar SQL", e)
-            self.carregar_button.config(text="🔍 Executar", state="normal")
+            stream.close()
+            if job.stop_event.is_set():
+                # Erro causado pela interrupção da consulta no servidor
+                return
+            ui(self.handle_error, "Erro ao executar SQL", e)
+            ui(self._finish_query)
+
+    def _show_first_chunk(self, job, stream, df, tables):
+        """Exibe o primeiro lote e guarda o cursor aberto (executa na thread da interface)."""
+        if job is not self.job:
+            get_scheduler().submit(stream.close, group=self)
+            return
+        self.update_table_widget(df, tables)
+        if stream.exhausted:
+            self._finish_query(f"{len(df)} linhas carregadas.")
+            return
+        self.result_stream = stream
+        self.more_button.config(state="normal")
+        self._finish_query(f"{stream.fetched_rows} linhas carregadas; role até o fim ou clique em 'Carregar mais'.")
+
+    def load_more(self):
+        """Lê o próximo lote do cursor aberto e o anexa à tabela."""
+        stream = self.result_stream
+        if stream is None or self._fetching_more or self.job is None or self.job.cancelled:
+            return
+        self._fetching_more = True
+        self.carregar_button.config(text="❌ Cancelar", state="normal")
+        self.more_button.config(state="disabled")
+        self.status_var.set("Carregando mais linhas...")
+        self.job.spawn(self._fetch_more, stream)
+
+    def _fetch_more(self, stream):
+        """Busca o próximo lote do cursor (executa em segundo plano)."""
+        ui = get_scheduler().call_in_ui
+        try:
+            rows = stream.fetch_next()
+            ui(self._append_chunk, stream, ColumnarBuffer.from_rows(stream.columns, rows))
+        except Exception as e:
+            if current_job().stop_event.is_set():
+                return
+            ui(self.handle_error, "Erro ao carregar mais linhas", e)
+            ui(self._append_chunk, stream, None)
+
+    def _append_chunk(self, stream, buffer):
+        """Anexa o lote lido à tabela (executa na thread da interface)."""
+        self._fetching_more = False
+        if stream is not self.result_stream:
+            return
+        if buffer is not None and self.table_widget is not None:
+            self.table_widget.update_table_for_search(buffer)
+        if stream.exhausted:
+            self.result_stream = None
+            self._finish_query(f"Todas as {stream.fetched_rows} linhas carregadas.")
+            return
+        self.more_button.config(state="normal")
+        self._finish_query(f"{stream.fetched_rows} linhas carregadas; há mais linhas no servidor.")
+
+    def export_all(self):
+        """Grava o resultado completo da consulta em arquivo (CSV, gzip, Parquet, JSON Lines ou Excel), lote a lote."""
+        query = self.sql_text.get("1.0", tk.END).strip()
+        if not query or not self.is_valid_sql(query):
+            self.status_var.set("❗ Consulta SQL inválida.")
+            return
+        file_path = ask_export_path(self.frame, "resultado.csv")
+        if not file_path:
+            return
+        ExportDialog(self.frame, self.engine, query, file_path, self.log_message, title="Exportar resultado completo")
+
     def simulate_get_columns_from_df(self,df):
         simulated_columns = []
 
@@ -170,6 +337,8 @@ class AdvancedTab:
             db_type=self.db_type,
             columns=self.simulate_get_columns_from_df(df),
             enum_values={},
+            virtual_scroll=True,
+            on_scroll_end=self.load_more,
         )
         self.table_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
@@ -181,5 +350,6 @@ class AdvancedTab:
     def handle_error(self, title: str, error: Exception):
         """Mostra erro e loga."""
         self.status_var.set(f"❌ {title}: {error}")
-        self.log_message(f"{title}: {error} ({type(error).__name__})\n{traceback.format_exc()}","error")
+        details = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self.log_message(f"{title}: {error} ({type(error).__name__})\n{details}","error")
 
@@ -1,8 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import pandas as pd
-from sqlalchemy import inspect
-import threading
+from config.SchemaSnapshot import SchemaSnapshot
+from components.export_dialog import ExportDialog, ask_export_path
+from utils.exporters import export_dataframe, table_query
+from utils.job_scheduler import get_scheduler
+from utils.query_jobs import QueryJob, current_job
+from utils.table_profile import TableProfiler
 
 class AnalysisFrame(ttk.Frame):
     def __init__(self, master, df: pd.DataFrame, engine,table_name,query_executed):
@@ -10,6 +14,9 @@ class AnalysisFrame(ttk.Frame):
         self.df = df
         self.table_name = table_name
         self.engine = engine
+        self._stop_thread = False
+        # Trabalho da análise no servidor (cancelável: interrompe a consulta em andamento)
+        self.job = None
         self.columnconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self._create_widgets()
@@ -40,20 +47,35 @@ class AnalysisFrame(ttk.Frame):
         ttk.Button(btn_frame, text="Ver Relações", command=self.show_table_relations).grid(row=0, column=1, sticky="ew", padx=5)
         ttk.Button(btn_frame, text="Mal Formados", command=self.show_malformed).grid(row=0, column=2, sticky="ew", padx=5)
         ttk.Button(btn_frame, text="Duplicados", command=self.show_duplicates).grid(row=0, column=3, sticky="ew", padx=5)
-        ttk.Button(btn_frame, text="Exportar Excel", command=self.export_to_excel).grid(row=0, column=4, sticky="ew", padx=5)
+        ttk.Button(btn_frame, text="Exportar Tabela", command=self.export_to_excel).grid(row=0, column=4, sticky="ew", padx=5)
         ttk.Button(btn_frame, text="Resumo Estatístico", command=self.show_summary).grid(row=0, column=5, sticky="ew", padx=5)
+
+        # Análise no servidor: as verificações viram consultas de agregação sobre a tabela inteira
+        server_available = isinstance(self.table_name, str) and bool(self.table_name) and self.engine is not None
+        self.server_mode = tk.BooleanVar(value=server_available)
+        ttk.Checkbutton(btn_frame, text="Análise no servidor (tabela inteira)", variable=self.server_mode,
+                        state="normal" if server_available else "disabled").grid(row=1, column=0, columnspan=3, sticky="w", padx=5, pady=(5, 0))
         
     def cancel_analysis(self):
         self._stop_thread = True
+        if self.job is not None and self.job.is_running:
+            self.job.cancel()
         self.progress_bar.stop()
         self.update_text_area("Análise cancelada pelo usuário.")
     
     def show_malformed(self):
+        if self.server_mode.get():
+            self._run_on_server("Mal formados", self._server_malformed, self._show_server_malformed)
+            return
         self._stop_thread = False
         self.progress_bar.start()
-        threading.Thread(target=self.process_malformed, daemon=True).start()
+        get_scheduler().submit(self.process_malformed, group=self,
+                               on_done=self._on_malformed_done, on_error=self._on_malformed_error)
     
     def show_summary(self):
+        if self.server_mode.get():
+            self._run_on_server("Resumo estatístico", lambda profiler: profiler.profile(), self._show_server_summary)
+            return
         try:
             # Gera o resumo estatístico
             summary_df = self.df.describe(include="all")
@@ -93,8 +115,7 @@ class AnalysisFrame(ttk.Frame):
 
     def show_data_types(self):
         try:
-            inspector = inspect(self.engine)
-            columns = inspector.get_columns(self.table_name)
+            columns = SchemaSnapshot.for_engine(self.engine).get_columns(self.table_name)
 
             if not columns:
                 self.update_text_area("❌ Nenhuma coluna encontrada na tabela.")
@@ -112,8 +133,7 @@ class AnalysisFrame(ttk.Frame):
 
     def show_table_relations(self):
         try:
-            inspector = inspect(self.engine)
-            foreign_keys = inspector.get_foreign_keys(self.table_name)
+            foreign_keys = SchemaSnapshot.for_engine(self.engine).get_foreign_keys(self.table_name)
             result = []
 
             if not foreign_keys:
@@ -191,6 +211,9 @@ class AnalysisFrame(ttk.Frame):
 
 
     def show_duplicates(self):
+        if self.server_mode.get():
+            self._run_on_server("Duplicados", self._server_duplicates, self._show_server_duplicates)
+            return
         try:
             if self.df.empty:
                 self.update_text_area("❌ O DataFrame está vazio.")
@@ -222,71 +245,191 @@ class AnalysisFrame(ttk.Frame):
             self.handle_error("Erro ao verificar duplicatas", e)
     
     def process_malformed(self):
+        """Calcula o resumo dos registros mal formados (executa em segundo plano, sem tocar nos widgets)."""
+        # Verifica valores nulos
+        null_summary = self.df.isnull().sum()
+
+        # Verifica strings vazias (apenas em colunas do tipo objeto/string)
+        empty_summary = self.df.select_dtypes(include="object").apply(
+            lambda c: (c.astype(str).str.strip() == "")
+        ).sum()
+
+        # Monta resumo de colunas com dados malformados
+        output = ["📉 Resumo de Colunas com Valores Nulos ou Vazios:\n"]
+        for col in self.df.columns:
+            total_null = null_summary[col]
+            total_empty = empty_summary.get(col, 0)
+            if total_null > 0 or total_empty > 0:
+                output.append(f"• {col}: {total_null} nulos, {total_empty} vazios")
+
+        # Filtra linhas malformadas
+        is_null = self.df.isnull().any(axis=1)
+        is_empty = self.df.select_dtypes(include="object").apply(
+            lambda c: c.astype(str).str.strip() == ""
+        ).any(axis=1)
+        malformed = self.df[is_null | is_empty]
+
+        if not malformed.empty:
+            output.append("\n🧪 Registros Mal Formados:\n")
+            output.append(malformed.to_string(index=False))
+        else:
+            output.append("\n✅ Nenhum registro mal formado encontrado.")
+        return "\n".join(output), malformed
+
+    def _on_malformed_done(self, result):
+        """Exibe o resumo e oferece a exportação (executa na thread da interface)."""
+        if self._stop_thread:
+            return
+        self.progress_bar.stop()
+        text, malformed = result
+        # Atualiza a área de texto com o resumo
+        self.update_text_area(text)
+        if malformed.empty:
+            return
         try:
-            # Verifica valores nulos
-            null_summary = self.df.isnull().sum()
+            # Pergunta se deseja exportar
+            save = messagebox.askyesno("Exportar?", "Deseja exportar os registros mal formados para Excel?")
+            if save:
+                file_path = filedialog.asksaveasfilename(
+                    defaultextension=".xlsx",
+                    filetypes=[("Excel Files", "*.xlsx")],
+                    title="Salvar Registros Mal Formados"
+                )
+                if file_path:
+                    export_dataframe(malformed, file_path)
+                    messagebox.showinfo("Exportação", f"Arquivo salvo com sucesso:\n{file_path}")
+        except Exception as e:
+            self.handle_error("Erro ao verificar registros mal formados", e)
 
-            # Verifica strings vazias (apenas em colunas do tipo objeto/string)
-            empty_summary = self.df.select_dtypes(include="object").apply(
-                lambda c: (c.astype(str).str.strip() == "")
-            ).sum()
+    def _on_malformed_error(self, error):
+        if not self._stop_thread:
+            self.progress_bar.stop()
+        self.handle_error("Erro ao verificar registros mal formados", error)
 
-            # Monta resumo de colunas com dados malformados
-            output = ["📉 Resumo de Colunas com Valores Nulos ou Vazios:\n"]
-            for col in self.df.columns:
-                total_null = null_summary[col]
-                total_empty = empty_summary.get(col, 0)
-                if total_null > 0 or total_empty > 0:
-                    output.append(f"• {col}: {total_null} nulos, {total_empty} vazios")
-
-            # Filtra linhas malformadas
-            is_null = self.df.isnull().any(axis=1)
-            is_empty = self.df.select_dtypes(include="object").apply(
-                lambda c: c.astype(str).str.strip() == ""
-            ).any(axis=1)
-            malformed = self.df[is_null | is_empty]
-
-            if not malformed.empty:
-                output.append("\n🧪 Registros Mal Formados:\n")
-                output.append(malformed.to_string(index=False))
-
-                # Pergunta se deseja exportar
-                save = messagebox.askyesno("Exportar?", "Deseja exportar os registros mal formados para Excel?")
-                if save:
-                    file_path = filedialog.asksaveasfilename(
-                        defaultextension=".xlsx",
-                        filetypes=[("Excel Files", "*.xlsx")],
-                        title="Salvar Registros Mal Formados"
-                    )
-                    if file_path:
-                        malformed.to_excel(file_path, index=False)
-                        messagebox.showinfo("Exportação", f"Arquivo salvo com sucesso:\n{file_path}")
-            else:
-                output.append("\n✅ Nenhum registro mal formado encontrado.")
+    # ------------------------------------------------------------------ análise no servidor
 
-            # Atualiza a área de texto com o resumo
+    def _run_on_server(self, title, compute, render):
+        """Executa `compute(profiler)` em segundo plano e exibe o resultado com `render` na interface."""
+        if self.job is not None and self.job.is_running:
+            self.job.cancel()
+        table_name = self.table_name
+        self._stop_thread = False
+        self.progress_bar.start()
+        self.update_text_area(f"⏳ {title}: analisando a tabela '{table_name}' no servidor...")
+
+        def _task():
+            ui = get_scheduler().call_in_ui
+            job = current_job()
+            try:
+                # As colunas vêm do catálogo (possível ida ao servidor): lidas aqui, fora da interface
+                columns = SchemaSnapshot.for_engine(self.engine).get_columns(table_name)
+                if not columns:
+                    if not job.stop_event.is_set():
+                        ui(self._on_server_done, lambda profiler, result: self.update_text_area("❌ Nenhuma coluna encontrada na tabela."),
+                           None, None)
+                    return
+                profiler = TableProfiler(self.engine, table_name, columns)
+                result = compute(profiler)
+                if not job.stop_event.is_set():
+                    ui(self._on_server_done, render, profiler, result)
+            except Exception as e:
+                if not job.stop_event.is_set():
+                    ui(self._on_server_error, title, e)
+
+        self.job = QueryJob(self.engine, _task, name=f"Análise: {title}", group=self).start()
+
+    def _on_server_done(self, render, profiler, result):
+        if self._stop_thread or not self.winfo_exists():
+            return
+        self.progress_bar.stop()
+        render(profiler, result)
+
+    def _on_server_error(self, title, error):
+        if not self.winfo_exists():
+            return
+        self.progress_bar.stop()
+        self.handle_error(f"Erro na análise no servidor ({title})", error)
+
+    @staticmethod
+    def _server_malformed(profiler):
+        return profiler.profile(), *profiler.malformed_rows()
+
+    def _show_server_malformed(self, profiler, result):
+        profile, total, sample = result
+        rows = int(profile["total"].iloc[0]) if len(profile) else 0
+        output = [f"📉 Resumo de Colunas com Valores Nulos ou Vazios (tabela inteira, {rows} linhas):\n"]
+        for record in profile.itertuples(index=False):
+            if record.nulos or record.vazios:
+                output.append(f"• {record.coluna}: {record.nulos} nulos, {record.vazios} vazios")
+        if not total:
+            output.append("\n✅ Nenhum registro mal formado encontrado.")
             self.update_text_area("\n".join(output))
-        except Exception as e:
-            self.handle_error("Erro ao verificar registros mal formados", e)
-        finally:
-            # Para a barra de progresso quando o processo for concluído
-            if not self._stop_thread:
-                self.progress_bar.stop()
+            return
+        output.append(f"\n🧪 {total} Registros Mal Formados (amostra de {len(sample)}):\n")
+        output.append(sample.to_string(index=False))
+        self.update_text_area("\n".join(output))
+        if messagebox.askyesno("Exportar?", f"Deseja exportar os {total} registros mal formados?"):
+            file_path = ask_export_path(self, f"{self.table_name}_mal_formados.xlsx")
+            if file_path:
+                ExportDialog(self, self.engine, profiler.malformed_query(), file_path, title="Exportar registros mal formados")
+
+    @staticmethod
+    def _server_duplicates(profiler):
+        return profiler.profile(), *profiler.duplicate_groups()
+
+    def _show_server_duplicates(self, profiler, result):
+        profile, groups, rows, sample, compared = result
+        ignored = [col["name"] for col in profiler.columns if col["name"] not in compared]
+        header = [f"🧮 Colunas comparadas: {', '.join(compared) if compared else 'nenhuma'}"]
+        if ignored:
+            header.append(f"   Ignoradas (chave ou tipo não comparável): {', '.join(ignored)}")
+        header.append("")
+        if not compared:
+            output = ["ℹ️ Nenhuma coluna para comparar além da chave: não há como haver duplicados."]
+        elif not groups:
+            output = ["✅ Nenhum registro duplicado encontrado (tabela inteira)."]
+        else:
+            output = [f"⚠️ {rows} registros duplicados em {groups} grupos (tabela inteira):\n",
+                      f"📌 Maiores Grupos de Registros Duplicados (amostra de {len(sample)}):\n",
+                      sample.rename(columns={"ocorrencias": "Ocorrências"}).to_string(index=False), ""]
+        # Por coluna: linhas que repetem um valor já existente (COUNT(col) - COUNT(DISTINCT col))
+        output.append("\n🔍 Colunas com maior contribuição para duplicações:\n")
+        repeated = profile.dropna(subset=["repetidos"]).sort_values("repetidos", ascending=False)
+        for record in repeated.itertuples(index=False):
+            if record.repetidos:
+                output.append(f"• {record.coluna} → {int(record.repetidos)} registros repetem um valor dessa coluna")
+        self.update_text_area("\n".join(header + output))
+
+    def _show_server_summary(self, profiler, profile):
+        output = [
+            "📈 **Resumo Estatístico da Tabela (calculado no servidor, tabela inteira):**\n",
+            "Legenda das Métricas:\n",
+            "• nulos / vazios — Valores nulos e textos vazios\n"
+            "• preenchidos — Quantidade de registros não nulos\n"
+            "• distintos — Número de valores diferentes\n"
+            "• repetidos — Registros que repetem um valor já existente na coluna\n"
+            "• mínimo / máximo — Menor e maior valor\n"
+            "• média / desvio padrão — Somente para colunas numéricas\n\n",
+            "📊 Estatísticas por Coluna:\n",
+            profile.set_index("coluna").to_string(),
+        ]
+        self.update_text_area("\n".join(output))
 
     def handle_error(self, title, error):
         messagebox.showerror(title, str(error))
 
 
     def export_to_excel(self):
+        """Exporta a tabela inteira direto do servidor (em lotes); sem tabela única, as linhas carregadas."""
         try:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                initialfile=f"{self.table_name}_analise.xlsx",
-                filetypes=[("Excel Files", "*.xlsx")]
-            )
+            file_path = ask_export_path(self, f"{self.table_name}_analise.xlsx")
             if not file_path:
                 return
-            self.df.to_excel(file_path, index=False)
+            if isinstance(self.table_name, str) and self.table_name and self.engine is not None:
+                ExportDialog(self, self.engine, table_query(self.engine.dialect.name, self.table_name), file_path,
+                             title=f"Exportar {self.table_name}")
+                return
+            export_dataframe(self.df, file_path)
             messagebox.showinfo("Exportação", f"Arquivo salvo com sucesso:\n{file_path}")
         except Exception as e:
             self.handle_error("Erro ao exportar", e)
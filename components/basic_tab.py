@@ -1,19 +1,36 @@
 
-import gc
-import threading
-import time
 from tkinter import font
 import traceback
+from types import SimpleNamespace
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Any, Callable
-from sqlalchemy import text, inspect
+from sqlalchemy import text
 import pandas as pd
 from DataFrameTable import DataFrameTable
 from components.ComboBoxComBusca import ComboBoxComBusca
 from config.DatabaseLoader import get_filter_condition
 from components.FilterContainer import FilterContainer
-from utils.validarText import get_query_string_threads, get_valor_idependente_entry,get_query_string
+from config.SchemaSnapshot import SchemaSnapshot
+from utils.columnar_buffer import ColumnarBuffer
+from utils.query_stream import InFlightLimiter, batch_chunks, stream_query
+from utils.remote_pages import REMOTE_PAGE_SIZE, RemotePageSource
+from utils.query_plan import explain_query
+from utils.result_cache import ResultCache, make_cache_key
+from components.plan_viewer import PlanViewer
+from components.export_dialog import ExportDialog, ask_export_path
+from utils.row_count import RowCounter
+from utils.job_scheduler import PRIORITY_BULK, get_scheduler
+from utils.query_jobs import QueryJob, current_job
+from utils.filter_util import get_selected_columns
+from utils.keyset_pagination import build_keyset_query, dialect_family, get_primary_key_columns, last_key_values, quote_key_column
+from utils.table_profile import is_comparable
+from utils.validarText import get_valor_idependente_entry,get_query_string
+
+# Modos de carregamento da consulta básica
+LOAD_MODE_STREAMING = "Streaming"
+LOAD_MODE_BATCHES = "Lotes"
+LOAD_MODE_REMOTE = "Páginas remotas"
 
 class BasicTab:
     def __init__(self, notebook: ttk.Notebook, config_manager: Any, log_message: Callable, db_type: str, engine: Any, current_profile: str,database_var):
@@ -25,18 +42,19 @@ class BasicTab:
         self.root = notebook.master
         self.enum_values = {}
         self.stop_event = None
-        self.thread = None
+        self.job = None
         self.frame = ttk.Frame(notebook, padding=10)
         notebook.add(self.frame, text="Consulta Básica")
         self.database_var = database_var
         self.table_widget = None
         self.tables = []
+        self.row_total = None
         self.filtered_options = []
         self.column_filters = {}
         self.df = None
         self.columns = {}
         self.setup_ui()
-        self._table_lock = None
+        self._table_task = None
         self.load_table_names()
         
 
@@ -122,6 +140,21 @@ class BasicTab:
             command=self.clear_entry,
             style='Green.TButton'  # ou use outro estilo se quiser cores diferentes
         ).pack(side=tk.LEFT)
+
+        # Modo de carregamento: streaming (cursor único no servidor) ou lotes paginados
+        self.load_mode = tk.StringVar(value=LOAD_MODE_STREAMING)
+        ttk.Combobox(
+            button_frame,
+            textvariable=self.load_mode,
+            values=[LOAD_MODE_STREAMING, LOAD_MODE_BATCHES, LOAD_MODE_REMOTE],
+            state="readonly",
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="🧭Plano", command=self.show_plan).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="💾Exportar", command=self.export_table).pack(side=tk.LEFT, padx=5)
+        # Cache de resultados (opcional): repetir a mesma tabela e filtros não reexecuta a consulta
+        self.use_cache = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Cache", variable=self.use_cache).pack(side=tk.LEFT, padx=5)
         self.databse_name = self.database_var.get()
     def setup_middle_frame(self, parent):
         middle_frame = ttk.PanedWindow(parent, orient=tk.HORIZONTAL)
@@ -156,61 +189,82 @@ class BasicTab:
     
     def load_table_names(self):
         """Carrega os nomes das tabelas do banco de dados de forma assíncrona."""
-        
-        # Garante que o Lock seja inicializado corretamente
-        if not hasattr(self, "_table_lock") or self._table_lock is None:
-            self._table_lock = threading.Lock()
-
-        # Se o Lock já estiver em uso, evita concorrência
-        if self._table_lock is not None:
-            if self._table_lock.locked():
-                self.log_message("Carregamento de tabelas já em andamento...", level="warning")
-                return  
+        # Evita concorrência: apenas uma busca de tabelas por aba
+        if self._table_task is not None and not self._table_task.finished.is_set():
+            self.log_message("Carregamento de tabelas já em andamento...", level="warning")
+            return
 
         def _fetch_tables():
-            """Busca as tabelas e atualiza a interface."""
-            with self._table_lock:  # Garante que apenas uma thread acesse o código
-                try:
-                    if not self.engine:
-                        raise ValueError("Engine do banco de dados não está configurado.")
-
-                    # Obtém as tabelas do banco de forma segura
-                    tables = inspect(self.engine).get_table_names()
-                     
-                    self.root.after(100, self.process_queue, tables)
-                except Exception as e:
-                    self.queue.put(("error", str(e)))
-
-        # Executa a função em uma nova thread
-        thread = threading.Thread(target=_fetch_tables, daemon=True)
-        thread.start()
-    
+            """Busca as tabelas (o resultado é entregue na thread da interface)."""
+            if not self.engine:
+                raise ValueError("Engine do banco de dados não está configurado.")
+            return SchemaSnapshot.for_engine(self.engine).get_table_names()
+
+        self._table_task = get_scheduler().submit(
+            _fetch_tables, group=self,
+            on_done=self.process_queue,
+            on_error=lambda e: self.log_message(f"Erro ao carregar tabelas: {e}", level="error"),
+        )
+
     def carregar_dados_assincrono(self):
-        if self.stop_event and not self.stop_event.is_set():
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join()
-                self.stop_event = None
-                self.carregar_button.config(text="🔍Carregar", state="normal")
+        if self.job is not None and self.job.is_running and not self.job.cancelled:
+            # Interrompe a consulta no servidor; a espera pelas threads acontece fora da interface
+            self.carregar_button.config(text="Cancelando...", state="disabled")
+            self.status_var.set("Cancelando carregamento...")
+            self.job.cancel(on_cancelled=lambda job: get_scheduler().call_in_ui(self._on_load_cancelled, job))
             return
-        def carregar():
-            try:
-                self.carregar_button.config(text="❌Cancelar")
-                self.status_var.set("Carregando dados...")
-                self.log_message("Iniciando carregamento de dados...")
-                self.root.after(0, self.load_data) 
-                self.status_var.set("Carregamento concluído.")
-                self.log_message("Carregamento concluído com sucesso.")
-            except Exception as e:
-                self.handle_error("Erro ao carregar dados", e)
-        # self.carregar_button.config(state="disabled")
-        threading.Thread(target=carregar, daemon=True).start()
+        try:
+            self.carregar_button.config(text="❌Cancelar")
+            self.status_var.set("Carregando dados...")
+            self.log_message("Iniciando carregamento de dados...")
+            self.load_data()
+        except Exception as e:
+            self.handle_error("Erro ao carregar dados", e)
+            self.carregar_button.config(text="🔍Carregar", state="normal")
 
         
         
     def table_exists(self,table_name):
-        inspector = inspect(self.engine)
-        return table_name in inspector.get_table_names()
+        """
+        Valida a tabela pela lista já carregada no combobox; consulta o catálogo apenas se não estiver nela
+        (chamado nas tarefas em segundo plano).
+        """
+        if table_name in self.tables:
+            return True
+        return SchemaSnapshot.for_engine(self.engine).has_table(table_name)
+
+    def _get_column_types(self, table_name, form):
+        """Retorna {coluna: tipo} das colunas lidas dos filtros, ou do catálogo em caso de falta (em segundo plano)."""
+        if form["table_name"] == table_name and form["columns"]:
+            return {col["name"]: col["type"] for col in form["columns"]}
+        return {col["name"]: col["type"] for col in SchemaSnapshot.for_engine(self.engine).get_columns(table_name)}
+
+    def _refresh_table_metadata(self, table_name):
+        """
+        Descarta os metadados da tabela em todos os caches (catálogo, retrato do esquema e colunas
+        dos filtros) e relê as colunas do servidor (executa em segundo plano). Uma tabela removida
+        sai da lista de tabelas.
+        """
+        def _log(message, level="info"):
+            get_scheduler().call_in_ui(self.log_message, message, level)
+
+        try:
+            if not self.filter_container.invalidate_columns(table_name, log_message=_log):
+                _log(f"A tabela {table_name} não existe mais no servidor; removida da lista.", "warning")
+                get_scheduler().call_in_ui(self._forget_table, table_name)
+                return
+            columns = SchemaSnapshot.for_engine(self.engine).get_columns(table_name)
+        except Exception as e:
+            # Servidor indisponível ou sem acesso: os filtros ficam como estão
+            _log(f"Não foi possível reler as colunas de {table_name}: {e}", "warning")
+            return
+        get_scheduler().call_in_ui(self.filter_container.refresh_columns, table_name, columns)
+
+    def _forget_table(self, table_name):
+        """Retira uma tabela removida do servidor da lista do combobox (executa na thread da interface)."""
+        if table_name in self.tables:
+            self.process_queue([name for name in self.tables if name != table_name])
+
     def clear_entry(self):
         self.table_combobox.set("")
         self.filter_container.clear_filters()
@@ -218,13 +272,9 @@ class BasicTab:
         if self.table_widget is not None:
             self.table_widget.destroy()
             self.table_widget = None
-        if self.stop_event and not self.stop_event.is_set():
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join()
-            self.stop_event = None
+        if self.job is not None and self.job.is_running:
+            self.job.cancel()
 
-            
         self.status_var.set("Pronto")
         self.log_message("Combobox e filtros limpos.")
     def on_data_changed(self, df):
@@ -234,86 +284,335 @@ class BasicTab:
         self.log_message("Dados modificados na tabela.")
     
     def load_data(self, max_rows=1000):
-        """Finaliza a thread antiga e inicia uma nova."""
-        # Evita erro caso self.thread não exista na primeira execução
-        if self.stop_event and not self.stop_event.is_set():
-            print("Finalizando a thread anterior...")
-            self.stop_event.set()  # Sinaliza para a thread parar
-            if self.thread and self.thread.is_alive():
-                self.thread.join()  # Aguarda a finalização corretamente
-            self.thread = None
-            self.stop_event = None
-            print("fechado com sucesso")
-            time.sleep(1)
-
-        # Criando e iniciando uma nova thread
-        self.stop_event = threading.Event()
-        self.thread = threading.Thread(target=self._load_data_thread, args=(max_rows,), daemon=True)
-        print("Iniciando nova thread...")
-        self.thread.start()
-        
-        
-    
+        """Cancela a carga anterior (sem bloquear a interface) e inicia uma nova."""
+        # Só os valores dos widgets são lidos aqui; catálogo, chaves e tipos são resolvidos na tarefa
+        table_name = self.table_combobox.get().strip()
+        if not table_name:
+            messagebox.showwarning("Aviso", "Selecione uma tabela.")
+            self.carregar_button.config(text="🔍Carregar", state="normal")
+            return
+        form = self._read_filter_form()
+        use_cache, load_mode = bool(self.use_cache.get()), self.load_mode.get()
+
+        # A nova carga só começa depois que a anterior tiver sido interrompida no servidor
+        previous = self.job if self.job is not None and self.job.is_running else None
+        self.job = QueryJob(self.engine, self._load_data_thread, max_rows, table_name, form,
+                            use_cache, load_mode, name="Consulta Básica", after=previous, group=self).start()
+        self.stop_event = self.job.stop_event
+
+    def _on_load_cancelled(self, job):
+        """Finaliza o cancelamento na interface (executa na thread da interface)."""
+        if job is not self.job:
+            return
+        self.carregar_button.config(text="🔍Carregar", state="normal")
+        self.status_var.set("Carregamento cancelado.")
+        self.log_message("Cancelamento concluído: a consulta foi interrompida no servidor.")
 
-    def _load_data_thread(self, max_rows):
-        """Executa a carga inicial de dados em segundo plano."""
-        try:
-            table_name = self.table_combobox.get().strip()
+    def _reset_load_button(self):
+        """Restaura o botão de carregar (pode ser chamado de qualquer thread)."""
+        get_scheduler().call_in_ui(lambda: self.carregar_button.config(text="🔍Carregar", state="normal"))
+
+    def _job_stop_event(self):
+        """Evento de parada do trabalho da thread atual (não o da carga mais recente da aba)."""
+        job = current_job()
+        return job.stop_event if job is not None else self.stop_event
 
-            if not table_name:
-                self.root.after(0, lambda: messagebox.showwarning("Aviso", "Selecione uma tabela."))
-                self.carregar_button.config(text="🔍Carregar", state="normal")
-                return
 
+    def _load_data_thread(self, max_rows, table_name, form, use_cache, load_mode):
+        """Executa a carga inicial de dados em segundo plano (não acessa widgets: recebe os valores dos filtros)."""
+        try:
             if not self.table_exists(table_name):
-                self.root.after(0, lambda: messagebox.showerror("Erro", f"A tabela '{table_name}' não existe no banco de dados."))
-                self.carregar_button.config(text="🔍Carregar", state="normal")
+                get_scheduler().call_in_ui(messagebox.showerror, "Erro", f"A tabela '{table_name}' não existe no banco de dados.")
+                self._reset_load_button()
+                return
+            hidden_keys = self._hidden_key_columns(table_name, form["selected"])
+            base_query, filters, params = self._build_query(table_name, form, hidden_keys)
+
+            cache_key = None
+            if use_cache and load_mode != LOAD_MODE_REMOTE:
+                cache_key = make_cache_key(get_query_string(base_query, filters, None, self.db_type), params)
+                cached = ResultCache.for_engine(self.engine).get(cache_key)
+                if cached is not None:
+                    get_scheduler().call_in_ui(self._show_cached_result, cached, table_name, hidden_keys)
+                    return
+
+            self._start_row_count(table_name, base_query, filters, params)
+
+            if load_mode == LOAD_MODE_REMOTE:
+                key_columns = self._get_keyset_columns(table_name)
+                order_columns = [] if key_columns else self._stable_order_columns(table_name)
+                if key_columns or order_columns:
+                    self._load_remote_pages(base_query, filters, params, table_name, key_columns, order_columns, hidden_keys)
+                    return
+                # Sem ordem estável, o OFFSET poderia repetir ou pular linhas entre páginas
+                get_scheduler().call_in_ui(self.log_message, f"A tabela '{table_name}' não tem chave nem colunas ordenáveis: "
+                                                             "páginas remotas desativadas, carregando no modo padrão.", "warning")
+
+            if load_mode == LOAD_MODE_STREAMING:
+                query_string = get_query_string(base_query, filters, None, self.db_type)
+                self._stream_data(query_string, params, table_name, max_rows, cache_key, hidden_keys)
                 return
-            filter_column = self.filter_container.get_for_query()
-            
-            base_query = f'SELECT {filter_column if filter_column is not None else ""} FROM {self.validate_database(table_name)}'
-            filters, params = [], {}
-            columns = {col["name"]: col["type"] for col in inspect(self.engine).get_columns(table_name)}
-            print(" testnado  *****")
-            for col_name, entry in self.filter_container.column_filters.items():
-                value = get_valor_idependente_entry(entry, tk, ttk)
-                if value is not None and value != "":
-                    filter_condition = get_filter_condition(self, col_name, columns.get(col_name, ""), value, params, self.db_type)
-                    if filter_condition:
-                        filters.append(filter_condition)
 
             # self.log_message(f"Executando query: {query_string}")
             # self.log_message(f"Parâmetros da query: {params}")
 
+            key_columns = self._get_keyset_columns(table_name)
+            # Sem chave, as páginas seguem por OFFSET: só são estáveis com uma ordem total das colunas
+            order_by = None if key_columns else self._order_by(self._stable_order_columns(table_name))
             try:
-                query_string = get_query_string(base_query, filters, max_rows, self.db_type)
+                if key_columns:
+                    query_string = build_keyset_query(base_query, filters, key_columns, None, max_rows, self.db_type, params)
+                else:
+                    query_string = get_query_string(base_query, filters, max_rows, self.db_type, order_by=order_by)
 
                 with self.engine.connect() as conn:
                     result = conn.execute(text(query_string), params)
                     df = pd.DataFrame(result.fetchall(), columns=result.keys())
 
-                self.root.after(0, lambda: self.update_table_widget(df, table_name))
+                if self._job_stop_event().is_set():
+                    return
+                get_scheduler().call_in_ui(self.update_table_widget, df, table_name, None, hidden_keys)
 
             except Exception as e:
+                if self._job_stop_event().is_set():
+                    return
+                # Metadados possivelmente desatualizados (tabela alterada/removida): a próxima carga relê o catálogo
+                self._refresh_table_metadata(table_name)
                 self.handle_error("Erro ao carregar dados", e)
+                self._reset_load_button()
+                return
 
-            # self.root.after(0, lambda: self.update_table_widget(df, table_name))
-            self.status_var.set(f"Carregados {len(df)} de {max_rows} linhas possíveis.")
-            print(f"Carregados {len(df)} de {max_rows} linhas possíveis.")
+            get_scheduler().call_in_ui(self.status_var.set, f"Carregados {len(df)} de {max_rows} linhas possíveis.")
 
             if len(df) < max_rows:
-                self.carregar_button.config(text="🔍Carregar", state="normal")
+                get_scheduler().call_in_ui(self._store_in_cache, cache_key, table_name)
+                self._reset_load_button()
                 return
 
-            unique_cols = [col for col in df.columns if df[col].is_unique]
-            campo_chave = unique_cols[0] if unique_cols else df.columns[0]
-            valor_ultima_linha = df.iloc[-1][campo_chave]
+            # Cursor da próxima página: valores da chave da última linha ou, sem chave, o OFFSET
+            cursor = last_key_values(df, key_columns) if key_columns else len(df)
 
-            threading.Thread(target=self.fetch_remaining_rows, args=(base_query, filters, max_rows, campo_chave, valor_ultima_linha,params,df), daemon=True).start()
+            current_job().spawn(self.fetch_remaining_rows, base_query, filters, max_rows, key_columns, cursor, params, df,
+                                cache_key, order_by, table_name, priority=PRIORITY_BULK)
 
         except Exception as e:
             self.handle_error("Erro ao carregar dados", e)
-            self.carregar_button.config(text="🔍Carregar", state="normal")
+            self._reset_load_button()
+    def show_plan(self, max_rows=1000):
+        """Mostra o plano de execução da consulta que o modo de carregamento atual executaria com os filtros."""
+        table_name = self.table_combobox.get().strip()
+        if not table_name:
+            messagebox.showwarning("Aviso", "Selecione uma tabela válida.")
+            return
+        form = self._read_filter_form()
+        mode = self.load_mode.get()
+
+        def _explain():
+            if not self.table_exists(table_name):
+                raise ValueError(f"A tabela '{table_name}' não existe no banco de dados.")
+            hidden_keys = self._hidden_key_columns(table_name, form["selected"])
+            base_query, filters, params = self._build_query(table_name, form, hidden_keys)
+            if mode == LOAD_MODE_STREAMING:
+                query_string = get_query_string(base_query, filters, None, self.db_type)
+            else:
+                page_size = REMOTE_PAGE_SIZE if mode == LOAD_MODE_REMOTE else max_rows
+                key_columns = self._get_keyset_columns(table_name)
+                if key_columns:
+                    query_string = build_keyset_query(base_query, filters, key_columns, None, page_size, self.db_type, params)
+                else:
+                    order_by = self._order_by(self._stable_order_columns(table_name))
+                    offset = 0 if mode == LOAD_MODE_REMOTE and order_by else None
+                    query_string = get_query_string(base_query, filters, page_size, self.db_type, offset=offset, order_by=order_by)
+            return query_string, explain_query(self.engine, query_string, params), params
+
+        self.status_var.set("Obtendo plano de execução...")
+        get_scheduler().submit(
+            _explain, group=self,
+            on_done=lambda result: self._open_plan(*result),
+            on_error=lambda e: self.handle_error("Erro ao obter o plano de execução", e),
+        )
+
+    def _open_plan(self, query_string, plan, params):
+        warnings = sum(len(node.warnings) for node in plan.walk())
+        self.status_var.set(f"Plano obtido ({warnings} alertas).")
+        shown = query_string if not params else f"{query_string}\n-- parâmetros: {params}"
+        PlanViewer(self.frame, plan, shown)
+
+    def export_table(self):
+        """Exporta a tabela inteira com os filtros atuais direto do servidor para arquivo, sem carregá-la na tela."""
+        table_name = self.table_combobox.get().strip()
+        if not table_name:
+            messagebox.showwarning("Aviso", "Selecione uma tabela válida.")
+            return
+        file_path = ask_export_path(self.frame, f"{table_name}.csv")
+        if not file_path:
+            return
+        form = self._read_filter_form()
+        # Total da última contagem, se for desta tabela (apenas para a barra de progresso)
+        total_rows = None
+        if self.row_total is not None and self.table_widget is not None and self.table_widget.table_name == table_name:
+            total_rows = self.row_total[0]
+
+        def _prepare():
+            if not self.table_exists(table_name):
+                raise ValueError(f"A tabela '{table_name}' não existe no banco de dados.")
+            base_query, filters, params = self._build_query(table_name, form)
+            return get_query_string(base_query, filters, None, self.db_type), params
+
+        def _open_dialog(result):
+            query_string, params = result
+            ExportDialog(self.frame, self.engine, query_string, file_path, self.log_message, params=params,
+                         total_rows=total_rows, title=f"Exportar {table_name}")
+
+        get_scheduler().submit(_prepare, group=self, on_done=_open_dialog,
+                               on_error=lambda e: self.handle_error("Erro ao preparar a exportação", e))
+
+    def _read_filter_form(self):
+        """Lê a seleção de colunas e os valores dos filtros como valores simples (executa na thread da interface)."""
+        container = self.filter_container
+        return {
+            "table_name": container.table_name,
+            "select": container.get_for_query(),
+            "selected": get_selected_columns(container),
+            "values": {col_name: get_valor_idependente_entry(entry, tk, ttk) for col_name, entry in container.column_filters.items()},
+            "columns": list(container.columns) if isinstance(container.columns, list) else [],
+            "enum_values": dict(container.enum_values or {}),
+        }
+
+    def _build_query(self, table_name, form, hidden_keys=()):
+        """
+        Monta a query base, as condições de filtro e os parâmetros a partir dos valores lidos dos filtros
+        (executa em segundo plano: os tipos das colunas podem vir do catálogo).
+        """
+        filter_column = form["select"]
+        # A chave primária vai sempre na consulta (oculta na tabela se o usuário não a selecionou)
+        if hidden_keys and filter_column not in (None, "*"):
+            filter_column = ", ".join([filter_column] + [quote_key_column(self.db_type, col) for col in hidden_keys])
+
+        base_query = f'SELECT {filter_column if filter_column is not None else ""} FROM {self.validate_database(table_name)}'
+        filters, params = [], {}
+        columns = self._get_column_types(table_name, form)
+        # Valores ENUM/CHECK como estavam nos filtros no momento da leitura
+        enum_source = SimpleNamespace(enum_values=form["enum_values"])
+        for col_name, value in form["values"].items():
+            if value is not None and value != "":
+                filter_condition = get_filter_condition(enum_source, col_name, columns.get(col_name, ""), value, params, self.db_type)
+                if filter_condition:
+                    filters.append(filter_condition)
+        return base_query, filters, params
+
+    def _stable_order_columns(self, table_name):
+        """Colunas comparáveis da tabela, usadas para ordenar as páginas por OFFSET quando não há chave."""
+        family = dialect_family(self.db_type)
+        try:
+            columns = SchemaSnapshot.for_engine(self.engine).get_columns(table_name)
+        except Exception:
+            return []
+        return [col["name"] for col in columns if is_comparable(col, family)]
+
+    def _order_by(self, columns):
+        """Expressão ORDER BY (sem a palavra-chave) com as colunas em ordem crescente, ou None sem colunas."""
+        return ", ".join(f"{quote_key_column(self.db_type, col)} ASC" for col in columns) or None
+
+    def _load_remote_pages(self, base_query, filters, params, table_name, key_columns, order_columns, hidden_keys=()):
+        """Busca apenas a primeira página; as demais são buscadas no servidor conforme a navegação."""
+        try:
+            page_source = RemotePageSource(self.engine, base_query, filters, params, self.db_type,
+                                           key_columns=key_columns, order_columns=order_columns)
+            df = page_source.get_page(0)
+            get_scheduler().call_in_ui(self.update_table_widget, df, table_name, page_source, hidden_keys)
+            page_source.prefetch(1)
+            get_scheduler().call_in_ui(self.status_var.set, f"Página 1 carregada ({len(df)} linhas).")
+        except Exception as e:
+            self._refresh_table_metadata(table_name)
+            self.handle_error("Erro ao carregar dados", e)
+        finally:
+            self._reset_load_button()
+
+    def _start_row_count(self, table_name, base_query, filters, params):
+        """Conta as linhas da consulta no servidor em paralelo à carga dos dados."""
+        self.row_total = None
+        RowCounter(self.engine, self.db_type).start(
+            table_name, base_query, filters, params,
+            on_total=lambda total, estimated: get_scheduler().call_in_ui(self._apply_row_total, total, estimated),
+            stop_event=self._job_stop_event(),
+            job=current_job(),
+        )
+
+    def _apply_row_total(self, total, estimated):
+        """Exibe o total de linhas na tabela (executa na thread da interface)."""
+        self.row_total = (total, estimated)
+        if self.table_widget is not None:
+            self.table_widget.set_total_rows(total, estimated)
+        self.log_message(f"Total de linhas no servidor: {'~' if estimated else ''}{total}")
+
+    def _get_keyset_columns(self, table_name):
+        """Retorna as colunas da chave usadas na paginação por keyset (sempre carregadas), ou [] sem chave."""
+        try:
+            return get_primary_key_columns(self.engine, table_name)
+        except Exception as e:
+            # Chamado também das tarefas em segundo plano: o log é entregue na thread da interface
+            get_scheduler().call_in_ui(self.log_message, f"Não foi possível obter a chave primária de '{table_name}': {e}", "warning")
+            return []
+
+    def _hidden_key_columns(self, table_name, selected):
+        """
+        Colunas da chave fora da seleção do usuário (`selected`): carregadas mesmo assim, mas ocultas
+        na tabela. Consulta o catálogo, por isso é chamado nas tarefas em segundo plano.
+        """
+        if not selected:
+            return []
+        return [col for col in self._get_keyset_columns(table_name) if col not in selected]
+
+    def _stream_data(self, query_string, params, table_name, chunk_size, cache_key=None, hidden_keys=()):
+        """Carrega todas as linhas por um único cursor no servidor, entregando lotes à tabela sem acumulá-los."""
+        limiter = InFlightLimiter()
+        loaded = 0
+        first = True
+        stop_event = self._job_stop_event()
+        try:
+            chunks = batch_chunks(stream_query(self.engine, query_string, params, chunk_size, stop_event), chunk_size)
+            for columns, rows in chunks:
+                df = ColumnarBuffer.from_rows(columns, rows)
+                loaded += len(df)
+                # Espera a interface consumir lotes anteriores (memória em trânsito limitada)
+                if not limiter.acquire(stop_event):
+                    break
+                if first:
+                    get_scheduler().call_in_ui(self._apply_stream_chunk, df, limiter, table_name, hidden_keys)
+                    first = False
+                else:
+                    get_scheduler().call_in_ui(self._apply_stream_chunk, df, limiter)
+                get_scheduler().call_in_ui(self.status_var.set, f"Carregando... {loaded} linhas")
+                del df, rows
+
+            if stop_event.is_set():
+                message = f"Carregamento cancelado após {loaded} linhas."
+            else:
+                message = f"Carregadas {loaded} linhas."
+                get_scheduler().call_in_ui(self._store_in_cache, cache_key, table_name)
+            get_scheduler().call_in_ui(self.status_var.set, message)
+            self.log_message(message)
+        except Exception as e:
+            if stop_event.is_set():
+                # Consulta interrompida no servidor pelo cancelamento
+                self.log_message(f"Carregamento cancelado após {loaded} linhas.")
+                return
+            self._refresh_table_metadata(table_name)
+            self.handle_error("Erro ao carregar dados", e)
+        finally:
+            self._reset_load_button()
+
+    def _apply_stream_chunk(self, df, limiter, table_name=None, hidden_keys=()):
+        """Aplica um lote do streaming na tabela (executa na thread da interface)."""
+        try:
+            if table_name is not None:
+                self.update_table_widget(df, table_name, hidden_columns=hidden_keys)
+            else:
+                self.update_ui(df)
+        finally:
+            limiter.release()
+
     def validate_database(self, table_name: str) -> str:
         db_type = self.db_type.lower()
 
@@ -334,8 +633,8 @@ class BasicTab:
             return f'"{table_name}"'
 
     
-    def update_table_widget(self, df, table_name):
-        """ Atualiza ou recria o widget da tabela com os novos dados. """
+    def update_table_widget(self, df, table_name, page_source=None, hidden_columns=()):
+        """ Atualiza ou recria o widget da tabela com os novos dados (`hidden_columns`: chaves carregadas mas ocultas). """
         if self.table_widget:
             self.table_widget.destroy()
         
@@ -344,7 +643,7 @@ class BasicTab:
             master=self.table_frame,
             databse_name=self.databse_name,
             df=df,
-            rows_per_page=15,
+            rows_per_page=page_source.page_size if page_source is not None else 15,
             column_width=100,
             edit_enabled=True, 
             delete_enabled=True, 
@@ -355,79 +654,111 @@ class BasicTab:
             db_type=self.db_type,
             columns=self.filter_container.columns,
             enum_values=self.filter_container.enum_values,
+            virtual_scroll=page_source is None,
+            page_source=page_source,
+            hidden_columns=list(hidden_columns),
+            on_load_error=self._refresh_table_metadata,
         )
+        if self.row_total is not None:
+            self.table_widget.set_total_rows(*self.row_total)
         self.table_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     
-    def fetch_remaining_rows(self, base_query, filters, max_rows, campo_chave, valor_ultima_linha, params,f_df):
+    def fetch_remaining_rows(self, base_query, filters, max_rows, key_columns, cursor, params, f_df, cache_key=None, order_by=None,
+                             table_name=None):
+        """Busca as páginas seguintes por keyset (ou OFFSET ordenado por `order_by`, sem chave) até esgotar o resultado."""
         cont = 0
-        concat_df = f_df.copy()  # Inicializa um DataFrame vazio para evitar erros
+        stop_event = self._job_stop_event()
+        # Páginas ainda não enviadas à interface, em blocos colunares (anexar não copia o que já foi lido)
+        pending = ColumnarBuffer(f_df.columns)
         del f_df
         while True :  # Verifica o evento de parada corretamente
-            # print(f"Thread ativa? {not self.stop_event.is_set()}") 
-            if not self.stop_event: 
-                 break
-            if self.stop_event and self.stop_event.is_set() :
+            if stop_event is None or stop_event.is_set():
                 break
             cont += 1
-            query_string = get_query_string_threads(base_query, filters, max_rows, self.db_type, campo_chave, valor_ultima_linha)
+            page_params = dict(params)
+            if key_columns:
+                query_string = build_keyset_query(base_query, filters, key_columns, cursor, max_rows, self.db_type, page_params)
+            else:
+                query_string = get_query_string(base_query, filters, max_rows, self.db_type, offset=cursor, order_by=order_by)
 
             try:
                 with self.engine.connect() as conn:
-                    result = conn.execute(text(query_string), params)
-                    df = pd.DataFrame(result.fetchall(), columns=result.keys())
-
-                print(f"Tamanho = {len(df)} | Último ID = {valor_ultima_linha}")
+                    result = conn.execute(text(query_string), page_params)
+                    rows = result.fetchall()
 
-                if df.empty:
+                if not rows:
                     break  # Sai do loop se não houver mais dados
 
-                # Atualiza concat_df corretamente
-                if concat_df.empty:
-                    concat_df = df 
+                pending.append_rows(rows)
+                n_linha = len(rows)
+
+                # Atualiza o cursor com a chave da última linha (ou o OFFSET) para continuar a busca
+                if key_columns:
+                    last_row = rows[-1]._mapping
+                    cursor = tuple(last_row[col] for col in key_columns)
                 else:
-                    concat_df = pd.concat([concat_df, df], ignore_index=True).drop_duplicates()
-                    
+                    cursor += n_linha
+                del rows
 
-                # Atualiza UI a cada 10 iterações para evitar bloqueio da interface
-                valor_ultima_linha = df[campo_chave].iloc[-1] if campo_chave in df.columns else None
-                n_linha = len(df)
-                
-                
+                # Sai do loop se o último lote de dados for menor que `max_rows`
                 if  n_linha < max_rows:
                     break  
+                # Atualiza UI a cada 10 iterações para evitar bloqueio da interface
                 if cont == 10:
-                    self.root.after(0, self.update_ui, concat_df)
+                    get_scheduler().call_in_ui(self.update_ui, pending)
                     cont = 0
-                    del concat_df
-                    concat_df = df.copy()
-                    del df
-                    gc.collect()
-
-                # Atualiza o valor da última linha para continuar a busca
-                # Sai do loop se o último lote de dados for menor que `max_rows`
+                    pending = ColumnarBuffer(pending.columns)
 
             except Exception as e:
+                if stop_event.is_set():
+                    break
+                if table_name:
+                    self._refresh_table_metadata(table_name)
                 error_message = "Erro ao carregar dados"
                 self.handle_error(error_message, e)
-                self.carregar_button.config(text="🔍Carregar", state="normal")
+                # Resultado incompleto: não vai para o cache
+                cache_key = None
                 break
 
         # Atualiza a UI com os dados finais após o loop
-        if not concat_df.empty:
-            if  self.stop_event and not self.stop_event.is_set():
-                self.root.after(0, self.update_ui, concat_df)
-            del concat_df
+        if not pending.empty:
+            if not stop_event.is_set():
+                get_scheduler().call_in_ui(self.update_ui, pending)
+            del pending
+        if not stop_event.is_set():
+            # Executa depois dos lotes acima (a fila da interface é FIFO): o buffer já está completo
+            get_scheduler().call_in_ui(self._store_in_cache, cache_key)
+        self._reset_load_button()
+
+    def _store_in_cache(self, cache_key, table_name=None):
+        """Guarda o resultado completo exibido na tabela (executa na thread da interface)."""
+        if cache_key is None or self.table_widget is None:
+            return
+        table_name = table_name or self.table_widget.table_name
+        if ResultCache.for_engine(self.engine).put(cache_key, self.table_widget.buffer, [table_name]):
+            self.log_message(f"Resultado de '{table_name}' guardado em cache ({len(self.table_widget.buffer)} linhas).")
+
+    def _show_cached_result(self, buffer, table_name, hidden_keys=()):
+        """Exibe um resultado do cache sem consultar o servidor (executa na thread da interface)."""
+        self.row_total = (len(buffer), False)
+        self.update_table_widget(buffer, table_name, hidden_columns=hidden_keys)
         self.carregar_button.config(text="🔍Carregar", state="normal")
-        return
+        self.status_var.set(f"Carregados {len(buffer)} registros do cache.")
+        self.log_message(f"Resultado de '{table_name}' obtido do cache.")
 
     def update_ui(self, df):
         """ Atualiza a tabela na thread principal """
-        if not df.empty:
+        if not df.empty and self.table_widget is not None:
             self.table_widget.update_table_for_search(df)
 
     def handle_error(self, msg, exception):
-        """ Exibe um erro no log e na interface """
-        self.log_message(f"{msg}: {exception}\n{traceback.format_exc()}", level="error")
-        self.status_var.set(f"Erro: {msg}")
-        messagebox.showerror("Erro", f"{msg}: {exception}")
\ No newline at end of file
+        """ Exibe um erro no log e na interface (pode ser chamado de qualquer thread) """
+        details = traceback.format_exc()
+
+        def _show():
+            self.log_message(f"{msg}: {exception}\n{details}", level="error")
+            self.status_var.set(f"Erro: {msg}")
+            messagebox.showerror("Erro", f"{msg}: {exception}")
+
+        get_scheduler().call_in_ui(_show)
\ No newline at end of file
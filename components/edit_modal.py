@@ -3,14 +3,16 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import pandas as pd
 from components.CheckboxWithEntry import CheckboxWithEntry
-from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Any, Callable, Optional, Dict, Union, List, TypedDict
 import traceback
 from components.Data_wiget2 import DateTimeEntry
 from components.DataWidget import DatabaseDateWidget
-from utils.validarText import  _convert_column_type_for_string_one, _map_column_type, get_valor_idependente_entry, quote_identifier, validar_numero, _fetch_enum_values,convert_values
+from utils.validarText import  _convert_column_type, _convert_column_type_for_string_one, _map_column_type, get_valor_idependente_entry, validar_numero, _fetch_enum_values,convert_values
 import numpy as np
+from utils.change_set import ChangeSet
+from utils.job_scheduler import get_scheduler
+from utils.result_cache import ResultCache
 
 
 class ColumnInfo(TypedDict):
@@ -24,8 +26,8 @@ class EditModal(tk.Toplevel):
     """Creates a modal to edit a record from a DataFrame and save to the database."""
 
     def __init__(
-        self, master: Any,databse_name, engine,log_message, df: pd.DataFrame, table_name: str, row_index: int,
-        primary_key_value: str, name_campo_primary_key: str, edit_enabled: bool,is_opened_callback: Optional[Callable] = None,
+        self, master: Any,databse_name, engine,log_message, row: Dict[str, Any], get_df: Callable[[], pd.DataFrame],
+        table_name: str, row_index: int, key_values: Dict[str, Any], edit_enabled: bool,is_opened_callback: Optional[Callable] = None,
         db_type: str = "postgresql", on_data_change: Optional[Callable[[pd.DataFrame], None]] = None,
         column_types: Optional[Dict[str, str]] = None, enum_values: Optional[Dict[str, List[str]]] = None
     ):
@@ -35,11 +37,11 @@ class EditModal(tk.Toplevel):
         Args:
             master: The parent widget
             engine: SQLAlchemy engine
-            df: DataFrame containing the data
+            row: Values of the row being edited ({column: value}), as loaded in the table
+            get_df: Returns the table's DataFrame (built only when saving or deleting)
             table_name: Name of the database table
             row_index: Index of the row being edited
-            primary_key_value: Value of the primary key
-            name_campo_primary_key: Column name of the primary key
+            key_values: Primary-key columns and their values ({column: value}), used in the WHERE clause
             edit_enabled: Whether editing is allowed
             db_type: Database type (postgresql, mysql, etc.)
             on_data_change: Callback function when data changes
@@ -47,18 +49,19 @@ class EditModal(tk.Toplevel):
             enum_values: Dictionary of enum values for dropdown fields
         """
         super().__init__(master)
-        self.df = df
+        self.row = row
+        self.get_df = get_df
         self.engine = engine
         self.table_name = table_name
         self.row_index = row_index
-        self.name_campo_primary_key = name_campo_primary_key
+        self.key_values = key_values
         self.on_data_change = on_data_change
         self.edit_enabled = edit_enabled
         self.column_info = column_types or {}
         self.db_type = db_type.strip().lower()
         self.databse_name = databse_name
         self.is_opened_callback = is_opened_callback
-        self.record_id = primary_key_value if primary_key_value else self.df.at[self.row_index, self.name_campo_primary_key]
+        self.record_id = ", ".join(str(value) for value in key_values.values()) or "-"
         self.field_entries: Dict[str, Union[ttk.Entry, ttk.Combobox, tk.BooleanVar, DatabaseDateWidget]] = {}
         self.enum_values = enum_values or {}
         self.column_types = {}
@@ -162,60 +165,6 @@ class EditModal(tk.Toplevel):
         """Adjust the canvas scroll region to encompass all content."""
         canvas.configure(scrollregion=canvas.bbox("all"))
         
-    def verificar_num_column(self):
-    # Verifica se o número de campos da linha selecionada e a lista de colunas são diferentes
-        if len(self.linha_select_df) != len(self.column_info):
-            self.log_message(
-                "O número de campos da linha selecionada e da lista de colunas não coincidem.",
-                level="error"
-            )
-
-            try:
-                query = None
-                params = None
-
-                # Proteção para nomes de tabela e chave primária
-                table = self.table_name.strip().replace("`", "").replace('"', '')
-                pk = self.name_campo_primary_key.strip().replace("`", "").replace('"', '')
-
-                # Define a consulta de acordo com o tipo de banco de dados
-                if self.db_type in ['mysql', 'sqlite']:
-                    query = f"SELECT * FROM `{table}` WHERE `{pk}` = %s"
-                    params = (self.record_id,)
-
-                elif self.db_type in ['postgresql', 'oracle']:
-                    from sqlalchemy import text
-                    query = text(f'SELECT * FROM "{table}" WHERE "{pk}" = :record_id')
-                    params = {"record_id": self.record_id}
-
-                elif self.db_type in ['mssql', 'sql server']:
-                    query = f"SELECT * FROM [{table}] WHERE [{pk}] = ?"
-                    params = (self.record_id,)
-
-                else:
-                    self.log_message(f"Banco de dados não suportado: {self.db_type}", level="error")
-                    return
-
-                # Executa a consulta
-                df = pd.read_sql(query, self.engine, params=params)
-
-                # Verifica se houve retorno da consulta
-                if not df.empty:
-                    self.linha_select_df = df.iloc[0]
-                else:
-                    self.log_message(
-                        f"Nenhuma linha encontrada para {pk} = {self.record_id}.",
-                        level="error"
-                    )
-                    self.linha_select_df = None
-
-            except Exception as e:
-                self.log_message(f"Erro ao consultar o banco de dados: {e}", level="error")
-                self.linha_select_df = None
-
-
-
-
     def _create_fields(self):
         """Create edit fields based on database schema."""
         try:
@@ -226,11 +175,11 @@ class EditModal(tk.Toplevel):
                      style="TLabel").grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
             
             ttk.Separator(self.fields_frame, orient="horizontal").grid(row=1, column=0, columnspan=2, sticky=tk.EW, pady=5)
-            self.linha_select_df = (self.df.iloc[self.row_index]).copy()
-            if self.edit_enabled:
-                self.verificar_num_column()
-            # Create input fields for each column
-            for i, col in enumerate(self.column_info, start=2):
+            # A linha já traz a chave e as colunas carregadas: nenhuma releitura no servidor
+            self.linha_select_df = pd.Series(self.row, dtype=object)
+            # Apenas as colunas carregadas na tabela são editáveis (as demais não têm valor conhecido)
+            loaded_columns = [col for col in self.column_info if col["name"] in self.row]
+            for i, col in enumerate(loaded_columns, start=2):
                 col_name, col_type = col["name"], str(col["type"]).lower()
                 nullable = col.get("nullable", True)
                 
@@ -244,8 +193,7 @@ class EditModal(tk.Toplevel):
                 )
                 
                 # Create the appropriate widget based on column type
-                if col_name in self.linha_select_df:
-                    value = self.linha_select_df[col_name]
+                value = self.linha_select_df[col_name]
                 self._create_typed_widget(col_name, col_type, value, i, nullable)
             # print(self.linha_select_df.to_dict())
             self.linha_select_df =self.linha_select_df.to_dict()
@@ -281,7 +229,7 @@ class EditModal(tk.Toplevel):
             col_type = col_type.lower()
 
             # Primary key field should be disabled
-            is_primary_key = False  # col_name == self.name_campo_primary_key
+            is_primary_key = col_name in self.key_values
             state = "disabled" if is_primary_key else "normal"
             if not  self.column_types.get(col_name):
                 self.column_types[col_name] = _map_column_type(col_type)
@@ -365,27 +313,54 @@ class EditModal(tk.Toplevel):
                     errors.append(f"O campo '{col_name}' é obrigatório.")
         return errors
     
-    def build_update_query(self,table_name, updated_values, primary_key):
-        """Constrói a query de atualização dinâmica."""
-        # set_clauses = [f"{col} = {value}" for col,value in updated_values.items() if col != primary_key]
-        set_clauses = [f"{quote_identifier(self.db_type,col)} = {value}" for col,value in updated_values.items() ]
-        if not set_clauses:
-            return None  # Nenhuma coluna para atualizar
+    def _new_change_set(self) -> ChangeSet:
+        """ChangeSet de uma linha, identificada pelos valores da chave carregados."""
+        return ChangeSet(self.table_name, list(self.key_values), self.db_type)
+
+    def _flush(self, change_set: ChangeSet, on_written: Callable[[], None], on_error: Callable[[Exception], None],
+               on_finished: Callable[[], None], force: bool = False) -> None:
+        """
+        Grava o ChangeSet em segundo plano; em caso de conflito pergunta (na interface) se deve sobrescrever.
+
+        `on_written` é chamado depois da gravação e `on_error` se ela falhar; `on_finished` é chamado
+        sempre ao final (inclusive quando o usuário recusa sobrescrever), para restaurar os botões.
+        """
+        def _done(result):
+            if result.conflicts:
+                details = "\n".join(str(conflict) for conflict in result.conflicts)
+                self.log_message(f"Conflito ao gravar o registro {self.record_id}: {details}", level="warning")
+                if messagebox.askyesno("Conflito", f"O registro foi alterado ou removido no servidor desde o carregamento:\n\n"
+                                                   f"{details}\n\nGravar mesmo assim?"):
+                    self._flush(change_set, on_written, on_error, on_finished, force=True)
+                    return
+                on_finished()
+                return
+            ResultCache.for_engine(self.engine).invalidate_table(self.table_name)
+            try:
+                on_written()
+            finally:
+                on_finished()
 
-        # Obtendo o valor da chave primária formatado corretamente
-        primary_value = _convert_column_type_for_string_one(self.column_types,primary_key,self.record_id) #updated_values[primary_key]
+        def _failed(e):
+            try:
+                on_error(e)
+            finally:
+                on_finished()
 
-        # Construindo a query final
-        query = text(f"UPDATE {quote_identifier(self.db_type,self.table_name)} SET {', '.join(set_clauses)} WHERE {quote_identifier(self.db_type,primary_key)} = {primary_value};")
+        get_scheduler().submit(change_set.flush, self.engine, force, group=self, on_done=_done, on_error=_failed)
+
+    def _enable_button(self, button) -> None:
+        """Reabilita um botão do modal, se a janela ainda estiver aberta."""
+        if self.winfo_exists():
+            button.config(state="normal")
 
-        return query
-    
     def normalizar(self,texto):
         """Remove espaços extras e normaliza strings."""
         return "" if texto is None else re.sub(r'\s+', ' ', str(texto).strip())
     
     def _save_changes(self):
-        """Função genérica para salvar alterações em qualquer banco de dados."""
+        """Função genérica para salvar alterações em qualquer banco de dados (a gravação ocorre em segundo plano)."""
+        submitted = False
         try:
             self.save_button.config(state="disabled")
             errors = self._validate_fields()
@@ -396,89 +371,94 @@ class EditModal(tk.Toplevel):
             updated_values = {}
             for col_name, entry in self.field_entries.items():
                 valor = self.linha_select_df[col_name]
+                novo = get_valor_idependente_entry(entry, tk, ttk)
                 valor_in_table = _convert_column_type_for_string_one(self.column_types, col_name, valor).strip()
-                new_valor = _convert_column_type_for_string_one(self.column_types, col_name, get_valor_idependente_entry(entry, tk, ttk))
+                new_valor = _convert_column_type_for_string_one(self.column_types, col_name, novo)
                 old, last = self.normalizar(valor_in_table), self.normalizar(new_valor)
                 
                 if old != last:
-                    updated_values[col_name] = new_valor
+                    updated_values[col_name] = novo.strip() if isinstance(novo, str) else novo
 
             if not updated_values:
                 messagebox.showinfo("Sem alterações", "Nenhuma alteração foi detectada.")
                 self.log_message("Nenhuma alteração foi detectada.", level="info")
                 return
-            
-            updated_values[self.name_campo_primary_key] = _convert_column_type_for_string_one(self.column_types,self.name_campo_primary_key,self.record_id)
-            query = self.build_update_query(self.table_name, updated_values, self.name_campo_primary_key)
-            
-            if query is None:
-                return
+
+            # Valores tipados e vinculados como parâmetros (campo vazio grava NULL)
+            converted = _convert_column_type(self.column_types, updated_values)
+            change_set = self._new_change_set()
+            for col, value in converted.items():
+                change_set.stage_update(self.row_index, self.row, col, None if value == "" else value)
 
             confirm = messagebox.askyesno("Confirmação", "Tem certeza que deseja salvar as alterações?")
             if not confirm:
                 return
 
-            with self.engine.begin() as conn:
-                conn.execute(query)
-
-            self.log_message(f"Registro {self.record_id} atualizado com sucesso!", level="info")
-            
-            
-            for col, value in updated_values.items():
-                if value is not None or value != "NULL":
-                    if col in self.df.columns:
-                        self.df.at[self.row_index, col] =self.column_types[col](value.strip("'"))
-                 
-
-            if self.on_data_change:
-                self.on_data_change(self.df)
+            def _saved():
+                self.log_message(f"Registro {self.record_id} atualizado com sucesso!", level="info")
+                df = change_set.apply_to(self.get_df())
+                if self.on_data_change:
+                    self.on_data_change(df)
+                messagebox.showinfo("Sucesso", "Registro atualizado com sucesso!")
 
-            messagebox.showinfo("Sucesso", "Registro atualizado com sucesso!")
+            self._flush(change_set, _saved, self._on_save_error, lambda: self._enable_button(self.save_button))
+            submitted = True
 
-        except SQLAlchemyError as e:
-            self.log_message(f"Erro SQL ao atualizar o registro: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
-            error_message = str(e)
-        
-            if "ForeignKeyViolation" in error_message:
-                msg = "Falha ao salvar devido à violação de chave estrangeira. Verifique se todos os dados estão corretos e se as referências entre tabelas estão consistentes."
-            elif "UniqueViolation" in error_message:
-                msg = "Falha ao salvar devido a uma violação de unicidade. O valor informado já existe no banco de dados."
-            else:
-                msg = f"Ocorreu um erro ao tentar salvar as alterações no banco de dados. Erro: {error_message}"
-            messagebox.showerror("Erro de Banco de Dados", msg)
         except Exception as es:
-            self.log_message(f"Erro ao atualizar o registro: {es} ({type(es).__name__})\n{traceback.format_exc()}", level="error")
-            messagebox.showerror("Erro", f"Falha ao salvar as alterações: {str(es)}")
+            self._on_save_error(es)
         finally:
-            self.save_button.config(state="normal")
+            if not submitted:
+                self.save_button.config(state="normal")
+
+    def _on_save_error(self, e: Exception) -> None:
+        """Mostra o erro da gravação das alterações (executa na thread da interface)."""
+        details = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        if not isinstance(e, SQLAlchemyError):
+            self.log_message(f"Erro ao atualizar o registro: {e} ({type(e).__name__})\n{details}", level="error")
+            messagebox.showerror("Erro", f"Falha ao salvar as alterações: {str(e)}")
+            return
+        self.log_message(f"Erro SQL ao atualizar o registro: {e} ({type(e).__name__})\n{details}", level="error")
+        error_message = str(e)
+
+        if "ForeignKeyViolation" in error_message:
+            msg = "Falha ao salvar devido à violação de chave estrangeira. Verifique se todos os dados estão corretos e se as referências entre tabelas estão consistentes."
+        elif "UniqueViolation" in error_message:
+            msg = "Falha ao salvar devido a uma violação de unicidade. O valor informado já existe no banco de dados."
+        else:
+            msg = f"Ocorreu um erro ao tentar salvar as alterações no banco de dados. Erro: {error_message}"
+        messagebox.showerror("Erro de Banco de Dados", msg)
 
     def _delete_record(self):
-        """Função para deletar um registro do banco de dados."""
-        try:
-            confirm = messagebox.askyesno("Confirmação", "Tem certeza que deseja excluir este registro?")
-            if not confirm:
-                return
+        """Função para deletar um registro do banco de dados (a exclusão ocorre em segundo plano)."""
+        confirm = messagebox.askyesno("Confirmação", "Tem certeza que deseja excluir este registro?")
+        if not confirm:
+            return
 
-            self.delete_button.config(state="disabled")
-            query = text(f"DELETE FROM {quote_identifier(self.db_type,self.table_name)} WHERE {quote_identifier(self.db_type,self.name_campo_primary_key)} = :primary_key")
-            params = {"primary_key": _convert_column_type_for_string_one(self.column_types,self.name_campo_primary_key,self.record_id)}
-
-            with self.engine.begin() as conn:
-                conn.execute(query, params)
+        self.delete_button.config(state="disabled")
+        try:
+            change_set = self._new_change_set()
+            change_set.stage_delete(self.row_index, self.row)
+        except Exception as e:
+            self._on_delete_error(e)
+            self.delete_button.config(state="normal")
+            return
 
-            self.log_message(f"Registro {self.record_id} deletado com sucesso! query ={query}", level="info")
+        def _deleted():
+            self.log_message(f"Registro {self.record_id} deletado com sucesso!", level="info")
             messagebox.showinfo("Sucesso", "Registro deletado com sucesso!")
-            
-            self.df = self.df[self.df[self.name_campo_primary_key] != self.record_id]
-
+            df = change_set.apply_to(self.get_df())
             if self.on_data_change:
-                self.on_data_change(self.df)
+                self.on_data_change(df)
+
+        # O botão volta a ficar ativo ao terminar, inclusive se o usuário recusar sobrescrever um conflito
+        self._flush(change_set, _deleted, self._on_delete_error, lambda: self._enable_button(self.delete_button))
 
-        except SQLAlchemyError as e:
-            self.log_message(f"Erro SQL ao deletar o registro: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
+    def _on_delete_error(self, e: Exception) -> None:
+        """Mostra o erro da exclusão (executa na thread da interface)."""
+        details = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        if isinstance(e, SQLAlchemyError):
+            self.log_message(f"Erro SQL ao deletar o registro: {e} ({type(e).__name__})\n{details}", level="error")
             messagebox.showerror("Erro de Banco de Dados", f"Falha ao deletar o registro: {str(e)}")
-        except Exception as e:
-            self.log_message(f"Erro ao deletar o registro: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
-            messagebox.showerror("Erro", f"Falha ao deletar o registro: {str(e)}")
-        finally:
-            self.delete_button.config(state="normal")
\ No newline at end of file
+        else:
+            self.log_message(f"Erro ao deletar o registro: {e} ({type(e).__name__})\n{details}", level="error")
+            messagebox.showerror("Erro", f"Falha ao deletar o registro: {str(e)}")
\ No newline at end of file
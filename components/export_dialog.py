@@ -0,0 +1,115 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from typing import Any, Callable, Dict, Optional
+from utils.exporters import EXPORT_FILE_TYPES, ExportStats, export_query
+from utils.job_scheduler import PRIORITY_BULK, get_scheduler
+from utils.logger import logger
+from utils.query_jobs import QueryJob, current_job
+
+
+def ask_export_path(parent, default_name: str) -> str:
+    """Pergunta o arquivo de destino; o formato segue a extensão escolhida."""
+    return filedialog.asksaveasfilename(parent=parent, title="Exportar", defaultextension=".csv",
+                                        initialfile=default_name, filetypes=EXPORT_FILE_TYPES)
+
+
+class ExportDialog(tk.Toplevel):
+    """
+    Exportação de uma consulta para arquivo em segundo plano, lida do cursor do servidor lote a
+    lote: progresso, vazão (linhas/s e MB gravados) e cancelamento, que interrompe a consulta no servidor.
+    """
+
+    def __init__(self, master: Any, engine, query: str, file_path: str, log_message: Optional[Callable] = None,
+                 params: Optional[Dict[str, Any]] = None, total_rows: Optional[int] = None, title: str = "Exportação"):
+        super().__init__(master)
+        self.engine = engine
+        self.query = query
+        self.params = params
+        self.file_path = file_path
+        # Sem o log da janela principal, registra no logger da aplicação
+        self.log_message = log_message or (lambda message, level="info": getattr(logger, level, logger.info)(message))
+        self.total_rows = total_rows
+        self.job: Optional[QueryJob] = None
+
+        self.title(title)
+        self.geometry("520x170")
+        self.resizable(False, False)
+        self.transient(master)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        ttk.Label(self, text=file_path, wraplength=490).pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.progress = ttk.Progressbar(self, mode="determinate" if total_rows else "indeterminate",
+                                        maximum=total_rows or 100)
+        self.progress.pack(fill=tk.X, padx=10, pady=5)
+        self.status_label = ttk.Label(self, text="Iniciando a consulta...")
+        self.status_label.pack(fill=tk.X, padx=10, pady=5)
+        self.cancel_button = ttk.Button(self, text="⏹ Cancelar", command=self._cancel)
+        self.cancel_button.pack(side=tk.RIGHT, padx=10, pady=10)
+
+        if not total_rows:
+            self.progress.start(15)
+        self.job = QueryJob(engine, self._run, name="Exportação", group=self, priority=PRIORITY_BULK).start()
+
+    def _run(self):
+        """Executa a exportação (em segundo plano)."""
+        ui = get_scheduler().call_in_ui
+        job = current_job()
+        try:
+            stats = export_query(self.engine, self.query, self.file_path, self.params, stop_event=job.stop_event,
+                                 on_progress=lambda stats: ui(self._show_progress, stats))
+            ui(self._on_finished, stats)
+        except Exception as e:
+            if job.stop_event.is_set():
+                ui(self._on_cancelled)
+            else:
+                ui(self._on_error, e)
+
+    def _show_progress(self, stats: ExportStats):
+        if not self.winfo_exists():
+            return
+        if self.total_rows:
+            self.progress.config(value=min(stats.rows, self.total_rows))
+            percent = min(100, stats.rows * 100 // self.total_rows)
+            self.status_label.config(text=f"{percent}% — {stats.describe()}")
+        else:
+            self.status_label.config(text=stats.describe())
+
+    def _on_finished(self, stats: ExportStats):
+        if stats.cancelled:
+            message = f"Exportação cancelada após {stats.describe()} ({self.file_path})."
+        else:
+            message = f"✅ Exportação concluída: {stats.describe()} → {self.file_path}"
+        self.log_message(message, level="info")
+        self._finish(message, completed=not stats.cancelled)
+
+    def _on_cancelled(self):
+        message = f"Exportação cancelada ({self.file_path})."
+        self.log_message(message, level="info")
+        self._finish(message)
+
+    def _on_error(self, e: Exception):
+        self.log_message(f"Erro ao exportar para {self.file_path}: {e} ({type(e).__name__})", level="error")
+        self._finish("❌ Falha na exportação.")
+        messagebox.showerror("Erro ao exportar", str(e), parent=self if self.winfo_exists() else None)
+
+    def _finish(self, message: str, completed: bool = False):
+        if not self.winfo_exists():
+            return
+        self.progress.stop()
+        if self.total_rows and completed:
+            self.progress.config(value=self.total_rows)
+        self.status_label.config(text=message)
+        self.cancel_button.config(text="Fechar", command=self.destroy, state="normal")
+
+    def _cancel(self):
+        if self.job is not None and self.job.is_running:
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Cancelando...")
+            self.job.cancel()
+
+    def _on_close(self):
+        if self.job is not None and self.job.is_running:
+            if not messagebox.askyesno("Exportação", "A exportação está em andamento. Cancelar e fechar?", parent=self):
+                return
+            self.job.cancel()
+        self.destroy()
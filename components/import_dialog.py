@@ -0,0 +1,242 @@
+import threading
+import traceback
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from utils.bulk_import import (IMPORT_CHUNK_SIZE, IMPORT_FILE_TYPES, auto_map_columns, import_frame,
+                               missing_required_columns, read_import_file, summarize)
+from utils.job_scheduler import PRIORITY_BULK, get_scheduler
+from utils.result_cache import ResultCache
+
+# Opção do mapeamento para colunas do arquivo que não serão importadas
+IGNORE_COLUMN = "(ignorar)"
+# Linhas do relatório de erros exibidas na janela (o arquivo salvo traz todas)
+REPORT_PREVIEW_ROWS = 200
+
+
+def _format_traceback(e: Exception) -> str:
+    return "".join(traceback.format_exception(type(e), e, e.__traceback__))
+
+
+class ImportDialog(tk.Toplevel):
+    """
+    Janela de importação de um arquivo CSV/Excel/Parquet para a tabela: associação das colunas,
+    carga em lotes pelo caminho mais rápido do banco, progresso e relatório das linhas rejeitadas.
+    """
+
+    def __init__(self, master: Any, engine, table_name: str, columns: List[Dict[str, Any]], log_message: Callable,
+                 on_imported: Optional[Callable[[int], None]] = None):
+        super().__init__(master)
+        self.engine = engine
+        self.table_name = table_name
+        self.columns = columns
+        self.log_message = log_message
+        self.on_imported = on_imported
+        self.df: Optional[pd.DataFrame] = None
+        self.mapping_vars: Dict[str, tk.StringVar] = {}
+        self.errors: Optional[pd.DataFrame] = None
+        self.stop_event: Optional[threading.Event] = None
+
+        self.title(f"Importar arquivo - {table_name}")
+        self.geometry("720x640")
+        self.minsize(560, 480)
+        self.transient(master)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._create_widgets()
+
+    def _create_widgets(self):
+        file_frame = ttk.Frame(self)
+        file_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.path_var = tk.StringVar()
+        ttk.Entry(file_frame, textvariable=self.path_var, state="readonly").pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.browse_button = ttk.Button(file_frame, text="📂 Procurar", command=self._choose_file)
+        self.browse_button.pack(side=tk.LEFT, padx=5)
+
+        mapping_frame = ttk.LabelFrame(self, text="Colunas: arquivo → tabela")
+        mapping_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        canvas = tk.Canvas(mapping_frame, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(mapping_frame, orient="vertical", command=canvas.yview)
+        self.fields_frame = ttk.Frame(canvas)
+        canvas.create_window((0, 0), window=self.fields_frame, anchor=tk.NW)
+        canvas.configure(yscrollcommand=scrollbar.set)
+        self.fields_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        options_frame = ttk.Frame(self)
+        options_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(options_frame, text="Linhas por transação:").pack(side=tk.LEFT)
+        self.chunk_var = tk.IntVar(value=IMPORT_CHUNK_SIZE)
+        ttk.Spinbox(options_frame, from_=100, to=100000, increment=1000, textvariable=self.chunk_var, width=8).pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(self, mode="determinate")
+        self.progress.pack(fill=tk.X, padx=10, pady=5)
+        self.status_label = ttk.Label(self, text="Selecione um arquivo CSV, Excel ou Parquet.")
+        self.status_label.pack(fill=tk.X, padx=10)
+
+        self.report_text = tk.Text(self, height=8, wrap="none", font=("Consolas", 9), state=tk.DISABLED)
+        self.report_text.pack(fill=tk.BOTH, padx=10, pady=5)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(5, 10))
+        self.import_button = ttk.Button(button_frame, text="📥 Importar", command=self._start_import, state="disabled")
+        self.import_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="⏹ Cancelar", command=self._cancel_import, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.report_button = ttk.Button(button_frame, text="💾 Salvar relatório de erros", command=self._save_report, state="disabled")
+        self.report_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="❌ Fechar", command=self._on_close).pack(side=tk.RIGHT, padx=5)
+
+    # ------------------------------------------------------------------ arquivo e mapeamento
+
+    def _choose_file(self):
+        path = filedialog.askopenfilename(parent=self, title="Arquivo a importar", filetypes=IMPORT_FILE_TYPES)
+        if not path:
+            return
+        self.path_var.set(path)
+        self.import_button.config(state="disabled")
+        self.status_label.config(text="Lendo o arquivo...")
+        get_scheduler().submit(read_import_file, path, group=self, on_done=self._on_file_loaded, on_error=self._on_file_error)
+
+    def _on_file_loaded(self, df: pd.DataFrame):
+        self.df = df
+        self._build_mapping()
+        self.status_label.config(text=f"{len(df)} linhas e {len(df.columns)} colunas no arquivo.")
+        self.import_button.config(state="normal" if len(df) else "disabled")
+
+    def _on_file_error(self, e: Exception):
+        self.status_label.config(text="Falha ao ler o arquivo.")
+        self.log_message(f"Erro ao ler o arquivo de importação: {e} ({type(e).__name__})\n{_format_traceback(e)}", level="error")
+        messagebox.showerror("Erro", f"Não foi possível ler o arquivo: {e}", parent=self)
+
+    def _build_mapping(self):
+        for widget in self.fields_frame.winfo_children():
+            widget.destroy()
+        self.mapping_vars.clear()
+        table_columns = [col["name"] for col in self.columns]
+        types = {col["name"]: str(col["type"]) for col in self.columns}
+        mapping = auto_map_columns([str(col) for col in self.df.columns], table_columns)
+
+        for i, col in enumerate(self.df.columns):
+            ttk.Label(self.fields_frame, text=str(col)).grid(row=i, column=0, sticky=tk.W, padx=5, pady=2)
+            var = tk.StringVar(value=mapping.get(str(col), IGNORE_COLUMN))
+            ttk.Combobox(self.fields_frame, textvariable=var, values=[IGNORE_COLUMN] + table_columns,
+                         state="readonly", width=30).grid(row=i, column=1, sticky=tk.W, padx=5, pady=2)
+            type_label = ttk.Label(self.fields_frame, text=types.get(var.get(), ""), foreground="gray")
+            type_label.grid(row=i, column=2, sticky=tk.W, padx=5)
+            var.trace_add("write", lambda *_, v=var, label=type_label: label.config(text=types.get(v.get(), "")))
+            self.mapping_vars[col] = var
+
+    def _current_mapping(self) -> Dict[str, str]:
+        return {col: var.get() for col, var in self.mapping_vars.items() if var.get() != IGNORE_COLUMN}
+
+    # ------------------------------------------------------------------ importação
+
+    def _start_import(self):
+        mapping = self._current_mapping()
+        if not mapping:
+            messagebox.showwarning("Importação", "Associe ao menos uma coluna do arquivo a uma coluna da tabela.", parent=self)
+            return
+        targets = list(mapping.values())
+        duplicated = sorted({col for col in targets if targets.count(col) > 1})
+        if duplicated:
+            messagebox.showwarning("Importação", f"Colunas da tabela associadas mais de uma vez: {', '.join(duplicated)}", parent=self)
+            return
+        missing = missing_required_columns(mapping, self.columns)
+        if missing and not messagebox.askyesno(
+                "Importação", f"Colunas obrigatórias sem valor no arquivo: {', '.join(missing)}.\n"
+                              "O banco deve recusar as linhas. Continuar mesmo assim?", parent=self):
+            return
+        try:
+            chunk_size = max(1, int(self.chunk_var.get()))
+        except (tk.TclError, ValueError):
+            chunk_size = IMPORT_CHUNK_SIZE
+
+        self.stop_event = threading.Event()
+        self._set_running(True)
+        self.progress.config(maximum=len(self.df), value=0)
+        self.status_label.config(text="Validando e importando...")
+        self.log_message(f"Importando {len(self.df)} linhas para {self.table_name}...", level="info")
+        get_scheduler().submit(
+            import_frame, self.engine, self.table_name, self.df, mapping, self.columns, chunk_size,
+            self._report_progress, self.stop_event,
+            priority=PRIORITY_BULK, group=self, on_done=self._on_import_done, on_error=self._on_import_error,
+        )
+
+    def _report_progress(self, done: int, total: int):
+        # Chamado na thread de trabalho
+        get_scheduler().call_in_ui(self._show_progress, done, total)
+
+    def _show_progress(self, done: int, total: int):
+        if not self.winfo_exists():
+            return
+        self.progress.config(value=done)
+        self.status_label.config(text=f"{done} de {total} linhas processadas...")
+
+    def _cancel_import(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.status_label.config(text="Cancelando após o lote atual...")
+
+    def _on_import_done(self, result):
+        ResultCache.for_engine(self.engine).invalidate_table(self.table_name)
+        summary = summarize(result)
+        self.log_message(f"Importação em {self.table_name}: {summary}", level="warning" if result.rejected else "info")
+        if not self.winfo_exists():
+            return
+        self._set_running(False)
+        if not result.cancelled:
+            self.progress.config(value=result.total)
+        self.status_label.config(text=summary)
+        self.errors = result.errors
+        self._show_report(summary)
+        self.report_button.config(state="normal" if len(self.errors) else "disabled")
+        if self.on_imported and result.imported:
+            self.on_imported(result.imported)
+
+    def _on_import_error(self, e: Exception):
+        # Os lotes confirmados antes do erro já estão na tabela
+        ResultCache.for_engine(self.engine).invalidate_table(self.table_name)
+        self.log_message(f"Erro na importação para {self.table_name}: {e} ({type(e).__name__})\n{_format_traceback(e)}", level="error")
+        if not self.winfo_exists():
+            return
+        self._set_running(False)
+        self.status_label.config(text="Falha na importação.")
+        messagebox.showerror("Erro", f"Falha na importação: {e}", parent=self)
+
+    def _set_running(self, running: bool):
+        self.import_button.config(state="disabled" if running else "normal")
+        self.browse_button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+
+    def _show_report(self, summary: str):
+        self.report_text.config(state=tk.NORMAL)
+        self.report_text.delete("1.0", tk.END)
+        self.report_text.insert(tk.END, summary + "\n")
+        if len(self.errors):
+            preview = self.errors.head(REPORT_PREVIEW_ROWS)
+            self.report_text.insert(tk.END, "\n" + preview.to_string(index=False))
+            if len(self.errors) > REPORT_PREVIEW_ROWS:
+                self.report_text.insert(tk.END, f"\n... e mais {len(self.errors) - REPORT_PREVIEW_ROWS} erros (salve o relatório).")
+        self.report_text.config(state=tk.DISABLED)
+
+    def _save_report(self):
+        if self.errors is None or not len(self.errors):
+            return
+        path = filedialog.asksaveasfilename(parent=self, title="Salvar relatório de erros", defaultextension=".csv",
+                                            initialfile=f"{self.table_name}_erros_importacao.csv", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            self.errors.to_csv(path, index=False)
+            self.log_message(f"Relatório de erros da importação salvo em {path}", level="info")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Não foi possível salvar o relatório: {e}", parent=self)
+
+    def _on_close(self):
+        if self.stop_event is not None and not self.stop_event.is_set() and str(self.cancel_button["state"]) == "normal":
+            if not messagebox.askyesno("Importação", "A importação está em andamento. Cancelar e fechar?", parent=self):
+                return
+            self.stop_event.set()
+        self.destroy()
@@ -2,15 +2,17 @@ import tkinter as tk
 from tkinter import TclError, ttk, messagebox
 from typing import Any, Callable, Optional, Union
 import pandas as pd
-from sqlalchemy import inspect
 
 from components.Create_registro_Modal import CreateModal
 from components.analit_frame_table import AnalysisFrame 
+from components.import_dialog import ImportDialog
+from config.SchemaSnapshot import SchemaSnapshot
 
 class NavigationFrame(ttk.Frame):
     """Creates a navigation frame with pagination controls."""
     
-    def __init__(self, master: Any,edit_table:bool,databse_name,log_message,query_executed, prev_page: Callable, next_page: Callable, update_table: Callable, df: pd.DataFrame,engine: Any, table_name,columns:Optional[dict[str, Any]] = None, enum_values: Optional[dict[str,Any]] = None,db_type:str ='PostgreSQL', on_data_change: Optional[Callable[[pd.DataFrame], None]] = None):
+    def __init__(self, master: Any,edit_table:bool,databse_name,log_message,query_executed, prev_page: Callable, next_page: Callable, update_table: Callable, df: pd.DataFrame,engine: Any, table_name,columns:Optional[dict[str, Any]] = None, enum_values: Optional[dict[str,Any]] = None,db_type:str ='PostgreSQL', on_data_change: Optional[Callable[[pd.DataFrame], None]] = None,
+                 get_df: Optional[Callable[[], pd.DataFrame]] = None):
         super().__init__(master)
         self.prev_page = prev_page
         self.next_page = next_page
@@ -20,6 +22,8 @@ class NavigationFrame(ttk.Frame):
         self.query_executed = query_executed
         self.enum_values = enum_values
         self.df = df  # Armazena o DataFrame
+        # Retorna o DataFrame atual da tabela (montado sob demanda a partir do buffer colunar)
+        self.get_df = get_df
         self.on_data_change = on_data_change
         self.engine = engine
         self.table_name = table_name
@@ -27,6 +31,10 @@ class NavigationFrame(ttk.Frame):
         self.root = master
         self.edited = edit_table
         self.databse_name = databse_name
+        # Total de linhas da consulta no servidor (COUNT(*) ou estimativa do catálogo)
+        self.server_total = None
+        self.server_total_estimated = False
+        self._loaded_length = len(df) if df is not None else 0
 
         self._create_widgets()
     
@@ -51,19 +59,27 @@ class NavigationFrame(ttk.Frame):
         state_value = 'normal' if self.edited else 'disabled'
         self.invalid_button = ttk.Button(self.gestao_label, text="criar novo registro", command=self.cria_registro, style="DataTable.TButton",state=state_value)
         self.invalid_button.pack(side=tk.RIGHT, padx=5)
+        self.import_button = ttk.Button(self.gestao_label, text="📥 importar arquivo", command=self.importar_arquivo, style="DataTable.TButton",state=state_value)
+        self.import_button.pack(side=tk.RIGHT, padx=5)
         self.analysis_button = ttk.Button(self.gestao_label, text="Analisar Tabela", command=self.open_analysis)
         self.analysis_button.pack(side=tk.RIGHT,padx=5)
         self.gestao_label.pack(side=tk.RIGHT,fill=tk.X, pady=5)
  
 
+    def _current_df(self) -> pd.DataFrame:
+        """Retorna os dados atuais da tabela."""
+        if self.get_df is not None:
+            self.df = self.get_df()
+        return self.df
+
     def cria_registro(self):
         """
         Função para criar um novo registro em uma tabela selecionada.
         """
+        df = self._current_df()
         # Obtém o nome da tabela selecionada na combobox, se disponível
-        # Inspeciona o banco de dados para buscar a chave primária da tabela
-        inspector = inspect(self.engine)
-        pk_constraint = inspector.get_pk_constraint(self.table_name)
+        # Busca a chave primária da tabela no retrato do esquema (sem ida ao servidor)
+        pk_constraint = SchemaSnapshot.for_engine(self.engine).get_pk_constraint(self.table_name)
         primary_keys = pk_constraint.get("constrained_columns", [])
 
         # Define a chave primária para a modal de criação
@@ -71,8 +87,8 @@ class NavigationFrame(ttk.Frame):
             campo_primary_key = primary_keys[0]  # Usa a primeira chave primária encontrada
         else:
             # Caso não tenha chave primária explícita, busca uma coluna com valores únicos
-            unique_cols = [col for col in self.df.columns if self.df[col].is_unique]
-            campo_primary_key = unique_cols[0] if unique_cols else self.df.columns[0]
+            unique_cols = [col for col in df.columns if df[col].is_unique]
+            campo_primary_key = unique_cols[0] if unique_cols else df.columns[0]
 
         # Garante que um nome de coluna válido foi encontrado
         if not campo_primary_key:
@@ -81,20 +97,31 @@ class NavigationFrame(ttk.Frame):
 
         # Cria a modal para inserção de registro
         CreateModal( master=self,engine=self.engine, table_name=self.table_name, on_data_change=self.on_data_change, db_type=self.db_type,
-                    df=self.df, column_name_key=campo_primary_key, 
+                    df=df, column_name_key=campo_primary_key, 
                     enum_values=self.enum_values, log_message=self.log_message, columns=self.columns, databse_name=self.databse_name)
 
+    def importar_arquivo(self):
+        """Abre a importação em lote de um arquivo CSV/Excel/Parquet para a tabela."""
+        # Tipos das colunas do catálogo; sem ele, do retrato do esquema
+        columns = self.columns or SchemaSnapshot.for_engine(self.engine).get_columns(self.table_name)
+        if not columns:
+            messagebox.showerror("Erro", "Colunas da tabela indisponíveis para a importação.")
+            return
+        ImportDialog(self, engine=self.engine, table_name=self.table_name, columns=columns, log_message=self.log_message,
+                     on_imported=lambda count: self.log_message(f"{count} linhas importadas em {self.table_name}; recarregue a tabela para vê-las.", level="info"))
+
     def open_analysis(self):
         analysis_window = tk.Toplevel()
         analysis_window.title("Análise Detalhada")
-        analysis_frame = AnalysisFrame(analysis_window, self.df,self.engine,self.table_name,self.query_executed)
+        analysis_frame = AnalysisFrame(analysis_window, self._current_df(),self.engine,self.table_name,self.query_executed)
         analysis_frame.pack(fill=tk.BOTH, expand=True)
 
     def update_pagination(self, current_page: int, total_pages: int, length: int = None):
         """Atualiza o rótulo da página e o estado dos botões de navegação."""
         
         if length is not None and isinstance(length, int):
-            self.total_label.config(text=f"Total de registros: {length}")
+            self._loaded_length = length
+            self._update_total_label()
 
         # Evita exibir "Page 1 of 0"
         total_pages = max(total_pages, 1)  
@@ -107,6 +134,19 @@ class NavigationFrame(ttk.Frame):
             self.next_button.config(state=tk.NORMAL if current_page < total_pages - 1 else tk.DISABLED)
  
     
+    def set_server_total(self, total: int, estimated: bool = False):
+        """Exibe o total de linhas da consulta no servidor, ainda que nem todas estejam carregadas."""
+        self.server_total = total
+        self.server_total_estimated = estimated
+        self._update_total_label()
+
+    def _update_total_label(self):
+        text = f"Total de registros: {self._loaded_length}"
+        if self.server_total is not None and self.server_total != self._loaded_length:
+            prefix = "~" if self.server_total_estimated else ""
+            text += f" de {prefix}{self.server_total} no servidor"
+        self.total_label.config(text=text)
+
     def _validate_prev_page(self):
         """Validates and navigates to the previous page."""
         if callable(self.prev_page):
@@ -0,0 +1,61 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.query_plan import PlanNode
+
+
+class PlanViewer(tk.Toplevel):
+    """
+    Janela com o plano de execução da consulta em árvore: operação, custo, linhas estimadas,
+    linhas/tempo reais (com ANALYZE) e os alertas de varredura completa.
+    """
+
+    def __init__(self, parent, plan: PlanNode, query: str, title: str = "Plano de Execução"):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("900x520")
+        self.minsize(600, 360)
+        self.transient(parent)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        query_text = tk.Text(self, height=4, wrap="word", font=("Consolas", 9))
+        query_text.insert(tk.END, query)
+        query_text.config(state=tk.DISABLED)
+        query_text.grid(row=0, column=0, columnspan=2, sticky="ew", padx=10, pady=(10, 5))
+
+        columns = ("custo", "linhas", "reais", "tempo", "detalhes")
+        self.tree = ttk.Treeview(self, columns=columns, show="tree headings")
+        self.tree.heading("#0", text="Operação")
+        self.tree.column("#0", width=300)
+        for col, heading, width in zip(columns, ("Custo", "Linhas estimadas", "Linhas reais", "Tempo (ms)", "Detalhes"),
+                                       (80, 110, 90, 80, 300)):
+            self.tree.heading(col, text=heading)
+            self.tree.column(col, width=width, anchor=tk.W if col == "detalhes" else tk.CENTER)
+        self.tree.tag_configure("warning", foreground="#dc3545")
+        scroll = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.grid(row=1, column=0, sticky="nsew", padx=(10, 0))
+        scroll.grid(row=1, column=1, sticky="ns", padx=(0, 10))
+
+        warnings_frame = ttk.LabelFrame(self, text="⚠️ Alertas")
+        warnings_frame.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=10)
+        self.warnings_text = tk.Text(warnings_frame, height=5, wrap="word", font=("Arial", 9))
+        self.warnings_text.pack(fill=tk.BOTH, expand=True)
+
+        self._insert("", plan)
+        warnings = [warning for node in plan.walk() for warning in node.warnings]
+        self.warnings_text.insert(tk.END, "\n".join(f"• {w}" for w in warnings) or "✅ Nenhum alerta no plano.")
+        self.warnings_text.config(state=tk.DISABLED)
+
+    def _insert(self, parent_id: str, node: PlanNode) -> None:
+        def fmt(value, digits=0):
+            return "" if value is None else (f"{value:.{digits}f}" if digits else f"{int(value)}")
+
+        details = "; ".join(f"{key}: {value}" for key, value in node.details.items() if value is not None)
+        item_id = self.tree.insert(
+            parent_id, "end", text=("⚠️ " if node.warnings else "") + node.label, open=True,
+            tags=("warning",) if node.warnings else (),
+            values=(fmt(node.cost, 2), fmt(node.rows), fmt(node.actual_rows), fmt(node.actual_time, 3), details),
+        )
+        for child in node.children:
+            self._insert(item_id, child)
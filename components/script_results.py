@@ -0,0 +1,78 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable
+from DataFrameTable import DataFrameTable
+from utils.script_runner import StatementResult
+
+
+class ScriptResultsFrame(ttk.Frame):
+    """Exibe o resultado de um script: uma aba de resumo com os tempos e uma aba por conjunto de resultados."""
+
+    def __init__(self, master: Any, engine: Any, db_type: str, databse_name: str, log_message: Callable,
+                 build_columns: Callable):
+        super().__init__(master)
+        self.engine = engine
+        self.db_type = db_type
+        self.databse_name = databse_name
+        self.log_message = log_message
+        # Gera a descrição das colunas (formato do DataFrameTable) a partir do DataFrame
+        self.build_columns = build_columns
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        summary_frame = ttk.Frame(self.notebook)
+        self.notebook.add(summary_frame, text="⏱️ Resumo")
+        columns = ("n", "comando", "total", "execucao", "leitura", "linhas", "status")
+        headings = ("#", "Comando", "Total (ms)", "Execução (ms)", "Leitura (ms)", "Linhas", "Status")
+        widths = (40, 360, 90, 100, 90, 80, 220)
+        self.summary = ttk.Treeview(summary_frame, columns=columns, show="headings", height=8)
+        for col, heading, width in zip(columns, headings, widths):
+            self.summary.heading(col, text=heading)
+            self.summary.column(col, width=width, anchor=tk.W if col in ("comando", "status") else tk.CENTER)
+        scroll = ttk.Scrollbar(summary_frame, orient="vertical", command=self.summary.yview)
+        self.summary.configure(yscrollcommand=scroll.set)
+        self.summary.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.summary.tag_configure("slowest", background="#fff3cd")
+        self.summary.tag_configure("error", foreground="#dc3545")
+        self._results = []
+
+    def add_result(self, result: StatementResult) -> None:
+        """Adiciona a linha do comando no resumo e, se ele retornou linhas, uma aba com os dados."""
+        self._results.append(result)
+        statement = " ".join(result.statement.split())
+        if result.error is not None:
+            status = f"Erro: {result.error}"
+        elif result.returns_rows:
+            status = f"{result.rowcount} linhas retornadas" + (" (truncado)" if result.truncated else "")
+        else:
+            status = "OK" if result.rowcount is None else f"{result.rowcount} linhas afetadas"
+
+        self.summary.insert("", "end", iid=str(result.index), tags=("error",) if result.error else (), values=(
+            result.index,
+            statement if len(statement) <= 120 else statement[:117] + "...",
+            f"{result.wall_time * 1000:.1f}",
+            f"{result.exec_time * 1000:.1f}",
+            f"{result.fetch_time * 1000:.1f}" if result.returns_rows else "-",
+            "" if result.rowcount is None else result.rowcount,
+            status,
+        ))
+        self._highlight_slowest()
+
+        if result.returns_rows:
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=f"Resultado {result.index}")
+            DataFrameTable(
+                master=tab, databse_name=self.databse_name, df=result.df, rows_per_page=15, column_width=100,
+                edit_enabled=False, delete_enabled=False, engine=self.engine, table_name=[],
+                log_message=self.log_message, on_data_change=None, db_type=self.db_type,
+                columns=self.build_columns(result.df), enum_values={}, virtual_scroll=True,
+            ).pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def _highlight_slowest(self) -> None:
+        """Destaca o comando mais demorado do script."""
+        finished = [r for r in self._results if r.error is None]
+        slowest = max(finished, key=lambda r: r.wall_time, default=None)
+        for r in finished:
+            self.summary.item(str(r.index), tags=("slowest",) if r is slowest and len(finished) > 1 else ())
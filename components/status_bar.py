@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import ttk
 from typing import Any
-from sqlalchemy.exc import OperationalError
+from utils.health_monitor import STATE_CHECKING, STATE_CONNECTED, STATE_DISCONNECTED, STATE_SLOW, HealthMonitor, HealthStatus
+from utils.job_scheduler import get_scheduler
+
+_STATE_COLORS = {STATE_CONNECTED: "green", STATE_SLOW: "#d97706", STATE_DISCONNECTED: "red", STATE_CHECKING: "gray"}
 
 class StatusBar:
     """Cria uma barra de status robusta e responsiva na parte inferior da janela."""
@@ -11,8 +14,9 @@ class StatusBar:
         self.log_message = log_message
         self.engine = engine
         
-        # Verifica a conexão inicial
-        self.connection_status_text = self.check_connection()
+        # O estado da conexão vem do monitor em segundo plano; nada bloqueia a interface
+        self.connection_status_text = STATE_CHECKING if engine else STATE_DISCONNECTED
+        self._last_state = None
 
         # Frame principal da barra de status
         self.status_frame = ttk.Frame(root)
@@ -30,34 +34,53 @@ class StatusBar:
         self.connection_status_label = ttk.Label(
             self.inner_frame, 
             text=f"Status: {self.connection_status_text}",
-            foreground="green" if self.connection_status_text == "Conectado" else "red",
+            foreground=_STATE_COLORS[self.connection_status_text],
             anchor="e"
         )
         self.connection_status_label.pack(side=tk.RIGHT, fill=tk.X, expand=True)
+
+        self.monitor = None
+        if engine:
+            self.monitor = HealthMonitor(engine, on_status=lambda status: get_scheduler().call_in_ui(self._show_health, status))
+            self.monitor.start()
+            # Encerra o monitor junto com a janela
+            self.status_frame.bind("<Destroy>", lambda e: self.monitor.stop(), add="+")
         
         self.log_message("Barra de status inicializada com sucesso.")
 
     def check_connection(self) -> str:
-        """Verifica se o banco de dados está conectado."""
-        if not self.engine:
-            return "Desconectado"
-        try:
-            with self.engine.connect() as conn:
-                return "Conectado"
-        except OperationalError:
-            return "Desconectado"
+        """Retorna o último estado da conexão medido pelo monitor (sem abrir conexão)."""
+        return self.connection_status_text
+
+    def _show_health(self, status: HealthStatus) -> None:
+        """Mostra estado e latência da última verificação; registra no log as mudanças de estado."""
+        if not self.connection_status_label.winfo_exists():
+            return
+        self.connection_status_text = status.state
+        if status.latency_ms is not None:
+            text = f"Status: {status.state} ({status.latency_ms:.0f} ms)"
+        elif status.state == STATE_DISCONNECTED:
+            text = f"Status: {status.state} (nova tentativa em {status.next_check:.0f}s)"
+        else:
+            text = f"Status: {status.state}"
+        self.connection_status_label.config(text=text, foreground=_STATE_COLORS[status.state])
+
+        if status.state != self._last_state:
+            if status.state == STATE_DISCONNECTED:
+                self.log_message(f"Conexão perdida: {status.error}. Pool reiniciado; nova tentativa em {status.next_check:.0f}s.", level="warning")
+            elif self._last_state == STATE_DISCONNECTED:
+                self.log_message("Conexão restabelecida.", level="info")
+            self._last_state = status.state
 
     def update_status(self, message: str):
         """Atualiza a mensagem de status e o estado da conexão."""
         connection_status = self.check_connection()
         
         self.status_label.config(text=message)
-        self.connection_status_label.config(
-            text=f"Status: {connection_status}",
-            foreground="green" if connection_status == "Conectado" else "red"
-        )
         self.log_message(f"Status atualizado: {message} - {connection_status}")
 
     def refresh_status(self):
         """Atualiza dinamicamente o status de conexão."""
+        if self.monitor:
+            self.monitor.check_now()
         self.update_status(self.status_label.cget("text"))
@@ -2,15 +2,32 @@ import tkinter as tk
 from tkinter import ttk
 import traceback
 import pandas as pd
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+from utils.columnar_buffer import as_buffer
 
 class TreeViewFrame(ttk.Frame):
     """Cria um Treeview para exibir um DataFrame do pandas com colunas responsivas."""
     
     def __init__(self, master: Any,databse_name, show_edit_modal: Any,log_message:Any, df: Optional[pd.DataFrame] = None,
-                 columns: Optional[dict[str, Any]] = None, column_width: int = 100, min_column_width: int = 50):
+                 columns: Optional[dict[str, Any]] = None, column_width: int = 100, min_column_width: int = 50,
+                 virtual: bool = False, on_view_change: Optional[Callable[[int, int, int], None]] = None,
+                 hidden_columns: Optional[list] = None, decorate_row: Optional[Callable[[int, list], tuple]] = None):
         super().__init__(master)
-        self.df = df if df is not None else pd.DataFrame()
+        # Dados em blocos colunares: as janelas de linhas são lidas sem materializar um DataFrame
+        self.data = as_buffer(df)
+        # Modo virtual: apenas a janela visível de linhas existe como itens do Treeview
+        self.virtual = virtual
+        self.on_view_change = on_view_change
+        # Colunas presentes nos dados mas não exibidas (ex: chave primária fora da seleção)
+        self.hidden_columns = set(hidden_columns or [])
+        # decorate_row(índice, valores) -> (valores, tags): sobrepõe alterações pendentes na exibição
+        self.decorate_row = decorate_row
+        # Edição de células no lugar (modo grade): get_cell_text(índice, coluna) e on_cell_edit(índice, coluna, texto)
+        self._cell_edit = None
+        self._cell_editor = None
+        self._offset = 0
+        self._visible_rows = 1
+        self._item_ids = []
         self.column_width = column_width
         self.min_column_width = min_column_width
         self.show_edit_modal = show_edit_modal
@@ -37,7 +54,8 @@ class TreeViewFrame(ttk.Frame):
         self.tree_frame.rowconfigure(0, weight=1)
         self.tree_frame.columnconfigure(0, weight=1)
 
-        self.tree_scroll_y = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree_yview)
+        yview_command = self._on_virtual_scroll if self.virtual else self.tree_yview
+        self.tree_scroll_y = ttk.Scrollbar(self.tree_frame, orient="vertical", command=yview_command)
         self.tree_scroll_y.grid(row=0, column=1, sticky="ns")
 
         self.tree_scroll_x = ttk.Scrollbar(self.tree_frame, orient="horizontal", command=self.tree_xview)
@@ -46,7 +64,7 @@ class TreeViewFrame(ttk.Frame):
             self.tree_frame,
             columns=list(self.columns),
             show='headings',
-            yscrollcommand=self.tree_scroll_y.set,
+            yscrollcommand=None if self.virtual else self.tree_scroll_y.set,
             xscrollcommand=self.tree_scroll_x.set,
             style="DataTable.Treeview"
         )
@@ -67,14 +85,21 @@ class TreeViewFrame(ttk.Frame):
         self.tree.bind("<ButtonRelease-1>", self._on_button_release)
         self.tree.bind("<B1-Motion>", self._on_motion)
         self.bind("<Configure>", self._on_configure)
+        if self.virtual:
+            self.tree.bind("<Configure>", self._on_tree_configure)
+            self.tree.bind("<MouseWheel>", self._on_virtual_mousewheel)
+            self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+            self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+            self.tree.bind("<Prior>", lambda e: self.scroll_rows(-self._visible_rows))
+            self.tree.bind("<Next>", lambda e: self.scroll_rows(self._visible_rows))
 
     def _on_configure(self, event):
         """Ajusta o tamanho das colunas proporcionalmente ao redimensionar o widget."""
-        if self.df.empty or event.width <= 1:
+        if self.data.empty or event.width <= 1:
             return
 
         available_width = event.width - 20
-        columns = self.tree["columns"]
+        columns = self._visible_columns()
         col_widths = [int(self.tree.column(col, "width")) for col in columns]
 
         if sum(col_widths) > 0:
@@ -91,14 +116,17 @@ class TreeViewFrame(ttk.Frame):
         region = self.tree.identify("region", event.x, event.y)
         if region == "cell":
             item_id = self.tree.identify_row(event.y)
+            if item_id and self._cell_edit is not None:
+                self._begin_cell_edit(item_id, self.tree.identify_column(event.x))
+                return
             if item_id:
                 try:
-                    index = self.tree.index(item_id)  # Obtém o índice no TreeView
-                    self.log_message(self, f"Duplo clique detectado. ID: {item_id}, Índice no TreeView: {index}")
+                    index = self._row_index(item_id)  # Obtém o índice da linha no DataFrame
+                    self.log_message(f"Duplo clique detectado. ID: {item_id}, Índice no TreeView: {index}")
                     self.show_edit_modal(index,self._fechar_modal)  # Passa o índice correto
                     # self.modal_aberto = True
                 except Exception as e:
-                    self.log_message(self, f"Erro ao identificar índice no TreeView: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
+                    self.log_message(f"Erro ao identificar índice no TreeView: {e} ({type(e).__name__})\n{traceback.format_exc()}", level="error")
 
     def _on_button_press(self, event):
         """Inicia o redimensionamento de colunas."""
@@ -115,7 +143,7 @@ class TreeViewFrame(ttk.Frame):
         if self.resizing_column:
             delta_x = event.x - self.resizing_x
             col_index = int(self.resizing_column.replace('#', '')) - 1
-            col_name = self.tree["columns"][col_index]
+            col_name = self._visible_columns()[col_index]
             new_width = max(self.min_column_width, int(self.tree.column(col_name, "width")) + delta_x)
             self.tree.column(col_name, width=new_width)
             self.resizing_x = event.x
@@ -123,53 +151,187 @@ class TreeViewFrame(ttk.Frame):
     def _setup_columns(self):
         """Configura as colunas do Treeview."""
 
-        if self.df is None or self.df.empty:
+        if self.data.empty:
             self.tree["columns"] = self.columns
+            self.tree["displaycolumns"] = self._visible_columns()
             self.tree["show"] = "headings"
             self.log_message("Aviso: DataFrame está vazio ou indefinido. Nenhuma coluna será configurada.")
             return
 
-        # Configura colunas com base no DataFrame
-        self.tree["columns"] = list(self.df.columns)
+        # Configura colunas com base nos dados
+        self.tree["columns"] = list(self.data.columns)
+        self.tree["displaycolumns"] = self._visible_columns()
         self.tree["show"] = "headings"
 
-        for col in self.df.columns:
+        sample = self.data.slice_columns(0, 20)
+        for col, values in zip(self.data.columns, sample):
             self.tree.heading(col, text=col, anchor=tk.CENTER)
-            self.tree.column(col, width=self._calculate_column_width(col), anchor=tk.CENTER, minwidth=self.min_column_width)
+            self.tree.column(col, width=self._calculate_column_width(col, values), anchor=tk.CENTER, minwidth=self.min_column_width)
 
-    def _calculate_column_width(self, column_name):
-        """Calcula a largura ideal de uma coluna."""
-        if self.df.empty:
+    def _visible_columns(self):
+        """Colunas do Treeview exibidas (todas, menos as ocultas)."""
+        return [col for col in self.tree["columns"] if col not in self.hidden_columns]
+
+    def _calculate_column_width(self, column_name, sample_values):
+        """Calcula a largura ideal de uma coluna a partir de uma amostra dos valores."""
+        if self.data.empty:
             return self.column_width
-        
-        sample = self.df.head(20)
-        max_data_length = sample[column_name].astype(str).str.len().max() * 8 if column_name in sample else 0
+
+        max_data_length = max((len(str(value)) for value in sample_values), default=0) * 8
         return max(len(str(column_name)) * 20, max_data_length, self.column_width)
 
-    def update_table(self, df: pd.DataFrame, current_page: int, rows_per_page: int):
-        """Atualiza a tabela com novos dados mantendo a paginação."""
-        self.df = df.copy() if df is not None else pd.DataFrame()
+    def update_table(self, df, current_page: int, rows_per_page: int):
+        """Atualiza a tabela com novos dados (DataFrame ou ColumnarBuffer) mantendo a paginação."""
+        self.data = as_buffer(df)
+
+        if list(self.tree["columns"]) != list(self.data.columns):
+            self._setup_columns()
+
+        if self.virtual:
+            self._render_window()
+            return
 
         for row in self.tree.get_children():
             self.tree.delete(row)
 
-        if list(self.tree["columns"]) != list(self.df.columns):
-            self._setup_columns()
-
         start_idx = current_page * rows_per_page
-        end_idx = min(start_idx + rows_per_page, len(self.df))
-        paged_df = self.df.iloc[start_idx:end_idx] if rows_per_page > 0 else self.df
+        end_idx = min(start_idx + rows_per_page, len(self.data)) if rows_per_page > 0 else len(self.data)
+
+        # Fatias por coluna: os valores das células são lidos diretamente, sem criar uma Series por linha
+        for index, values in enumerate(self.data.iter_rows(start_idx, end_idx), start=start_idx):
+            values, tags = self._decorate(index, values)
+            self.tree.insert("", "end", values=values, tags=tags)
+
+    def _row_index(self, item_id):
+        """Converte o item do Treeview no índice da linha no DataFrame."""
+        index = self.tree.index(item_id)
+        return self._offset + index if self.virtual else index
+
+    def _render_window(self):
+        """Preenche os itens visíveis com a janela atual, reaproveitando os ids dos itens."""
+        if self._cell_editor is not None:
+            # A janela vai mudar: confirma a célula em edição (FocusOut) antes de reposicionar os itens
+            self.tree.focus_set()
+        total = len(self.data)
+        self._offset = max(0, min(self._offset, total - self._visible_rows))
+        count = max(0, min(self._visible_rows, total - self._offset))
+
+        # Recicla os itens existentes; cria ou remove apenas a diferença
+        while len(self._item_ids) < count:
+            self._item_ids.append(self.tree.insert("", "end"))
+        while len(self._item_ids) > count:
+            self.tree.delete(self._item_ids.pop())
+
+        for index, (item_id, values) in enumerate(zip(self._item_ids, self.data.iter_rows(self._offset, self._offset + count)),
+                                                  start=self._offset):
+            values, tags = self._decorate(index, values)
+            self.tree.item(item_id, values=values, tags=tags)
+
+        if total:
+            self.tree_scroll_y.set(self._offset / total, (self._offset + count) / total)
+        else:
+            self.tree_scroll_y.set(0, 1)
+
+        if self.on_view_change:
+            self.on_view_change(self._offset, self._visible_rows, total)
+
+    def scroll_rows(self, delta):
+        """Desloca a janela virtual em `delta` linhas."""
+        if not self.virtual:
+            self.tree.yview_scroll(delta, "units")
+            return "break"
+        new_offset = max(0, min(self._offset + delta, len(self.data) - self._visible_rows))
+        if new_offset != self._offset:
+            self._offset = new_offset
+            self._render_window()
+        return "break"
+
+    def _on_virtual_scroll(self, action, value, unit=None):
+        """Trata os comandos do scrollbar vertical no modo virtual."""
+        if action == "moveto":
+            self._offset = int(float(value) * len(self.data))
+            self._render_window()
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self.scroll_rows(int(value) * step)
+
+    def _on_virtual_mousewheel(self, event):
+        """Rola a janela virtual com a roda do mouse."""
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_tree_configure(self, event):
+        """Recalcula quantas linhas cabem na área visível do Treeview."""
+        style = ttk.Style()
+        row_height = int(style.lookup("DataTable.Treeview", "rowheight") or 25)
+        visible = max(1, (event.height - row_height) // row_height)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self._render_window()
+
+    def _decorate(self, index, values):
+        if self.decorate_row is None:
+            return values, ()
+        return self.decorate_row(index, values)
+
+    def enable_cell_edit(self, get_cell_text: Callable[[int, str], str], on_cell_edit: Callable[[int, str, str], None]):
+        """Ativa a edição no lugar: o duplo clique abre um campo sobre a célula em vez do modal."""
+        self._cell_edit = (get_cell_text, on_cell_edit)
+
+    def disable_cell_edit(self):
+        self._cell_edit = None
+        if self._cell_editor is not None:
+            self._cell_editor.destroy()
+            self._cell_editor = None
+
+    def _begin_cell_edit(self, item_id, column_id):
+        """Abre um Entry sobre a célula; Enter ou perder o foco confirma, Esc cancela."""
+        bbox = self.tree.bbox(item_id, column_id)
+        if not bbox or not column_id.startswith("#"):
+            return
+        if self._cell_editor is not None:
+            self._cell_editor.destroy()
+        get_cell_text, on_cell_edit = self._cell_edit
+        col_name = self._visible_columns()[int(column_id[1:]) - 1]
+        row_index = self._row_index(item_id)
+
+        x, y, width, height = bbox
+        editor = ttk.Entry(self.tree)
+        editor.insert(0, get_cell_text(row_index, col_name))
+        editor.select_range(0, tk.END)
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self._cell_editor = editor
+
+        def _close(commit):
+            if self._cell_editor is not editor:
+                return
+            self._cell_editor = None
+            value = editor.get()
+            editor.destroy()
+            if commit:
+                on_cell_edit(row_index, col_name, value)
+
+        editor.bind("<Return>", lambda e: _close(True))
+        editor.bind("<KP_Enter>", lambda e: _close(True))
+        editor.bind("<FocusOut>", lambda e: _close(True))
+        editor.bind("<Escape>", lambda e: _close(False))
 
-        for _, row in paged_df.iterrows():
-            self.tree.insert("", "end", values=row.tolist())
+    def get_selected_indexes(self):
+        """Retorna os índices de todas as linhas selecionadas."""
+        return [self._row_index(item_id) for item_id in self.tree.selection()]
 
     def get_selected_item(self):
         """Retorna o índice do item selecionado."""
         selection = self.tree.selection()
-        return self.tree.index(selection[0]) if selection else None
+        return self._row_index(selection[0]) if selection else None
 
     def select_item(self, index):
         """Seleciona um item pelo índice."""
+        if self.virtual and not (self._offset <= index < self._offset + len(self._item_ids)):
+            self._offset = index
+            self._render_window()
+        if self.virtual:
+            index -= self._offset
         items = self.tree.get_children()
         if 0 <= index < len(items):
             item_id = items[index]
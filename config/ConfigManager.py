@@ -3,6 +3,7 @@ import threading
 from pathlib import Path
 import pandas as pd
 from typing import Dict, Any, Optional, List
+from utils.exporters import export_dataframe
 from utils.logger import logger
 
 
@@ -10,6 +11,17 @@ class ConfigManager:
     """Gerencia perfis de conexão salvos em um arquivo JSON."""
     
     _lock = threading.Lock()  # Lock para evitar condições de corrida
+
+    # Opções padrão do pool de conexões (podem ser sobrescritas por perfil na chave "pool")
+    DEFAULT_POOL_OPTIONS: Dict[str, Any] = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "pool_timeout": 30,
+    }
+    # Validade padrão (em segundos) dos metadados em cache do perfil (chave "metadata_ttl"; None = sem expiração)
+    DEFAULT_METADATA_TTL: Optional[float] = 24 * 60 * 60
     
     def __init__(self, config_path: str = "db_profiles.json",base_path="tabela_salvas") -> None:
         """
@@ -41,7 +53,6 @@ class ConfigManager:
 
     def _save_profiles(self) -> bool:
         """Salva os perfis no arquivo JSON de maneira segura."""
-        print(f"_save_profiles: ")
         try:
             self.config_file.write_text(
                 json.dumps(self.profiles, indent=2, ensure_ascii=False),
@@ -58,22 +69,18 @@ class ConfigManager:
         Valida se os dados são serializáveis antes de salvar.
         """
         for key, value in config.items():
-            print(key, value)
             try:
                 json.dumps(value)
             except TypeError as e:
-                print(f"Erro ao serializar a chave '{key}' com valor '{value}' (tipo: {type(value)})")
-                logger.error(f"Configuração inválida para o perfil '{name}': {e}")
+                # O valor não é registrado: pode ser a senha
+                logger.error(f"Configuração inválida para o perfil '{name}': chave '{key}' ({type(value).__name__}): {e}")
                 return False
         
 
         with self._lock:
-            print(f"Salvando perfil: {name}")
             logger.info(f"Salvando perfil: {name}")
             self.profiles[name] = config
-            print(f" self.profiles[name] = config")
             result = self._save_profiles()
-            print("result = self._save_profiles()")
         
         if result:
             logger.info(f"Perfil '{name}' salvo com sucesso.")
@@ -106,6 +113,39 @@ class ConfigManager:
             logger.warning(f"Perfil '{name}' não encontrado.")
         return profile
 
+    def get_pool_options(self, name: str) -> Dict[str, Any]:
+        """
+        Retorna as opções de pool do perfil, completadas com os valores padrão.
+        """
+        with self._lock:
+            profile = self.profiles.get(name) or {}
+            pool = dict(profile.get("pool") or {})
+        return {**self.DEFAULT_POOL_OPTIONS, **pool}
+
+    def get_metadata_ttl(self, name: str) -> Optional[float]:
+        """
+        Retorna a validade (em segundos) dos metadados em cache do perfil.
+        """
+        with self._lock:
+            profile = self.profiles.get(name) or {}
+        return profile.get("metadata_ttl", self.DEFAULT_METADATA_TTL)
+
+    def save_pool_options(self, name: str, options: Dict[str, Any]) -> bool:
+        """
+        Salva as opções de pool (pool_size, max_overflow, pool_recycle, pool_pre_ping, pool_timeout) de um perfil.
+        """
+        invalid = [key for key in options if key not in self.DEFAULT_POOL_OPTIONS]
+        if invalid:
+            logger.error(f"Opções de pool inválidas para o perfil '{name}': {invalid}")
+            return False
+
+        with self._lock:
+            if name not in self.profiles:
+                logger.warning(f"Perfil '{name}' não encontrado para salvar opções de pool.")
+                return False
+            self.profiles[name]["pool"] = {**self.profiles[name].get("pool", {}), **options}
+            return self._save_profiles()
+
     def get_profile_names(self) -> List[str]:
         """
         Retorna a lista de nomes dos perfis salvos.
@@ -149,7 +189,8 @@ class ConfigManager:
         """
         try:
             file_path = self.base_path / f"{table_name}.xlsx"
-            df.to_excel(file_path, index=False)
+            # Gravador em memória constante (xlsxwriter), em lotes
+            export_dataframe(df, str(file_path))
             logger.info(f"Tabela '{table_name}' salva com sucesso em '{file_path}'.")
             return True
         except Exception as e:
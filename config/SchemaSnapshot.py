@@ -0,0 +1,411 @@
+import re
+import threading
+import traceback
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.types import NullType
+from utils.logger import logger
+
+# Tempo máximo (em segundos) que um pedido aguarda o carregamento em andamento antes de consultar o servidor
+SCHEMA_WAIT_TIMEOUT = 30
+
+
+def _resolve_type(dialect, type_string: str):
+    """Converte o tipo textual do catálogo (ex: 'varchar(50)') no tipo SQLAlchemy do dialeto."""
+    type_string = (type_string or "").strip()
+    if hasattr(dialect, "_resolve_type_affinity"):
+        # SQLite: mesma regra de afinidade usada pela reflexão do SQLAlchemy (que recebe o tipo em maiúsculas)
+        return dialect._resolve_type_affinity(type_string.upper())
+
+    match = re.match(r"^\s*([\w ]+?)\s*(?:\((.*)\))?\s*(unsigned)?\s*(zerofill)?\s*$", type_string, re.IGNORECASE)
+    if not match:
+        return NullType()
+    base, raw_args, unsigned = match.group(1).lower(), match.group(2), match.group(3)
+    ischema_names = getattr(dialect, "ischema_names", {})
+    type_cls = ischema_names.get(base) or ischema_names.get(base.upper())
+    if type_cls is None:
+        return NullType()
+
+    if base in ("enum", "set"):
+        args = [v.replace("''", "'") for v in re.findall(r"'((?:[^']|'')*)'", raw_args or "")]
+    else:
+        args = [int(v) for v in re.findall(r"-?\d+", raw_args or "")] if raw_args and raw_args.lower() != "max" else []
+
+    attempts = []
+    if unsigned:
+        attempts.append((args, {"unsigned": True}))
+    attempts += [(args, {}), ([], {})]
+    for attempt_args, kwargs in attempts:
+        try:
+            return type_cls(*attempt_args, **kwargs)
+        except Exception:
+            continue
+    return NullType()
+
+
+class SchemaSnapshot:
+    """
+    Retrato do esquema do banco (tabelas, colunas, chaves primárias e estrangeiras) em memória.
+
+    Carrega tudo com poucas consultas ao catálogo de cada dialeto, em segundo plano, e atende
+    os pedidos por tabela sem novas idas ao servidor. Tabelas ausentes do retrato são buscadas
+    individualmente pelo inspector e passam a fazer parte dele.
+    """
+
+    _snapshots: "weakref.WeakKeyDictionary[Any, SchemaSnapshot]" = weakref.WeakKeyDictionary()
+    _snapshots_lock = threading.Lock()
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        # Sinaliza o fim do carregamento em andamento, com sucesso ou com erro
+        self._load_finished = threading.Event()
+        self._load_finished.set()
+        self._loading_thread: Optional[threading.Thread] = None
+        self.load_error: Optional[Exception] = None
+        self.table_names: List[str] = []
+        self.columns: Dict[str, List[Dict[str, Any]]] = {}
+        self.primary_keys: Dict[str, Dict[str, Any]] = {}
+        self.foreign_keys: Dict[str, List[Dict[str, Any]]] = {}
+        # Colunas que identificam uma linha (chave primária ou única NOT NULL), resolvidas por tabela
+        self.key_columns: Dict[str, List[str]] = {}
+
+    @classmethod
+    def for_engine(cls, engine) -> "SchemaSnapshot":
+        """Retorna o retrato do esquema associado ao engine (criando-o se necessário)."""
+        with cls._snapshots_lock:
+            snapshot = cls._snapshots.get(engine)
+            if snapshot is None:
+                snapshot = cls(engine)
+                cls._snapshots[engine] = snapshot
+            return snapshot
+
+    @classmethod
+    def discard(cls, engine) -> None:
+        """Descarta o retrato associado ao engine (ex: ao desconectar)."""
+        with cls._snapshots_lock:
+            cls._snapshots.pop(engine, None)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    @property
+    def is_loading(self) -> bool:
+        return not self._load_finished.is_set()
+
+    def wait(self, timeout: Optional[float] = SCHEMA_WAIT_TIMEOUT) -> bool:
+        """Aguarda o fim do carregamento em andamento (ou o timeout); retorna se o esquema está carregado."""
+        self._load_finished.wait(timeout)
+        return self.is_loaded
+
+    def load_async(self, on_done: Optional[Callable[[Optional[Exception]], None]] = None) -> threading.Thread:
+        """Carrega o esquema em uma thread de fundo; `on_done(erro)` é chamado ao terminar."""
+        with self._lock:
+            if self.is_loading:
+                return self._loading_thread
+
+            def _run():
+                error = None
+                try:
+                    self.load()
+                except Exception as e:
+                    error = e
+                    logger.error(f"Erro ao carregar o esquema: {e}\n{traceback.format_exc()}")
+                finally:
+                    self.load_error = error
+                    # Libera quem aguarda mesmo em caso de erro (eles passam a consultar o servidor)
+                    self._load_finished.set()
+                if on_done:
+                    on_done(error)
+
+            self.load_error = None
+            self._load_finished.clear()
+            self._loading_thread = threading.Thread(target=_run, daemon=True)
+            self._loading_thread.start()
+            return self._loading_thread
+
+    def load(self) -> None:
+        """Carrega todo o esquema com as consultas em lote do dialeto."""
+        dialect = self.engine.dialect.name
+        if dialect in ("mysql", "mariadb"):
+            snapshot = self._load_mysql()
+        elif dialect == "sqlite":
+            snapshot = self._load_sqlite()
+        elif dialect == "mssql":
+            snapshot = self._load_mssql()
+        else:
+            # PostgreSQL e Oracle: a reflexão "multi" do SQLAlchemy consulta pg_catalog / ALL_* em lote
+            snapshot = self._load_multi_reflection()
+
+        table_names, columns, primary_keys, foreign_keys = snapshot
+        with self._lock:
+            self.table_names = table_names
+            self.columns = columns
+            self.primary_keys = primary_keys
+            self.foreign_keys = foreign_keys
+        self._loaded.set()
+        logger.info(f"Esquema carregado: {len(table_names)} tabelas.")
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Remove uma tabela (ou todo o retrato) da memória, forçando nova leitura."""
+        with self._lock:
+            if table_name is None:
+                self.table_names, self.columns, self.primary_keys, self.foreign_keys = [], {}, {}, {}
+                self.key_columns = {}
+                self._loaded.clear()
+                return
+            self.columns.pop(table_name, None)
+            self.primary_keys.pop(table_name, None)
+            self.foreign_keys.pop(table_name, None)
+            self.key_columns.pop(table_name, None)
+
+    def refresh_table(self, table_name: str) -> bool:
+        """
+        Descarta a tabela do retrato e pergunta ao servidor se ela ainda existe; se foi removida,
+        ela sai também da lista de tabelas. Retorna se a tabela existe.
+        """
+        self.invalidate(table_name)
+        exists = inspect(self.engine).has_table(table_name)
+        if not exists:
+            with self._lock:
+                self.table_names = [name for name in self.table_names if name != table_name]
+        return exists
+
+    # ------------------------------------------------------------------ consultas por tabela
+
+    def get_table_names(self) -> List[str]:
+        """Retorna os nomes das tabelas, aguardando um carregamento em andamento."""
+        if self.is_loading and not self.wait():
+            reason = f"falhou: {self.load_error}" if self.load_error else "não terminou a tempo"
+            logger.warning(f"Carregamento do esquema {reason}; consultando as tabelas pelo inspector.")
+        if self.is_loaded:
+            with self._lock:
+                return list(self.table_names)
+        table_names = inspect(self.engine).get_table_names()
+        with self._lock:
+            self.table_names = list(table_names)
+        return list(table_names)
+
+    def has_table(self, table_name: str) -> bool:
+        """Verifica se a tabela existe, consultando o servidor apenas se ela não estiver no retrato."""
+        with self._lock:
+            if table_name in self.columns or (self.is_loaded and table_name in self.table_names):
+                return True
+        return inspect(self.engine).has_table(table_name)
+
+    def get_columns(self, table_name: str) -> List[Dict[str, Any]]:
+        """Retorna as colunas da tabela no formato de `Inspector.get_columns`."""
+        with self._lock:
+            if table_name in self.columns:
+                return self.columns[table_name]
+        columns = inspect(self.engine).get_columns(table_name)
+        with self._lock:
+            self.columns[table_name] = columns
+        return columns
+
+    def get_pk_constraint(self, table_name: str) -> Dict[str, Any]:
+        """Retorna a chave primária da tabela no formato de `Inspector.get_pk_constraint`."""
+        with self._lock:
+            if table_name in self.primary_keys:
+                return self.primary_keys[table_name]
+            if self.is_loaded and table_name in self.columns:
+                return {"constrained_columns": [], "name": None}
+        pk_constraint = inspect(self.engine).get_pk_constraint(table_name)
+        with self._lock:
+            self.primary_keys[table_name] = pk_constraint
+        return pk_constraint
+
+    def get_foreign_keys(self, table_name: str) -> List[Dict[str, Any]]:
+        """Retorna as chaves estrangeiras da tabela no formato de `Inspector.get_foreign_keys`."""
+        with self._lock:
+            if table_name in self.foreign_keys:
+                return self.foreign_keys[table_name]
+            if self.is_loaded and table_name in self.columns:
+                return []
+        foreign_keys = inspect(self.engine).get_foreign_keys(table_name)
+        with self._lock:
+            self.foreign_keys[table_name] = foreign_keys
+        return foreign_keys
+
+    def get_key_columns(self, table_name: str) -> List[str]:
+        """
+        Retorna as colunas que identificam uma linha da tabela, resolvidas uma vez e guardadas.
+
+        Usa a chave primária; sem ela, a primeira restrição (ou índice) única cujas colunas sejam
+        NOT NULL. Retorna lista vazia se nenhuma chave estável existir.
+        """
+        with self._lock:
+            if table_name in self.key_columns:
+                return list(self.key_columns[table_name])
+        key_columns = list(self.get_pk_constraint(table_name).get("constrained_columns") or [])
+        if not key_columns:
+            inspector = inspect(self.engine)
+            not_null = {col["name"] for col in self.get_columns(table_name) if not col.get("nullable", True)}
+            candidates = [uc.get("column_names") or [] for uc in inspector.get_unique_constraints(table_name)]
+            candidates += [idx.get("column_names") or [] for idx in inspector.get_indexes(table_name) if idx.get("unique")]
+            key_columns = next((list(cols) for cols in candidates if cols and all(c in not_null for c in cols)), [])
+        with self._lock:
+            self.key_columns[table_name] = key_columns
+        return list(key_columns)
+
+    # ------------------------------------------------------------------ carregadores por dialeto
+
+    def _load_multi_reflection(self):
+        inspector = inspect(self.engine)
+        table_names = inspector.get_table_names()
+        columns = {table: cols for (_, table), cols in inspector.get_multi_columns().items()}
+        primary_keys = {table: pk for (_, table), pk in inspector.get_multi_pk_constraint().items()}
+        foreign_keys = {table: fks for (_, table), fks in inspector.get_multi_foreign_keys().items()}
+        return table_names, columns, primary_keys, foreign_keys
+
+    def _load_mysql(self):
+        dialect = self.engine.dialect
+        columns: Dict[str, list] = {}
+        primary_keys: Dict[str, dict] = {}
+        foreign_keys: Dict[str, list] = {}
+        with self.engine.connect() as conn:
+            table_names = [row[0] for row in conn.execute(text("""
+                SELECT TABLE_NAME FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+                ORDER BY TABLE_NAME
+            """))]
+            for table, name, col_type, is_nullable, default, extra, comment in conn.execute(text("""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, EXTRA, COLUMN_COMMENT
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)):
+                columns.setdefault(table, []).append({
+                    "name": name,
+                    "type": _resolve_type(dialect, col_type),
+                    "nullable": is_nullable == "YES",
+                    "default": default,
+                    "autoincrement": "auto_increment" in (extra or "").lower(),
+                    "comment": comment or None,
+                })
+            for table, constraint, column, ref_table, ref_column in conn.execute(text("""
+                SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+            """)):
+                if constraint == "PRIMARY":
+                    primary_keys.setdefault(table, {"constrained_columns": [], "name": None})["constrained_columns"].append(column)
+                elif ref_table:
+                    self._append_fk(foreign_keys, table, constraint, column, ref_table, ref_column)
+        return table_names, columns, primary_keys, foreign_keys
+
+    def _load_sqlite(self):
+        dialect = self.engine.dialect
+        columns: Dict[str, list] = {}
+        pk_positions: Dict[str, list] = {}
+        foreign_keys: Dict[str, list] = {}
+        with self.engine.connect() as conn:
+            table_names = [row[0] for row in conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ))]
+            for table, name, col_type, notnull, default, pk in conn.execute(text("""
+                SELECT m.name, p.name, p.type, p."notnull", p.dflt_value, p.pk
+                FROM sqlite_master m JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, p.cid
+            """)):
+                columns.setdefault(table, []).append({
+                    "name": name,
+                    "type": _resolve_type(dialect, col_type),
+                    "nullable": not notnull,
+                    "default": default,
+                    "primary_key": pk,
+                })
+                if pk:
+                    pk_positions.setdefault(table, []).append((pk, name))
+            for table, fk_id, ref_table, column, ref_column in conn.execute(text("""
+                SELECT m.name, f.id, f."table", f."from", f."to"
+                FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, f.id, f.seq
+            """)):
+                self._append_fk(foreign_keys, table, f"fk_{fk_id}", column, ref_table, ref_column)
+        primary_keys = {
+            table: {"constrained_columns": [name for _, name in sorted(positions)], "name": None}
+            for table, positions in pk_positions.items()
+        }
+        return table_names, columns, primary_keys, foreign_keys
+
+    def _load_mssql(self):
+        dialect = self.engine.dialect
+        columns: Dict[str, list] = {}
+        primary_keys: Dict[str, dict] = {}
+        foreign_keys: Dict[str, list] = {}
+        with self.engine.connect() as conn:
+            table_names = [row[0] for row in conn.execute(text(
+                "SELECT name FROM sys.tables WHERE schema_id = SCHEMA_ID() ORDER BY name"
+            ))]
+            for table, name, type_name, max_length, precision, scale, is_nullable, default, is_identity in conn.execute(text("""
+                SELECT t.name, c.name, ty.name, c.max_length, c.precision, c.scale, c.is_nullable, dc.definition, c.is_identity
+                FROM sys.tables t
+                JOIN sys.columns c ON c.object_id = t.object_id
+                JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+                LEFT JOIN sys.default_constraints dc ON dc.object_id = c.default_object_id
+                WHERE t.schema_id = SCHEMA_ID()
+                ORDER BY t.name, c.column_id
+            """)):
+                if type_name in ("varchar", "char", "varbinary", "binary", "nvarchar", "nchar"):
+                    length = "max" if max_length == -1 else (max_length // 2 if type_name.startswith("n") else max_length)
+                    type_string = f"{type_name}({length})"
+                elif type_name in ("decimal", "numeric"):
+                    type_string = f"{type_name}({precision},{scale})"
+                else:
+                    type_string = type_name
+                columns.setdefault(table, []).append({
+                    "name": name,
+                    "type": _resolve_type(dialect, type_string),
+                    "nullable": bool(is_nullable),
+                    "default": default,
+                    "autoincrement": bool(is_identity),
+                })
+            for table, constraint, column in conn.execute(text("""
+                SELECT t.name, kc.name, c.name
+                FROM sys.key_constraints kc
+                JOIN sys.tables t ON t.object_id = kc.parent_object_id
+                JOIN sys.index_columns ic ON ic.object_id = kc.parent_object_id AND ic.index_id = kc.unique_index_id
+                JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+                WHERE kc.type = 'PK' AND t.schema_id = SCHEMA_ID()
+                ORDER BY t.name, ic.key_ordinal
+            """)):
+                entry = primary_keys.setdefault(table, {"constrained_columns": [], "name": constraint})
+                entry["constrained_columns"].append(column)
+            for table, constraint, column, ref_table, ref_column in conn.execute(text("""
+                SELECT tp.name, fk.name, cp.name, tr.name, cr.name
+                FROM sys.foreign_keys fk
+                JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+                JOIN sys.tables tp ON tp.object_id = fk.parent_object_id
+                JOIN sys.columns cp ON cp.object_id = fkc.parent_object_id AND cp.column_id = fkc.parent_column_id
+                JOIN sys.tables tr ON tr.object_id = fk.referenced_object_id
+                JOIN sys.columns cr ON cr.object_id = fkc.referenced_object_id AND cr.column_id = fkc.referenced_column_id
+                WHERE tp.schema_id = SCHEMA_ID()
+                ORDER BY tp.name, fk.name, fkc.constraint_column_id
+            """)):
+                self._append_fk(foreign_keys, table, constraint, column, ref_table, ref_column)
+        return table_names, columns, primary_keys, foreign_keys
+
+    @staticmethod
+    def _append_fk(foreign_keys, table, constraint, column, ref_table, ref_column) -> None:
+        """Agrupa as colunas de uma chave estrangeira no formato de `Inspector.get_foreign_keys`."""
+        table_fks = foreign_keys.setdefault(table, [])
+        for fk in table_fks:
+            if fk["name"] == constraint:
+                fk["constrained_columns"].append(column)
+                fk["referred_columns"].append(ref_column)
+                return
+        table_fks.append({
+            "name": constraint,
+            "constrained_columns": [column],
+            "referred_schema": None,
+            "referred_table": ref_table,
+            "referred_columns": [ref_column],
+            "options": {},
+        })
@@ -1,66 +1,269 @@
+import copy
 import os
 import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from utils.logger import logger
 
-def save_columns_to_file(columns_data, ficheiro_name="tables_columns_data.pkl", log_message=None):
-    """Salvar as colunas no arquivo usando Pickle de forma prática e eficiente."""
+# Arquivo SQLite com o catálogo de metadados (colunas, enums, campos de sistema)
+CATALOG_FILE = "metadata_catalog.db"
+# Versão do esquema do catálogo (PRAGMA user_version)
+CATALOG_SCHEMA_VERSION = 1
+# Número de entradas mantidas no cache LRU em memória
+CATALOG_LRU_SIZE = 512
+# Arquivos Pickle antigos importados na primeira abertura do catálogo
+LEGACY_PICKLE_FILES = ("tables_columns_data.pkl", "tables_columns_enum.pkl", "tables_columns_system_field.pkl")
+
+
+def namespace_from_file(ficheiro_name: str) -> str:
+    """Converte o nome do arquivo antigo (ex: 'tables_columns_enum.pkl') no namespace do catálogo."""
+    return os.path.splitext(os.path.basename(ficheiro_name))[0]
+
+
+class MetadataCatalog:
+    """
+    Catálogo de metadados persistido em SQLite, indexado por (namespace, chave).
+
+    Cada leitura/escrita acessa apenas a chave pedida, com um cache LRU em memória à frente,
+    versionamento de esquema e expiração (TTL) / invalidação por perfil.
+    """
+
+    _instances: Dict[str, "MetadataCatalog"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str = CATALOG_FILE, lru_size: int = CATALOG_LRU_SIZE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lru_size = lru_size
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._ttl = dict(self._conn.execute("SELECT profile, ttl FROM profile_ttl").fetchall())
+
+    @classmethod
+    def instance(cls, path: str = CATALOG_FILE) -> "MetadataCatalog":
+        """Retorna o catálogo compartilhado do arquivo `path`."""
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def _migrate(self) -> None:
+        """Cria ou atualiza o esquema do catálogo conforme a versão gravada no arquivo."""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == CATALOG_SCHEMA_VERSION:
+                return
+            # O catálogo é apenas cache: versões desconhecidas são recriadas
+            self._conn.execute("DROP TABLE IF EXISTS metadata")
+            self._conn.execute("DROP TABLE IF EXISTS profile_ttl")
+            self._conn.execute("""
+                CREATE TABLE metadata (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    profile TEXT,
+                    value BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self._conn.execute("CREATE INDEX idx_metadata_profile ON metadata (profile)")
+            self._conn.execute("CREATE TABLE profile_ttl (profile TEXT PRIMARY KEY, ttl REAL NOT NULL)")
+            self._import_legacy_pickles()
+            self._conn.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+
+    def _import_legacy_pickles(self) -> None:
+        """
+        Importa os caches Pickle antigos para o catálogo (executado uma única vez).
+
+        As chaves antigas não separam o perfil da tabela: as entradas ficam sem perfil até que o
+        perfil se conecte (`adopt_legacy_entries`) e passam então a seguir o TTL e a invalidação dele.
+        """
+        for ficheiro_name in LEGACY_PICKLE_FILES:
+            if not os.path.exists(ficheiro_name):
+                continue
+            try:
+                with open(ficheiro_name, "rb") as f:
+                    data = pickle.load(f)
+                self.set_many(namespace_from_file(ficheiro_name), data)
+            except Exception:
+                logger.exception(f"Falha ao importar o cache antigo '{ficheiro_name}' para o catálogo de metadados.")
+
+    def _is_expired(self, profile: Optional[str], updated_at: float) -> bool:
+        ttl = self._ttl.get(profile) if profile is not None else None
+        return ttl is not None and time.time() - updated_at > ttl
+
+    def _remember(self, lru_key: tuple, entry: tuple) -> None:
+        self._lru[lru_key] = entry
+        self._lru.move_to_end(lru_key)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Retorna o valor da chave, ou None se não existir ou tiver expirado."""
+        lru_key = (namespace, key)
+        with self._lock:
+            entry = self._lru.get(lru_key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT value, profile, updated_at FROM metadata WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (pickle.loads(row[0]), row[1], row[2])
+
+            value, profile, updated_at = entry
+            if self._is_expired(profile, updated_at):
+                self.invalidate(namespace=namespace, key=key)
+                return None
+            self._remember(lru_key, entry)
+        # Cópia profunda: quem alterar os dicionários das colunas não altera a entrada do cache
+        return copy.deepcopy(value)
+
+    def set(self, namespace: str, key: str, value: Any, profile: Optional[str] = None) -> None:
+        """Grava (ou substitui) o valor de uma única chave."""
+        self.set_many(namespace, {key: value}, profile)
+
+    def set_many(self, namespace: str, values: Dict[str, Any], profile: Optional[str] = None) -> None:
+        """Grava várias chaves em uma única transação."""
+        now = time.time()
+        rows = [(namespace, key, profile, pickle.dumps(value), now) for key, value in values.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (namespace, key, profile, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key, value in values.items():
+                self._remember((namespace, key), (value, profile, now))
+
+    def load_namespace(self, namespace: str) -> Dict[str, Any]:
+        """Retorna todas as entradas válidas de um namespace."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, profile, updated_at FROM metadata WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        return {key: pickle.loads(value) for key, value, profile, updated_at in rows
+                if not self._is_expired(profile, updated_at)}
+
+    def invalidate(self, profile: Optional[str] = None, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Remove entradas por perfil, namespace e/ou chave. Sem argumentos, limpa todo o catálogo."""
+        conditions, params = [], []
+        for column, value in (("profile", profile), ("namespace", namespace), ("key", key)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM metadata{where}", params).rowcount
+            for lru_key, (_, entry_profile, _) in list(self._lru.items()):
+                if ((profile is None or entry_profile == profile)
+                        and (namespace is None or lru_key[0] == namespace)
+                        and (key is None or lru_key[1] == key)):
+                    del self._lru[lru_key]
+        return removed
+
+    def adopt_legacy_entries(self, profile: str) -> int:
+        """
+        Associa ao perfil as entradas importadas sem perfil cuja chave começa pelo prefixo dele
+        (as chaves antigas são perfil + tabela). Retorna quantas entradas foram associadas.
+        """
+        if not profile:
+            return 0
+        with self._lock:
+            adopted = self._conn.execute(
+                "UPDATE metadata SET profile = ? WHERE profile IS NULL AND substr(key, 1, length(?)) = ?",
+                (profile, profile, profile)
+            ).rowcount
+            if adopted:
+                for lru_key, (value, entry_profile, updated_at) in list(self._lru.items()):
+                    if entry_profile is None and lru_key[1].startswith(profile):
+                        self._lru[lru_key] = (value, profile, updated_at)
+        return adopted
+
+    def set_ttl(self, profile: str, seconds: Optional[float]) -> None:
+        """Define o tempo de vida (em segundos) das entradas do perfil; None remove a expiração."""
+        with self._lock:
+            if seconds is None:
+                self._conn.execute("DELETE FROM profile_ttl WHERE profile = ?", (profile,))
+                self._ttl.pop(profile, None)
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO profile_ttl (profile, ttl) VALUES (?, ?)", (profile, float(seconds)))
+                self._ttl[profile] = float(seconds)
+
+
+def metadata_profile(db_type, database_name):
+    """Perfil das entradas do catálogo: tipo do banco em minúsculas + nome do banco."""
+    return f"{str(db_type).lower()}{database_name or ''}"
+
+
+def set_metadata_ttl(profile, seconds, log_message=None):
+    """Define a expiração (em segundos) das entradas do perfil; None desativa a expiração."""
     try:
-        # Verificar se o arquivo Pickle já existe
-        if os.path.exists(ficheiro_name):
-            # Carregar os dados existentes
-            with open(ficheiro_name, "rb") as f:
-                existing_data = pickle.load(f)
-        else:
-            # Se o arquivo não existir, inicializamos um novo dicionário
-            existing_data = {}
-        # Atualizar ou adicionar as tabelas no dicionário
-        existing_data.update(columns_data)  # Substitui ou adiciona as tabelas diretamente
-        # Salvar os dados de volta no arquivo Pickle
-        with open(ficheiro_name, "wb") as f:
-            pickle.dump(existing_data, f)
+        catalog = MetadataCatalog.instance()
+        # Entradas dos caches Pickle antigos com a chave deste perfil passam a seguir o TTL dele
+        catalog.adopt_legacy_entries(profile)
+        catalog.set_ttl(profile, seconds)
+        return True
+    except Exception as e:
+        if log_message:
+            log_message(f"Erro ao definir a expiração do catálogo de metadados: {e}", level="error")
+    return False
+
+
+def save_columns_to_file(columns_data, ficheiro_name="tables_columns_data.pkl", log_message=None, profile=None):
+    """Salvar as colunas no catálogo de metadados, gravando apenas as chaves recebidas."""
+    try:
+        MetadataCatalog.instance().set_many(namespace_from_file(ficheiro_name), columns_data, profile)
         return True
 
     except Exception as e:
         if log_message:
-            log_message(f"Erro ao salvar colunas no arquivo: {e}", level="error")
+            log_message(f"Erro ao salvar colunas no catálogo: {e}", level="error")
     return False
 
 def load_columns_from_file(ficheiro_name="tables_columns_data.pkl", log_message=None):
-    """Carregar as colunas de um arquivo Pickle."""
-    if os.path.exists(ficheiro_name):
-        try:
-            with open(ficheiro_name, "rb") as f:
-                return pickle.load(f)
-        except Exception as e:
-            if log_message:
-                log_message(f"Erro ao carregar colunas do arquivo: {e}", level="error")
-    else:
+    """Carregar todas as entradas de um namespace do catálogo de metadados."""
+    try:
+        return MetadataCatalog.instance().load_namespace(namespace_from_file(ficheiro_name))
+    except Exception as e:
         if log_message:
-            log_message(f"Arquivo {ficheiro_name} não encontrado.", level="warning")
+            log_message(f"Erro ao carregar colunas do catálogo: {e}", level="error")
     return None
 
 
 def get_columns_by_table(table_name, ficheiro_name="tables_columns_data.pkl", log_message=None):
-    """Retornar as colunas de uma tabela específica do arquivo Pickle."""
-    if not os.path.exists(ficheiro_name):
+    """Retornar as colunas de uma tabela específica do catálogo (leitura por chave, com cache LRU)."""
+    try:
+        data = MetadataCatalog.instance().get(namespace_from_file(ficheiro_name), table_name)
+        if data is None and log_message:
+            log_message(f"Tabela {table_name} não encontrada no catálogo.", level="warning")
+        return data
+    except Exception as e:
         if log_message:
-            log_message(f"Arquivo {ficheiro_name} não encontrado.", level="warning")
-        return None
+            log_message(f"Erro ao ler o catálogo de metadados: {e}", level="error")
+    return None
+
 
+def invalidate_metadata(profile=None, ficheiro_name=None, table_name=None, log_message=None):
+    """Invalida entradas do catálogo por perfil, arquivo (namespace) e/ou tabela."""
     try:
-        with open(ficheiro_name, "rb") as f:
-            data = pickle.load(f)  # Carrega todo o dicionário de tabelas
-            # print(f"Tabelas disponíveis: {data.keys()}")
-            # print(f"tabela a pesquizar: {table_name}")
-            if table_name in data:
-                return data[table_name]  # Retorna as colunas da tabela encontrada
-            else:
-                if log_message:
-                    log_message(f"Tabela {table_name} não encontrada no arquivo.", level="warning")
-                return None  # Retorna None se a tabela não existir
+        namespace = namespace_from_file(ficheiro_name) if ficheiro_name else None
+        return MetadataCatalog.instance().invalidate(profile=profile, namespace=namespace, key=table_name)
     except Exception as e:
         if log_message:
-            log_message(f"Erro ao ler o arquivo Pickle: {e}", level="error")
-    return None
+            log_message(f"Erro ao invalidar o catálogo de metadados: {e}", level="error")
+    return 0
 
 # Exemplo de uso:
 
@@ -76,7 +279,7 @@ if __name__ == "__main__":
     ]
     }
 
-        # Salvar os dados usando Pickle
+        # Salvar os dados no catálogo
     save_columns_to_file(jsonm, "tables_columns_data.pkl", log_message=lambda m, level: print(f"{level}: {m}"))
 
     # Buscar as colunas da tabela "tabela1"
@@ -85,4 +288,4 @@ if __name__ == "__main__":
     if columns:
         print(f"Colunas da tabela: {columns}")
     else:
-        print("Tabela não encontrada.")
\ No newline at end of file
+        print("Tabela não encontrada.")
@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from config.SchemaSnapshot import SchemaSnapshot  # noqa: E402
+from utils import bulk_import  # noqa: E402
+from utils.bulk_import import auto_map_columns, import_frame, missing_required_columns  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE pessoas (id INTEGER PRIMARY KEY, nome VARCHAR(10) NOT NULL, idade INTEGER, "
+            "nascimento DATE, ativo BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO pessoas (id, nome) VALUES (7, 'existente')"))
+    return engine
+
+
+def _columns(engine):
+    return SchemaSnapshot(engine).get_columns("pessoas")
+
+
+def _import_file_frame():
+    # Texto como lido do CSV (tipo string no pandas 3), com espaços e células em branco
+    return pd.DataFrame({
+        "ID": ["1", "2", "3", "4", "5", "6", "7", "8"],
+        "Nome": [" Ana ", "Bruno", "   ", "Carla", "um nome longo demais", "Davi", "Eva", "Fábio"],
+        "Idade": ["30", "x", "22", "41", "19", "2.5", "50", None],
+        "Nascimento": ["1994-02-01", "1990-01-01", "2002-03-03", "05/06/1983", "2005-01-01", "2000-01-01",
+                       "1974-01-01", "1999-12-31"],
+        "Ativo": ["sim", "não", "1", "talvez", "0", "true", "false", "no"],
+    })
+
+
+def test_good_rows_are_loaded_and_bad_rows_reported(engine):
+    df = _import_file_frame()
+    columns = _columns(engine)
+    mapping = auto_map_columns(df.columns, [col["name"] for col in columns])
+    assert mapping == {"ID": "id", "Nome": "nome", "Idade": "idade", "Nascimento": "nascimento", "Ativo": "ativo"}
+    assert missing_required_columns(mapping, columns) == []
+
+    result = import_frame(engine, "pessoas", df, mapping, columns, chunk_size=3)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, nome, idade, nascimento, ativo FROM pessoas WHERE id <> 7 ORDER BY id")).fetchall()
+    assert [tuple(row) for row in rows] == [
+        (1, "Ana", 30, "1994-02-01", 1),
+        (8, "Fábio", None, "1999-12-31", 0),
+    ]
+    errors = result.errors
+    assert sorted(zip(errors["linha"], errors["coluna"])) == [
+        (2, "idade"), (3, "nome"), (4, "ativo"), (5, "nome"), (6, "idade"), (7, ""),
+    ]
+    # A linha 7 passa na conversão e é recusada pelo servidor (chave duplicada), isolada ao dividir o lote
+    assert "UNIQUE" in errors.loc[errors["linha"] == 7, "erro"].iloc[0]
+    assert (result.imported, result.rejected, result.total) == (2, 6, 8)
+    assert not result.cancelled
+
+
+def test_non_data_errors_are_raised(engine):
+    columns = _columns(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE pessoas"))
+    df = pd.DataFrame({"id": ["1"], "nome": ["Ana"]})
+    with pytest.raises(OperationalError):
+        import_frame(engine, "pessoas", df, {"id": "id", "nome": "nome"}, columns)
+
+
+def test_value_errors_from_the_loader_are_not_rows_rejected(engine, monkeypatch):
+    def _broken(frame):
+        raise ValueError("falha interna")
+
+    monkeypatch.setattr(bulk_import, "_frame_rows", _broken)
+    df = pd.DataFrame({"id": ["1", "2"], "nome": ["Ana", "Bia"]})
+    with pytest.raises(ValueError, match="falha interna"):
+        import_frame(engine, "pessoas", df, {"id": "id", "nome": "nome"}, _columns(engine))
+
+
+def test_stop_event_cancels_before_next_chunk(engine):
+    stop_event = threading.Event()
+    df = pd.DataFrame({"id": [str(i) for i in range(10, 20)], "nome": ["n"] * 10})
+
+    def _progress(done, total):
+        stop_event.set()
+
+    result = import_frame(engine, "pessoas", df, {"id": "id", "nome": "nome"}, _columns(engine),
+                          chunk_size=4, on_progress=_progress, stop_event=stop_event)
+    assert result.cancelled
+    assert result.imported == 4
+
+
+def test_date_columns_accept_python_dates(engine):
+    df = pd.DataFrame({"id": [1], "nome": ["Ana"], "nascimento": [date(2000, 1, 2)]})
+    result = import_frame(engine, "pessoas", df, {"id": "id", "nome": "nome", "nascimento": "nascimento"}, _columns(engine))
+    assert result.imported == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT nascimento FROM pessoas WHERE id = 1")).scalar() == "2000-01-02"
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from utils.change_set import ChangeSet  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE itens (id INTEGER PRIMARY KEY, nome TEXT, preco REAL)"))
+        conn.execute(text("INSERT INTO itens VALUES (:id, :nome, :preco)"),
+                     [{"id": 1, "nome": "caneta", "preco": 1.5},
+                      {"id": 2, "nome": "lápis", "preco": 0.75},
+                      {"id": 3, "nome": "borracha", "preco": 0.5}])
+    return engine
+
+
+def _loaded(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(text("SELECT * FROM itens ORDER BY id"), conn)
+
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text("SELECT id, nome, preco FROM itens ORDER BY id"))]
+
+
+def test_update_delete_and_insert_in_one_flush(engine):
+    df = _loaded(engine)
+    change_set = ChangeSet("itens", ["id"], "sqlite")
+    change_set.stage_update(0, df.iloc[0].to_dict(), "preco", 2.0)
+    change_set.stage_delete(1, df.iloc[1].to_dict())
+    change_set.stage_insert(3, {"id": 10, "nome": "régua", "preco": 3.0})
+    result = change_set.flush(engine)
+    assert (result.updated, result.deleted, result.inserted, result.conflicts) == (1, 1, 1, [])
+    assert _rows(engine) == [(1, "caneta", 2.0), (3, "borracha", 0.5), (10, "régua", 3.0)]
+
+
+def test_reverting_a_value_drops_the_change(engine):
+    row = _loaded(engine).iloc[0].to_dict()
+    change_set = ChangeSet("itens", ["id"], "sqlite")
+    change_set.stage_update(0, row, "nome", "outro")
+    change_set.stage_update(0, row, "nome", "caneta")
+    assert change_set.is_empty
+
+
+def test_conflicts_block_the_write_until_forced(engine):
+    df = _loaded(engine)
+    change_set = ChangeSet("itens", ["id"], "sqlite")
+    change_set.stage_update(0, df.iloc[0].to_dict(), "preco", 9.0)
+    change_set.stage_delete(1, df.iloc[1].to_dict())
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE itens SET preco = 1.6 WHERE id = 1"))
+        conn.execute(text("DELETE FROM itens WHERE id = 2"))
+
+    result = change_set.flush(engine)
+    assert [(conflict.row_index, "não existe" in conflict.message) for conflict in result.conflicts] == [(0, False), (1, True)]
+    assert "'preco' foi alterado" in result.conflicts[0].message
+    assert _rows(engine)[0] == (1, "caneta", 1.6)
+
+    result = change_set.flush(engine, force=True)
+    assert result.written
+    assert _rows(engine)[0] == (1, "caneta", 9.0)
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_generated_keys_are_read_back_into_the_grid(engine, returning):
+    engine.dialect.insert_returning = returning
+    df = _loaded(engine)
+    df.loc[len(df)] = [None, None, None]
+    change_set = ChangeSet("itens", ["id"], "sqlite")
+    change_set.stage_insert(3, {"nome": "cola", "preco": 2.25})
+    result = change_set.flush(engine)
+    assert (result.inserted, result.unknown_keys) == (1, [])
+    df = change_set.apply_to(df)
+    assert df.iloc[3].tolist() == [4, "cola", 2.25]
+
+    # A linha nova pode ser editada em seguida pela chave lida
+    change_set = ChangeSet("itens", ["id"], "sqlite")
+    change_set.stage_update(3, df.iloc[3].to_dict(), "preco", 2.5)
+    assert change_set.flush(engine).updated == 1
+    assert _rows(engine)[-1] == (4, "cola", 2.5)
+
+
+def test_unknown_generated_key_drops_the_row(engine):
+    engine.dialect.insert_returning = False
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE pares (a INTEGER, b INTEGER, v TEXT, PRIMARY KEY (a, b))"))
+    df = pd.DataFrame({"a": [None, 1], "b": [None, 2], "v": [None, "x"]})
+    change_set = ChangeSet("pares", ["a", "b"], "sqlite")
+    change_set.stage_insert(0, {"a": 5, "v": "y"})
+    change_set.stage_insert(1, {"a": 1, "b": 2, "v": "x"})
+    result = change_set.flush(engine)
+    assert (result.inserted, result.unknown_keys) == (2, [0])
+    assert change_set.apply_to(df, drop_rows=result.unknown_keys)["v"].tolist() == ["x"]
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from utils.columnar_buffer import ColumnarBuffer, as_buffer  # noqa: E402
+
+
+def _buffer():
+    buffer = ColumnarBuffer(["id", "nome"])
+    buffer.append_rows([(1, "a"), (2, "b"), (3, "c")])
+    buffer.append_rows([(4, "d"), (5, "e")])
+    buffer.append_rows([])
+    buffer.append_rows([(6, "f")])
+    return buffer
+
+
+def test_length_and_rows_across_chunks():
+    buffer = _buffer()
+    assert len(buffer) == 6
+    assert buffer.row(0) == {"id": 1, "nome": "a"}
+    assert buffer.row(3) == {"id": 4, "nome": "d"}
+    assert buffer.row(5) == {"id": 6, "nome": "f"}
+    with pytest.raises(IndexError):
+        buffer.row(6)
+
+
+def test_slices_inside_one_chunk_are_views():
+    buffer = _buffer()
+    ids, _ = buffer.slice_columns(3, 5)
+    assert ids.tolist() == [4, 5]
+    second_chunk = list(buffer.iter_chunks())[1]
+    assert np.shares_memory(ids, second_chunk[0])
+
+
+def test_slices_across_chunks_and_out_of_range():
+    buffer = _buffer()
+    assert [row for row in buffer.iter_rows(2, 10)] == [[3, "c"], [4, "d"], [5, "e"], [6, "f"]]
+    assert [array.tolist() for array in buffer.slice_columns(7, 9)] == [[], []]
+
+
+def test_incompatible_chunks_become_object():
+    buffer = ColumnarBuffer(["v"])
+    buffer.append_rows([(1,), (2,)])
+    buffer.append_rows([("x",)])
+    assert buffer.slice_columns(0, 3)[0].tolist() == [1, 2, "x"]
+
+
+def test_to_pandas_is_cached_until_the_next_append():
+    buffer = _buffer()
+    df = buffer.to_pandas()
+    assert df["id"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert buffer.to_pandas() is df
+    # Consolidado em um único bloco
+    assert len(list(buffer.iter_chunks())) == 1
+    buffer.append_rows([(7, "g")])
+    assert buffer.to_pandas() is not df
+    assert buffer.to_pandas()["nome"].tolist()[-1] == "g"
+
+
+def test_extend_and_as_buffer():
+    buffer = _buffer()
+    other = ColumnarBuffer.from_rows(["id", "nome"], [(10, "x")])
+    buffer.extend(other)
+    assert len(buffer) == 7
+    df = pd.DataFrame({"id": [1], "nome": ["a"]})
+    wrapped = as_buffer(df)
+    assert wrapped.to_pandas() is df
+    assert as_buffer(wrapped) is wrapped
+    assert as_buffer(None).empty
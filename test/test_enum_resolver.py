@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from utils.enum_resolver import fetch_enum_values, parse_check_values  # noqa: E402
+
+
+@pytest.mark.parametrize("definition, expected", [
+    ("status IN ('novo', 'pago', 'd''arc')", ["novo", "pago", "d'arc"]),
+    ("CHECK (((status)::text = ANY ((ARRAY['a'::character varying(20), 'b'::character varying])::text[])))", ["a", "b"]),
+    ("([status]='b' OR [status]='a')", ["b", "a"]),
+    ("n IN (1, 2, 3)", ["1", "2", "3"]),
+    ("CHECK ((nivel = ANY (ARRAY[(1)::numeric(10,2), 2.5, -3])))", ["1", "2.5", "-3"]),
+    ("([prioridade]=(2) OR [prioridade]=(1))", ["2", "1"]),
+])
+def test_closed_lists_are_parsed(definition, expected):
+    assert parse_check_values(definition) == expected
+
+
+@pytest.mark.parametrize("definition", [
+    "idade > 0",
+    "nome LIKE 'a%'",
+    "n BETWEEN 1 AND 5",
+    "n NOT IN (1, 2)",
+    "length(codigo) = 3",
+    "col1 IS NULL",
+])
+def test_other_conditions_are_ignored(definition):
+    assert parse_check_values(definition) == []
+
+
+def test_sqlite_check_constraints_with_text_and_numbers():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tarefas (id INTEGER PRIMARY KEY, "
+            "estado TEXT CHECK (estado IN ('aberta', 'fechada')), "
+            "prioridade INTEGER CHECK (prioridade IN (1, 2, 3)), "
+            "peso INTEGER CHECK (peso > 0))"
+        ))
+        conn.execute(text("CREATE TABLE outra (tipo TEXT CHECK (tipo IN ('x')))"))
+    assert fetch_enum_values(engine, "tarefas") == {
+        "tarefas": {"estado": ["aberta", "fechada"], "prioridade": ["1", "2", "3"]},
+    }
+    assert set(fetch_enum_values(engine)) == {"tarefas", "outra"}
@@ -0,0 +1,68 @@
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from utils import exporters  # noqa: E402
+from utils.exporters import open_writer  # noqa: E402
+
+
+def _write_chunks(path, columns, chunks):
+    writer = open_writer(str(path), columns)
+    for rows in chunks:
+        writer.write(rows)
+    writer.close()
+    return pq.read_table(str(path))
+
+
+def test_parquet_decimal_scale_grows_after_first_chunk(tmp_path):
+    # O primeiro lote define o esquema (todas as colunas com valor); os seguintes têm mais dígitos e casas
+    table = _write_chunks(tmp_path / "valores.parquet", ["id", "valor"], [
+        [(1, Decimal("1.23")), (2, Decimal("4.56"))],
+        [(3, Decimal("12345.125"))],
+        [(4, Decimal("98765432109876543210.5")), (5, None)],
+    ])
+    values = table.column("valor").to_pylist()
+    assert values[:3] == [Decimal("1.23"), Decimal("4.56"), Decimal("12345.125")]
+    assert values[3] == Decimal("98765432109876543210.5")
+    assert values[4] is None
+    assert table.num_rows == 5
+
+
+def test_parquet_decimal_beyond_file_scale_is_rounded(tmp_path):
+    table = _write_chunks(tmp_path / "escala.parquet", ["valor"], [
+        [(Decimal("0.5"),)],
+        [(Decimal("0.1234567890123456789012"),)],
+    ])
+    scale = exporters.PARQUET_DECIMAL_SCALE
+    assert table.column("valor").to_pylist()[1] == Decimal("0.1234567890123456789012").quantize(Decimal(1).scaleb(-scale))
+
+
+def test_parquet_column_null_only_in_first_chunk_keeps_its_type(tmp_path):
+    table = _write_chunks(tmp_path / "nulos.parquet", ["id", "total"], [
+        [(1, None), (2, None)],
+        [(3, Decimal("10.50")), (4, None)],
+    ])
+    assert table.column("total").to_pylist() == [None, None, Decimal("10.50"), None]
+    assert table.column("id").to_pylist() == [1, 2, 3, 4]
+
+
+def test_parquet_column_null_in_whole_sample_is_written_as_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporters, "PARQUET_SCHEMA_SAMPLE_ROWS", 2)
+    table = _write_chunks(tmp_path / "texto.parquet", ["id", "obs"], [
+        [(1, None), (2, None)],
+        [(3, 42), (4, None)],
+    ])
+    assert table.column("obs").to_pylist() == [None, None, "42", None]
+
+
+def test_parquet_empty_result_writes_schema_only(tmp_path):
+    table = _write_chunks(tmp_path / "vazio.parquet", ["a", "b"], [[]])
+    assert table.num_rows == 0
+    assert table.column_names == ["a", "b"]
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from utils.keyset_pagination import _keyset_condition, build_keyset_query  # noqa: E402
+from utils.validarText import get_query_string  # noqa: E402
+
+
+def test_single_key_condition():
+    assert _keyset_condition("mysql", ["`id`"], ["k0"]) == "`id` > :k0"
+
+
+@pytest.mark.parametrize("family", ["postgresql", "sqlite"])
+def test_composite_key_uses_row_values(family):
+    condition = _keyset_condition(family, ['"a"', '"b"'], ["k0", "k1"])
+    assert condition == '("a", "b") > (:k0, :k1)'
+
+
+@pytest.mark.parametrize("family", ["mysql", "mssql", "oracle"])
+def test_composite_key_expanded_form(family):
+    condition = _keyset_condition(family, ["a", "b", "c"], ["k0", "k1", "k2"])
+    assert condition == "a >= :k0 AND (a > :k0 OR (a = :k0 AND (b > :k1 OR (b = :k1 AND (c > :k2)))))"
+
+
+def test_build_keyset_query_adds_cursor_params_and_order():
+    params = {"f": 1}
+    query = build_keyset_query("SELECT * FROM t", ["x = :f"], ["a", "b"], (3, "z"), 50, "postgresql", params)
+    assert query == ('SELECT * FROM t WHERE (x = :f) AND (("a", "b") > (:keyset_0, :keyset_1)) '
+                     'ORDER BY "a" ASC, "b" ASC LIMIT 50')
+    assert params == {"f": 1, "keyset_0": 3, "keyset_1": "z"}
+
+
+def test_build_keyset_query_first_page_and_dialect_limits():
+    assert build_keyset_query("SELECT * FROM t", None, ["id"], None, 10, "mssql", {}) == \
+        "SELECT * FROM t ORDER BY [id] ASC OFFSET 0 ROWS FETCH NEXT 10 ROWS ONLY"
+    assert build_keyset_query("SELECT * FROM t", None, ["id"], None, 10, "oracle", {}) == \
+        "SELECT * FROM (SELECT * FROM t ORDER BY ID ASC) WHERE ROWNUM <= 10"
+
+
+def test_build_keyset_query_requires_key():
+    with pytest.raises(ValueError):
+        build_keyset_query("SELECT * FROM t", None, [], None, 10, "sqlite", {})
+
+
+def _paginate(engine, key_columns, page_size):
+    rows, cursor = [], None
+    while True:
+        params = {}
+        query = build_keyset_query('SELECT * FROM "t"', None, key_columns, cursor, page_size, "sqlite", params)
+        with engine.connect() as conn:
+            page = conn.execute(text(query), params).fetchall()
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        cursor = tuple(page[-1]._mapping[col] for col in key_columns)
+
+
+def test_composite_keyset_pages_cover_every_row_once_on_sqlite():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE t (a INTEGER, b INTEGER, v TEXT, PRIMARY KEY (a, b))'))
+        conn.execute(text("INSERT INTO t VALUES (:a, :b, :v)"),
+                     [{"a": a, "b": b, "v": f"{a}-{b}"} for a in range(5) for b in range(7)])
+    rows = _paginate(engine, ["a", "b"], 4)
+    assert [(row.a, row.b) for row in rows] == [(a, b) for a in range(5) for b in range(7)]
+
+
+def test_offset_pages_with_order_by_cover_every_row_once_on_sqlite():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (v TEXT, n INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (:v, :n)"), [{"v": f"r{i % 4}", "n": i} for i in range(23)])
+    rows, offset = [], 0
+    while True:
+        query = get_query_string("SELECT * FROM t", None, 5, "sqlite", offset=offset, order_by='"v" ASC, "n" ASC')
+        with engine.connect() as conn:
+            page = conn.execute(text(query)).fetchall()
+        rows.extend(page)
+        offset += len(page)
+        if len(page) < 5:
+            break
+    assert sorted(row.n for row in rows) == list(range(23))
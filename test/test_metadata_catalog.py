@@ -0,0 +1,73 @@
+import os
+import pickle
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import salavarInfoAllColumn  # noqa: E402
+from config.salavarInfoAllColumn import MetadataCatalog  # noqa: E402
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    # Os Pickle antigos são procurados no diretório atual
+    monkeypatch.chdir(tmp_path)
+    return MetadataCatalog(str(tmp_path / "catalogo.db"))
+
+
+def test_get_returns_independent_copy(catalog):
+    catalog.set("tables_columns_data", "mysqldbclientes", [{"name": "id", "type": "INTEGER"}], profile="mysqldb")
+    columns = catalog.get("tables_columns_data", "mysqldbclientes")
+    columns[0]["type"] = "alterado"
+    assert catalog.get("tables_columns_data", "mysqldbclientes") == [{"name": "id", "type": "INTEGER"}]
+
+
+def test_entries_expire_after_profile_ttl(catalog, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(salavarInfoAllColumn.time, "time", lambda: now[0])
+    catalog.set_ttl("mysqldb", 60)
+    catalog.set("ns", "a", 1, profile="mysqldb")
+    catalog.set("ns", "b", 2, profile="outro")
+    now[0] += 61
+    assert catalog.get("ns", "a") is None
+    assert catalog.get("ns", "b") == 2
+    assert catalog.load_namespace("ns") == {"b": 2}
+    catalog.set_ttl("mysqldb", None)
+    catalog.set("ns", "a", 3, profile="mysqldb")
+    now[0] += 10_000
+    assert catalog.get("ns", "a") == 3
+
+
+def test_lru_is_bounded_and_reads_fall_back_to_disk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    catalog = MetadataCatalog(str(tmp_path / "lru.db"), lru_size=2)
+    catalog.set_many("ns", {"a": 1, "b": 2, "c": 3})
+    assert list(catalog._lru) == [("ns", "b"), ("ns", "c")]
+    assert catalog.get("ns", "a") == 1
+    assert list(catalog._lru) == [("ns", "c"), ("ns", "a")]
+
+
+def test_invalidate_by_profile_and_key(catalog):
+    catalog.set_many("ns", {"a": 1, "b": 2}, profile="p1")
+    catalog.set("ns", "c", 3, profile="p2")
+    assert catalog.invalidate(namespace="ns", key="a") == 1
+    assert catalog.get("ns", "a") is None
+    assert catalog.invalidate(profile="p2") == 1
+    assert catalog.load_namespace("ns") == {"b": 2}
+
+
+def test_legacy_pickles_are_imported_and_adopted_by_profile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("tables_columns_data.pkl", "wb") as f:
+        pickle.dump({"mysqlvendasclientes": [{"name": "id"}], "postgresqlrhfolha": [{"name": "mes"}]}, f)
+    with open("tables_columns_enum.pkl", "wb") as f:
+        f.write(b"corrompido")
+    catalog = MetadataCatalog(str(tmp_path / "legado.db"))
+    assert catalog.get("tables_columns_data", "mysqlvendasclientes") == [{"name": "id"}]
+
+    assert catalog.adopt_legacy_entries("mysqlvendas") == 1
+    assert catalog.invalidate(profile="mysqlvendas") == 1
+    assert catalog.get("tables_columns_data", "mysqlvendasclientes") is None
+    assert catalog.get("tables_columns_data", "postgresqlrhfolha") == [{"name": "mes"}]
@@ -0,0 +1,76 @@
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import Date, DateTime, Integer, String, create_engine, text  # noqa: E402
+from utils.predicate_compiler import PredicateCompiler, parse_date_interval  # noqa: E402
+
+
+def test_parse_date_interval_granularity():
+    assert parse_date_interval("2024") == (datetime(2024, 1, 1), datetime(2025, 1, 1))
+    assert parse_date_interval("2024-12") == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert parse_date_interval("2024-03-05 10:30") == (datetime(2024, 3, 5, 10, 30), datetime(2024, 3, 5, 10, 31))
+    with pytest.raises(ValueError):
+        parse_date_interval("ontem")
+
+
+@pytest.mark.parametrize("value, sql, params", [
+    ("5", "n = :f_1", {"f_1": 5}),
+    ("1, 2", "n IN (:f_1, :f_2)", {"f_1": 1, "f_2": 2}),
+    (">= 10", "n >= :f_1", {"f_1": 10}),
+    ("10..20", "n BETWEEN :f_1 AND :f_2", {"f_1": 10, "f_2": 20}),
+])
+def test_numeric_predicates_sqlite(value, sql, params):
+    collected = {}
+    assert PredicateCompiler("sqlite").compile("n", Integer(), value, collected) == sql
+    assert collected == params
+
+
+def test_text_prefix_uses_like_with_escape():
+    params = {}
+    sql = PredicateCompiler("sqlite").compile("nome", String(), "ab_c*", params)
+    assert sql == "nome LIKE :f_1 ESCAPE '/'"
+    assert params == {"f_1": "ab/_c%"}
+
+
+def test_postgresql_dates_render_plain_named_binds():
+    params = {}
+    sql = PredicateCompiler("postgresql").compile("criado", DateTime(), "2024-03", params)
+    assert sql == "criado >= :f_1 AND criado < :f_2"
+    assert params == {"f_1": datetime(2024, 3, 1), "f_2": datetime(2024, 4, 1)}
+
+    params = {}
+    sql = PredicateCompiler("postgresql").compile("dia", Date(), "< 2024-03-05", params)
+    assert sql == "dia < :f_1"
+    assert params == {"f_1": date(2024, 3, 5)}
+
+
+def test_bind_names_do_not_collide_across_columns():
+    params = {}
+    compiler = PredicateCompiler("postgresql")
+    first = compiler.compile("a b", Integer(), "1", params)
+    second = compiler.compile("a_b", Integer(), "2", params)
+    assert (first, second) == ('"a b" = :f_1', "a_b = :f_2")
+    assert params == {"f_1": 1, "f_2": 2}
+
+
+def test_compiled_filters_run_on_sqlite():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE t ("a b" INTEGER, a_b INTEGER, dia DATE)'))
+        conn.execute(text('INSERT INTO t VALUES (:x, :y, :d)'),
+                     [{"x": i, "y": i % 3, "d": f"2024-0{i % 3 + 1}-1{i}"} for i in range(9)])
+    params = {}
+    compiler = PredicateCompiler("sqlite")
+    filters = [compiler.compile("a b", Integer(), ">= 3", params),
+               compiler.compile("a_b", Integer(), "0, 2", params),
+               compiler.compile("dia", Date(), "2024-01..2024-02", params)]
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT \"a b\" FROM t WHERE {' AND '.join(filters)} ORDER BY 1"), params).fetchall()
+    assert [row[0] for row in rows] == [3, 6]
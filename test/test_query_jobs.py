@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from utils.query_jobs import QueryCancelled, QueryJob, _owners, current_job  # noqa: E402
+
+# Consulta sem fim; mark(x) avisa que ela já está rodando no servidor
+ENDLESS_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE mark(x)) SELECT count(*) FROM c"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+    return engine
+
+
+def _wait(job):
+    assert job.done.wait(5)
+
+
+def test_job_runs_target_with_itself_as_current_job(engine):
+    seen = {}
+
+    def _target(label):
+        seen["job"] = current_job()
+        with engine.connect() as conn:
+            seen[label] = conn.execute(text("SELECT count(*) FROM t")).scalar()
+
+    job = QueryJob(engine, _target, "total", name="contagem").start()
+    _wait(job)
+    assert seen == {"job": job, "total": 3}
+    assert not job.is_running
+    assert current_job() is None
+    # Conexão devolvida ao pool: deixa de pertencer ao trabalho
+    assert job not in _owners.values()
+
+
+def test_cancelled_job_refuses_new_queries(engine):
+    ready, go = threading.Event(), threading.Event()
+    errors = []
+
+    def _target():
+        with engine.connect() as conn:
+            ready.set()
+            go.wait(5)
+            try:
+                conn.execute(text("SELECT * FROM t"))
+            except QueryCancelled as e:
+                errors.append(e)
+
+    job = QueryJob(engine, _target, name="lista").start()
+    assert ready.wait(5)
+    job.cancel()
+    go.set()
+    _wait(job)
+    assert job.cancelled
+    assert len(errors) == 1
+    assert "lista" in str(errors[0])
+
+
+def test_cancel_interrupts_running_query(engine):
+    running = threading.Event()
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("mark", 1, lambda x: running.set() or 1)
+
+    engine.dispose()
+    errors, cancelled = [], threading.Event()
+
+    def _target():
+        with engine.connect() as conn:
+            try:
+                conn.execute(text(ENDLESS_QUERY)).scalar()
+            except OperationalError as e:
+                errors.append(e)
+
+    job = QueryJob(engine, _target, name="infinita").start()
+    assert running.wait(5)
+    job.cancel(on_cancelled=lambda _job: cancelled.set())
+    assert cancelled.wait(5)
+    assert "interrupted" in str(errors[0])
+
+
+def test_next_job_waits_for_the_previous_one(engine):
+    order = []
+    release = threading.Event()
+
+    def _first():
+        release.wait(5)
+        order.append("primeiro")
+
+    first = QueryJob(engine, _first, name="primeiro").start()
+    second = QueryJob(engine, order.append, "segundo", name="segundo", after=first).start()
+    # O anterior foi cancelado, mas o próximo só começa quando ele terminar
+    assert first.stop_event.is_set()
+    assert second.is_running
+    release.set()
+    _wait(second)
+    assert order == ["primeiro", "segundo"]
+
+
+def test_job_cancelled_before_it_starts_never_runs(engine):
+    release = threading.Event()
+    ran = []
+    first = QueryJob(engine, release.wait, 5, name="primeiro").start()
+    second = QueryJob(engine, ran.append, 1, name="segundo", after=first).start()
+    second.cancel()
+    release.set()
+    _wait(second)
+    assert ran == []
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from utils.remote_pages import RemotePageSource  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, grupo INTEGER, nome TEXT)"))
+        conn.execute(text("INSERT INTO t VALUES (:id, :g, :n)"),
+                     [{"id": i, "g": i % 3, "n": f"n{i:02d}"} for i in range(1, 24)])
+    return engine
+
+
+def _source(engine, **kwargs):
+    kwargs.setdefault("key_columns", ["id"])
+    return RemotePageSource(engine, 'SELECT * FROM "t"', kwargs.pop("filters", None), kwargs.pop("params", None),
+                            "sqlite", page_size=5, **kwargs)
+
+
+def _ids(df):
+    return df["id"].tolist()
+
+
+def test_sequential_pages_follow_the_key(engine):
+    source = _source(engine)
+    assert _ids(source.get_page(0)) == [1, 2, 3, 4, 5]
+    assert _ids(source.get_page(1)) == [6, 7, 8, 9, 10]
+    assert source._cursors[1] == (10,)
+    assert source.last_page is None
+
+
+def test_random_access_uses_offset_and_finds_last_page(engine):
+    source = _source(engine)
+    assert _ids(source.get_page(4)) == [21, 22, 23]
+    assert source.last_page == 4
+    assert source.get_page(5).empty
+
+
+def test_pages_without_key_are_ordered_by_order_columns(engine):
+    source = _source(engine, key_columns=None, order_columns=["grupo", "id"], filters=["grupo = :g"], params={"g": 2})
+    pages = [_ids(source.get_page(page)) for page in range(2)]
+    assert pages == [[2, 5, 8, 11, 14], [17, 20, 23]]
+    assert source.last_page == 1
+
+
+def test_source_requires_an_ordering(engine):
+    with pytest.raises(ValueError):
+        _source(engine, key_columns=None)
+
+
+def test_cached_pages_are_bounded(engine):
+    source = _source(engine, lru_size=2)
+    for page in range(3):
+        source.get_page(page)
+    assert list(source._pages) == [1, 2]
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE t SET nome = 'alterado' WHERE id IN (1, 6)"))
+    # A página 1 vem do cache; a página 0 foi descartada e é buscada de novo
+    assert source.get_page(1)["nome"].iloc[0] == "n06"
+    assert source.get_page(0)["nome"].iloc[0] == "alterado"
+
+
+def test_fetch_started_before_invalidate_is_not_cached(engine):
+    source = _source(engine)
+    fetch = source._fetch
+    started, release = threading.Event(), threading.Event()
+
+    def _slow_fetch(page):
+        df = fetch(page)
+        started.set()
+        release.wait(5)
+        return df
+
+    source._fetch = _slow_fetch
+    results = []
+    worker = threading.Thread(target=lambda: results.append(source.get_page(0)))
+    worker.start()
+    assert started.wait(5)
+    source.invalidate()
+    release.set()
+    worker.join(5)
+
+    assert _ids(results[0]) == [1, 2, 3, 4, 5]
+    assert source._pages == {}
+    assert source._inflight == {}
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from utils.row_count import RowCounter, count_rows, estimate_row_count  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, grupo INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_t_grupo ON t (grupo)"))
+        conn.execute(text("INSERT INTO t (grupo) VALUES (:g)"), [{"g": i % 4} for i in range(40)])
+    return engine
+
+
+def _totals(engine, filters=None, params=None, **kwargs):
+    totals = []
+    RowCounter(engine, "sqlite", **kwargs).start(
+        "t", 'SELECT * FROM "t"', filters, params, on_total=lambda total, estimated: totals.append((total, estimated))
+    ).join()
+    return totals
+
+
+def test_exact_count_applies_filters(engine):
+    assert count_rows(engine, 'SELECT * FROM "t"', ["grupo = :g"], {"g": 1}, "sqlite") == 10
+
+
+def test_estimate_needs_analyze_on_sqlite(engine):
+    assert estimate_row_count(engine, "t") is None
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    assert estimate_row_count(engine, "t") == 40
+
+
+def test_estimate_comes_first_then_exact_total(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.execute(text("INSERT INTO t (grupo) VALUES (9)"))
+    assert _totals(engine) == [(40, True), (41, False)]
+
+
+def test_filtered_query_skips_the_estimate(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    assert _totals(engine, ["grupo = :g"], {"g": 2}) == [(10, False)]
+
+
+def test_large_estimate_skips_exact_count(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    assert _totals(engine, exact_max_estimate=10) == [(40, True)]
+
+
+def test_cancelled_count_reports_nothing(engine):
+    stop_event = threading.Event()
+    stop_event.set()
+    totals = []
+    RowCounter(engine, "sqlite").start("t", 'SELECT * FROM "t"', None, None,
+                                       on_total=lambda *args: totals.append(args), stop_event=stop_event).join()
+    assert totals == []
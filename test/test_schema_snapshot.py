@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, inspect, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from config.SchemaSnapshot import SchemaSnapshot  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    # Uma única conexão para que todas as consultas vejam o mesmo banco em memória
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "create table clientes (id integer primary key, nome varchar(20) not null, nascimento date, "
+            "criado datetime, saldo numeric(10, 2), foto blob, ativo boolean, nota real, livre)"
+        ))
+        conn.execute(text(
+            "create table pedidos (numero integer not null, cliente_id integer references clientes(id), "
+            "codigo varchar(10) not null, obs text, constraint uq_pedidos_codigo unique (codigo))"
+        ))
+    return engine
+
+
+def _describe(columns):
+    return [(col["name"], repr(col["type"]), bool(col["nullable"])) for col in columns]
+
+
+def test_lowercase_ddl_types_match_inspector(engine):
+    snapshot = SchemaSnapshot(engine)
+    snapshot.load()
+    inspector = inspect(engine)
+    assert snapshot.get_table_names() == ["clientes", "pedidos"]
+    for table in ("clientes", "pedidos"):
+        assert _describe(snapshot.get_columns(table)) == _describe(inspector.get_columns(table))
+
+
+def test_primary_and_foreign_keys(engine):
+    snapshot = SchemaSnapshot(engine)
+    snapshot.load()
+    assert snapshot.get_pk_constraint("clientes")["constrained_columns"] == ["id"]
+    assert snapshot.get_pk_constraint("pedidos")["constrained_columns"] == []
+    fk = snapshot.get_foreign_keys("pedidos")[0]
+    assert (fk["constrained_columns"], fk["referred_table"], fk["referred_columns"]) == (["cliente_id"], "clientes", ["id"])
+
+
+def test_key_columns_fall_back_to_not_null_unique(engine):
+    snapshot = SchemaSnapshot(engine)
+    snapshot.load()
+    assert snapshot.get_key_columns("clientes") == ["id"]
+    assert snapshot.get_key_columns("pedidos") == ["codigo"]
+
+
+def test_failed_load_falls_back_to_inspector(engine, monkeypatch):
+    snapshot = SchemaSnapshot(engine)
+
+    def _fail():
+        raise RuntimeError("catálogo indisponível")
+
+    monkeypatch.setattr(snapshot, "_load_sqlite", _fail)
+    snapshot.load_async().join()
+    assert isinstance(snapshot.load_error, RuntimeError)
+    assert not snapshot.is_loaded
+    assert snapshot.get_table_names() == ["clientes", "pedidos"]
+    assert [col["name"] for col in snapshot.get_columns("pedidos")] == ["numero", "cliente_id", "codigo", "obs"]
+
+
+def test_invalidate_table_rereads_columns(engine):
+    snapshot = SchemaSnapshot(engine)
+    snapshot.load()
+    with engine.begin() as conn:
+        conn.execute(text("alter table pedidos add column entregue date"))
+    assert "entregue" not in [col["name"] for col in snapshot.get_columns("pedidos")]
+    snapshot.invalidate("pedidos")
+    assert [col["name"] for col in snapshot.get_columns("pedidos")][-1] == "entregue"
+
+
+def test_refresh_table_drops_removed_table_from_list(engine):
+    snapshot = SchemaSnapshot(engine)
+    snapshot.load()
+    assert snapshot.refresh_table("clientes")
+    with engine.begin() as conn:
+        conn.execute(text("drop table pedidos"))
+    assert not snapshot.refresh_table("pedidos")
+    assert snapshot.get_table_names() == ["clientes"]
+    assert not snapshot.has_table("pedidos")
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from config.SchemaSnapshot import SchemaSnapshot  # noqa: E402
+from utils.table_profile import TableProfiler  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE vendas (id INTEGER PRIMARY KEY, cliente TEXT, valor REAL, anexo BLOB)"))
+        conn.execute(text("INSERT INTO vendas VALUES (:id, :cliente, :valor, NULL)"), [
+            {"id": 1, "cliente": "ana", "valor": 10.0},
+            {"id": 2, "cliente": "ana", "valor": 10.0},
+            {"id": 3, "cliente": "ana", "valor": 10.0},
+            {"id": 4, "cliente": "bia", "valor": 5.0},
+            {"id": 5, "cliente": "bia", "valor": 5.0},
+            {"id": 6, "cliente": "", "valor": None},
+        ])
+    return engine
+
+
+def _profiler(engine, table="vendas"):
+    return TableProfiler(engine, table, SchemaSnapshot.for_engine(engine).get_columns(table))
+
+
+def test_duplicates_ignore_the_primary_key(engine):
+    groups, rows, sample, compared = _profiler(engine).duplicate_groups()
+    assert compared == ["cliente", "valor"]
+    assert (groups, rows) == (2, 5)
+    assert sample.to_dict("records") == [
+        {"cliente": "ana", "valor": 10.0, "ocorrencias": 3},
+        {"cliente": "bia", "valor": 5.0, "ocorrencias": 2},
+    ]
+
+
+def test_duplicates_without_key_compare_every_comparable_column(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE log (nivel TEXT, msg TEXT)"))
+        conn.execute(text("INSERT INTO log VALUES ('info', 'a'), ('info', 'a'), ('erro', 'a')"))
+    groups, rows, _, compared = _profiler(engine, "log").duplicate_groups()
+    assert compared == ["nivel", "msg"]
+    assert (groups, rows) == (1, 2)
+
+
+def test_table_with_only_key_columns_has_nothing_to_compare(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ids (id INTEGER PRIMARY KEY)"))
+    assert _profiler(engine, "ids").duplicate_groups()[::3] == (0, [])
+
+
+def test_profile_counts_nulls_empties_and_statistics(engine):
+    profile = _profiler(engine).profile().set_index("coluna")
+    assert profile.loc["cliente", ["nulos", "vazios", "distintos", "repetidos"]].tolist() == [0, 1, 3, 3]
+    assert profile.loc["valor", "nulos"] == 1
+    assert profile.loc["valor", "média"] == pytest.approx(8.0)
+    assert profile.loc["valor", ["mínimo", "máximo"]].tolist() == [5.0, 10.0]
+    # BLOB não é comparável: sem distintos nem mínimo/máximo
+    assert pd.isna(profile.loc["anexo", "distintos"])
+
+
+def test_malformed_rows(engine):
+    profiler = _profiler(engine)
+    total, sample = profiler.malformed_rows()
+    # Todas as linhas têm o anexo nulo
+    assert total == 6
+    assert len(sample) == 6
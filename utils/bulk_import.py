@@ -0,0 +1,339 @@
+import io
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, StatementError
+from utils.keyset_pagination import quote_key_column
+
+# Linhas por transação: cada lote é confirmado separadamente
+IMPORT_CHUNK_SIZE = 5000
+# Extensões aceitas na importação
+IMPORT_FILE_TYPES = (("Planilhas e dados", "*.csv *.txt *.xlsx *.xls *.parquet"), ("CSV", "*.csv *.txt"),
+                     ("Excel", "*.xlsx *.xls"), ("Parquet", "*.parquet"), ("Todos", "*.*"))
+
+METHOD_COPY = "COPY FROM STDIN"
+METHOD_FAST_EXECUTEMANY = "executemany (fast_executemany)"
+METHOD_EXECUTEMANY = "executemany"
+
+ERROR_COLUMNS = ["linha", "coluna", "valor", "erro"]
+
+_TRUE_VALUES = {"true", "1", "yes", "y", "t", "on", "sim", "s", "verdadeiro"}
+_FALSE_VALUES = {"false", "0", "no", "n", "f", "off", "nao", "não", "falso"}
+_LENGTH_RE = re.compile(r"\(\s*(\d+)\s*\)")
+
+
+def read_import_file(path: str) -> pd.DataFrame:
+    """
+    Lê o arquivo a importar (CSV, Excel ou Parquet) em um DataFrame.
+
+    O CSV é lido como texto (a conversão é feita pelos tipos das colunas da tabela) e o
+    separador é detectado automaticamente; células vazias viram nulos.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".txt"):
+        return pd.read_csv(path, sep=None, engine="python", dtype=str, keep_default_na=False, na_values=[""])
+    if extension in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    if extension == ".parquet":
+        return pd.read_parquet(path)
+    raise ValueError(f"Formato de arquivo não suportado: {extension or path}")
+
+
+def _normalize_name(name: str) -> str:
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return re.sub(r"[\s\-\.]+", "_", name.strip().lower())
+
+
+def auto_map_columns(file_columns: Sequence[str], table_columns: Sequence[str]) -> Dict[str, str]:
+    """Associa as colunas do arquivo às da tabela pelo nome (sem caixa, acentos, espaços ou hífens)."""
+    by_name = {_normalize_name(col): col for col in table_columns}
+    mapping = {}
+    for col in file_columns:
+        target = by_name.get(_normalize_name(col))
+        if target is not None and target not in mapping.values():
+            mapping[col] = target
+    return mapping
+
+
+def _is_generated(column: Dict[str, Any]) -> bool:
+    """Coluna preenchida pelo servidor (autoincremento, identidade ou valor padrão)."""
+    return (column.get("default") is not None or column.get("autoincrement") is True
+            or column.get("identity") is not None or column.get("computed") is not None)
+
+
+def missing_required_columns(mapping: Dict[str, str], columns: List[Dict[str, Any]]) -> List[str]:
+    """Colunas NOT NULL sem valor padrão que não recebem nenhuma coluna do arquivo."""
+    mapped = set(mapping.values())
+    return [col["name"] for col in columns
+            if not col.get("nullable", True) and not _is_generated(col) and col["name"] not in mapped]
+
+
+def _column_kind(col_type: str) -> str:
+    """Categoria de conversão do tipo da coluna (mesma classificação de `_map_column_type`)."""
+    col_type = col_type.lower()
+    if any(t in col_type for t in ("int", "serial")):
+        return "int"
+    if any(t in col_type for t in ("float", "real", "double", "decimal", "numeric", "number", "money")):
+        return "float"
+    if any(t in col_type for t in ("bool", "bit")):
+        return "bool"
+    if "timestamp" in col_type or "datetime" in col_type:
+        return "datetime"
+    if "date" in col_type:
+        return "date"
+    return "text"
+
+
+class ImportResult:
+    """Resultado de uma importação: contagens, relatório das linhas rejeitadas e tempos."""
+
+    def __init__(self, total: int, method: str):
+        self.total = total
+        self.method = method
+        self.imported = 0
+        self.cancelled = False
+        self.elapsed = 0.0
+        self._errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row: int, column: str, value: Any, message: str) -> None:
+        self._errors.append({"linha": row, "coluna": column, "valor": value, "erro": message})
+
+    @property
+    def errors(self) -> pd.DataFrame:
+        """Relatório das linhas rejeitadas (linha de dados no arquivo, coluna, valor e motivo)."""
+        return pd.DataFrame(self._errors, columns=ERROR_COLUMNS)
+
+    @property
+    def rejected(self) -> int:
+        return len({error["linha"] for error in self._errors})
+
+
+def prepare_frame(df: pd.DataFrame, mapping: Dict[str, str], columns: List[Dict[str, Any]],
+                  result: ImportResult) -> pd.DataFrame:
+    """
+    Converte as colunas do arquivo para os tipos da tabela, coluna a coluna (operações vetorizadas).
+
+    As linhas com valores inválidos (conversão, tamanho máximo ou nulo em coluna obrigatória) são
+    registradas em `result` e removidas. O DataFrame retornado usa os nomes das colunas da tabela e
+    mantém o índice original, usado para numerar as linhas no relatório.
+    """
+    column_info = {col["name"]: col for col in columns}
+    prepared = pd.DataFrame(index=df.index)
+    invalid = pd.Series(False, index=df.index)
+
+    def reject(mask: pd.Series, target: str, source: pd.Series, message: str) -> None:
+        nonlocal invalid
+        for index, value in source[mask].items():
+            result.add_error(int(index) + 1, target, value, message)
+        invalid |= mask
+
+    for source_col, target in mapping.items():
+        info = column_info.get(target, {})
+        col_type = str(info.get("type", ""))
+        kind = _column_kind(col_type)
+        source = df[source_col]
+        # Texto pode vir como object ou como o tipo string (padrão do pandas 3 para colunas de texto)
+        is_text = pd.api.types.is_string_dtype(source) or source.dtype == object
+        if is_text:
+            # Texto sem espaços nas pontas; células em branco contam como nulas
+            stripped = source.astype(str).str.strip()
+            source = source.where(source.isna(), stripped).where(stripped != "")
+        present = source.notna()
+
+        if kind in ("int", "float"):
+            converted = pd.to_numeric(source, errors="coerce")
+            reject(present & converted.isna(), target, source, f"Número inválido ({col_type})")
+            if kind == "int":
+                fractional = converted.notna() & (converted % 1 != 0)
+                reject(fractional, target, source, f"Número inteiro esperado ({col_type})")
+                converted = converted.where(~fractional).astype("Int64")
+        elif kind == "bool":
+            lowered = source.astype(str).str.lower()
+            converted = pd.Series(pd.NA, index=df.index, dtype=object)
+            converted[lowered.isin(_TRUE_VALUES)] = True
+            converted[lowered.isin(_FALSE_VALUES)] = False
+            reject(present & converted.isna(), target, source, "Valor booleano inválido")
+        elif kind in ("datetime", "date"):
+            # Texto: cada valor é interpretado pelo próprio formato (planilhas costumam misturar formatos)
+            converted = pd.to_datetime(source, errors="coerce", format="mixed" if is_text else None)
+            reject(present & converted.isna(), target, source, f"Data inválida ({col_type})")
+            if kind == "date":
+                converted = converted.dt.date
+        else:
+            converted = source.where(~present, source.astype(str))
+            length = _LENGTH_RE.search(col_type)
+            if length and "char" in col_type.lower():
+                reject(present & (converted.str.len() > int(length.group(1))), target, source,
+                       f"Texto maior que o tamanho da coluna ({col_type})")
+
+        if not info.get("nullable", True) and not _is_generated(info):
+            reject(~present, target, source, "Valor obrigatório (coluna NOT NULL)")
+        prepared[target] = converted
+
+    return prepared[~invalid]
+
+
+def _frame_rows(frame: pd.DataFrame) -> List[tuple]:
+    """Linhas como tuplas de tipos Python (nulos como None), montadas coluna a coluna."""
+    columns = []
+    for col in frame.columns:
+        series = frame[col]
+        # Não altera arrays do pandas no lugar: to_numpy() pode retornar uma visão somente leitura (pandas 3)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = pd.Series(series.dt.to_pydatetime(), index=series.index, dtype=object)
+        else:
+            values = series.astype(object)
+        columns.append(values.where(series.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+class _Loader:
+    """Carga de um lote no caminho mais rápido disponível para o dialeto."""
+
+    def __init__(self, engine, table_name: str, columns: List[str]):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.driver = getattr(engine.dialect, "driver", "")
+        self.table = quote_key_column(self.dialect, table_name)
+        self.columns = columns
+        self.column_sql = ", ".join(quote_key_column(self.dialect, col) for col in columns)
+        if self.dialect == "postgresql" and self.driver in ("psycopg2", "psycopg"):
+            self.method = METHOD_COPY
+        elif self.dialect == "mssql" and self.driver == "pyodbc":
+            self.method = METHOD_FAST_EXECUTEMANY
+        else:
+            # MySQL/MariaDB: o PyMySQL reescreve o executemany de INSERT em INSERTs de várias linhas;
+            # SQLite/Oracle: executemany na mesma transação
+            self.method = METHOD_EXECUTEMANY
+
+    def load(self, frame: pd.DataFrame) -> None:
+        """Insere o lote em uma transação (tudo ou nada)."""
+        with self.engine.begin() as conn:
+            if self.method == METHOD_COPY:
+                self._copy(conn, frame)
+            elif self.method == METHOD_FAST_EXECUTEMANY:
+                self._fast_executemany(conn, frame)
+            else:
+                self._executemany(conn, frame)
+
+    def _copy(self, conn, frame: pd.DataFrame) -> None:
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False, na_rep="\\N")
+        sql = f"COPY {self.table} ({self.column_sql}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        cursor = conn.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+    def _fast_executemany(self, conn, frame: pd.DataFrame) -> None:
+        placeholders = ", ".join("?" for _ in self.columns)
+        cursor = conn.connection.cursor()
+        try:
+            # Envia os parâmetros em arrays (ODBC) em vez de uma ida ao servidor por linha
+            cursor.fast_executemany = True
+            cursor.executemany(f"INSERT INTO {self.table} ({self.column_sql}) VALUES ({placeholders})", _frame_rows(frame))
+        finally:
+            cursor.close()
+
+    def _executemany(self, conn, frame: pd.DataFrame) -> None:
+        names = [f"v{i}" for i in range(len(self.columns))]
+        sql = text(f"INSERT INTO {self.table} ({self.column_sql}) VALUES ({', '.join(':' + n for n in names)})")
+        conn.execute(sql, [dict(zip(names, row)) for row in _frame_rows(frame)])
+
+
+# Erros do driver (DB-API) causados pelos dados das linhas; os demais (conexão, bloqueio, cancelamento) abortam
+_DATA_ERROR_NAMES = ("IntegrityError", "DataError")
+
+
+def _is_data_error(e: Exception) -> bool:
+    """Se o erro foi causado pelos valores do lote (e não pela conexão ou pelo servidor)."""
+    if isinstance(e, DBAPIError):
+        e = e.orig
+    elif isinstance(e, StatementError):
+        # Falha ao converter os parâmetros, antes de chegar ao servidor
+        return True
+    # ValueError/TypeError fora do SQLAlchemy são falhas do próprio código: propagadas, não rejeitam linhas
+    # COPY e fast_executemany usam o cursor do driver: as exceções não são as do SQLAlchemy
+    return any(cls.__name__ in _DATA_ERROR_NAMES for cls in type(e).__mro__)
+
+
+def _load_chunk(loader: _Loader, frame: pd.DataFrame, result: ImportResult,
+                stop_event: Optional[threading.Event] = None) -> None:
+    """
+    Carrega o lote; se o servidor recusar os dados, divide-o ao meio até isolar as linhas com erro
+    (registradas no relatório) e grava as demais. Erros que não são de dados (conexão perdida,
+    tempo de bloqueio, cancelamento) são propagados sem dividir o lote.
+    """
+    if stop_event is not None and stop_event.is_set():
+        result.cancelled = True
+        return
+    try:
+        loader.load(frame)
+        result.imported += len(frame)
+    except Exception as e:
+        if not _is_data_error(e):
+            raise
+        if len(frame) == 1:
+            error = getattr(e, "orig", None) or e
+            result.add_error(int(frame.index[0]) + 1, "", None, str(error).strip().splitlines()[0])
+            return
+        middle = len(frame) // 2
+        _load_chunk(loader, frame.iloc[:middle], result, stop_event)
+        _load_chunk(loader, frame.iloc[middle:], result, stop_event)
+
+
+def import_frame(engine, table_name: str, df: pd.DataFrame, mapping: Dict[str, str], columns: List[Dict[str, Any]],
+                 chunk_size: int = IMPORT_CHUNK_SIZE, on_progress: Optional[Callable[[int, int], None]] = None,
+                 stop_event: Optional[threading.Event] = None) -> ImportResult:
+    """
+    Importa as linhas do DataFrame para a tabela.
+
+    Args:
+        mapping (dict): Coluna do arquivo -> coluna da tabela (colunas sem mapeamento são ignoradas).
+        columns (list): Colunas da tabela (nome, tipo, nullable, default) do catálogo de metadados.
+        chunk_size (int): Linhas por transação; lotes já confirmados permanecem se um lote posterior falhar.
+        on_progress (callable, optional): Recebe (linhas processadas, total) após cada lote.
+        stop_event (threading.Event, optional): Interrompe antes do próximo lote (ou da próxima parte de um lote dividido).
+    """
+    if not mapping:
+        raise ValueError("Nenhuma coluna do arquivo foi associada a uma coluna da tabela.")
+    started = time.perf_counter()
+    loader = _Loader(engine, table_name, list(mapping.values()))
+    result = ImportResult(len(df), loader.method)
+    frame = prepare_frame(df, mapping, columns, result)
+
+    processed = len(df) - len(frame)
+    for start in range(0, len(frame), chunk_size):
+        if stop_event is not None and stop_event.is_set():
+            result.cancelled = True
+            break
+        chunk = frame.iloc[start:start + chunk_size]
+        _load_chunk(loader, chunk, result, stop_event)
+        if result.cancelled:
+            break
+        processed += len(chunk)
+        if on_progress:
+            on_progress(processed, len(df))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def summarize(result: ImportResult) -> str:
+    """Resumo da importação para o log e a janela."""
+    rate = result.imported / result.elapsed if result.elapsed else 0
+    summary = (f"{result.imported} de {result.total} linhas importadas em {result.elapsed:.1f}s "
+               f"({rate:,.0f} linhas/s, {result.method}); {result.rejected} rejeitadas.")
+    if result.cancelled:
+        summary += " Importação cancelada: os lotes já confirmados permanecem na tabela."
+    return summary
@@ -0,0 +1,389 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from utils.keyset_pagination import dialect_family, quote_key_column
+
+# Linhas por lote do executemany
+CHANGE_SET_BATCH_SIZE = 500
+# Linhas por consulta na verificação de conflitos (mantém o número de parâmetros baixo, ex: SQL Server)
+CONFLICT_CHECK_CHUNK = 200
+
+KIND_UPDATE = "update"
+KIND_INSERT = "insert"
+KIND_DELETE = "delete"
+
+
+def to_db_value(value: Any) -> Any:
+    """Converte escalares numpy/pandas em tipos Python aceitos pelos drivers (NaN/NaT viram None)."""
+    if value is None:
+        return None
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Compara dois valores do banco (números de ponto flutuante com tolerância)."""
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, float) or isinstance(b, float):
+        try:
+            return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-12)
+        except (TypeError, ValueError):
+            return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return str(a) == str(b)
+
+
+class RowChange:
+    """Alteração pendente de uma linha: valores da chave, valores originais e novos valores."""
+
+    def __init__(self, kind: str, key_values: Optional[Dict[str, Any]] = None, new: bool = False):
+        self.kind = kind
+        self.key_values = key_values or {}
+        # Linha criada na tabela e ainda não gravada (excluí-la apenas a descarta)
+        self.new = new
+        # Valores carregados das colunas alteradas (base da verificação de conflitos)
+        self.original: Dict[str, Any] = {}
+        self.values: Dict[str, Any] = {}
+
+
+class Conflict:
+    """Linha cuja versão no servidor não corresponde mais à carregada na tabela."""
+
+    def __init__(self, row_index: int, change: RowChange, message: str):
+        self.row_index = row_index
+        self.change = change
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"Linha {self.row_index + 1} (chave {self.change.key_values}): {self.message}"
+
+
+class ChangeSetConflict(Exception):
+    """Um lote afetou menos linhas que o esperado (a transação é desfeita)."""
+
+
+class FlushResult:
+    """Resultado da gravação de um ChangeSet."""
+
+    def __init__(self):
+        self.updated = 0
+        self.inserted = 0
+        self.deleted = 0
+        # Novas linhas sem nenhum valor preenchido (não gravadas)
+        self.skipped = 0
+        # Linhas novas gravadas cuja chave gerada pelo servidor não pôde ser lida (índices na tabela)
+        self.unknown_keys: List[int] = []
+        self.conflicts: List[Conflict] = []
+
+    @property
+    def written(self) -> bool:
+        return not self.conflicts
+
+
+class ChangeSet:
+    """
+    Alterações de várias linhas de uma tabela, acumuladas localmente até serem gravadas.
+
+    As linhas são identificadas pelo índice na tabela carregada e, no servidor, pelos valores
+    da chave primária. `flush` verifica conflitos (linhas alteradas ou removidas por outra
+    sessão) e grava tudo em uma única transação, com lotes parametrizados (executemany) de
+    DELETE, UPDATE e INSERT.
+    """
+
+    def __init__(self, table_name: str, key_columns: Sequence[str], db_type: str):
+        if not key_columns:
+            raise ValueError(f"A tabela '{table_name}' não tem chave primária: não é possível gravar em lote.")
+        self.table_name = table_name
+        self.key_columns = list(key_columns)
+        self.db_type = db_type
+        self._changes: Dict[int, RowChange] = {}
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._changes
+
+    def get(self, row_index: int) -> Optional[RowChange]:
+        return self._changes.get(row_index)
+
+    def counts(self) -> Dict[str, int]:
+        """Quantidade de linhas pendentes por tipo de alteração."""
+        counts = {KIND_UPDATE: 0, KIND_INSERT: 0, KIND_DELETE: 0}
+        for change in self._changes.values():
+            if not (change.new and change.kind == KIND_DELETE):
+                counts[change.kind] += 1
+        return counts
+
+    def new_rows(self) -> List[int]:
+        """Índices das linhas criadas na tabela e ainda não gravadas."""
+        return sorted(i for i, change in self._changes.items() if change.new)
+
+    # ------------------------------------------------------------------ preparação
+
+    def _key_values(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        missing = [col for col in self.key_columns if col not in row]
+        if missing:
+            raise ValueError(f"Colunas da chave ausentes na linha: {', '.join(missing)}")
+        return {col: to_db_value(row[col]) for col in self.key_columns}
+
+    def stage_update(self, row_index: int, row: Dict[str, Any], column: str, value: Any) -> None:
+        """Registra o novo valor de uma célula; voltar ao valor original desfaz a alteração."""
+        change = self._changes.get(row_index)
+        if change is not None and change.kind == KIND_DELETE:
+            raise ValueError("A linha está marcada para exclusão.")
+        if change is not None and change.kind == KIND_INSERT:
+            change.values[column] = value
+            return
+        if change is None:
+            change = RowChange(KIND_UPDATE, self._key_values(row))
+        change.original.setdefault(column, to_db_value(row.get(column)))
+        if _same(change.original[column], value):
+            change.original.pop(column)
+            change.values.pop(column, None)
+        else:
+            change.values[column] = value
+        if change.values:
+            self._changes[row_index] = change
+        else:
+            self._changes.pop(row_index, None)
+
+    def stage_insert(self, row_index: int, values: Optional[Dict[str, Any]] = None) -> None:
+        """Registra uma nova linha (ocupando o índice `row_index` na tabela)."""
+        change = RowChange(KIND_INSERT, new=True)
+        change.values.update(values or {})
+        self._changes[row_index] = change
+
+    def stage_delete(self, row_index: int, row: Dict[str, Any]) -> None:
+        """Marca a linha para exclusão (uma linha nova ainda não gravada é apenas descartada)."""
+        change = self._changes.get(row_index)
+        if change is not None and change.new:
+            # Continua registrada para que a linha seja removida da tabela, mas não gera DELETE
+            change.kind = KIND_DELETE
+            return
+        key_values = change.key_values if change is not None else self._key_values(row)
+        self._changes[row_index] = RowChange(KIND_DELETE, key_values)
+
+    def discard(self, row_index: Optional[int] = None) -> None:
+        """Descarta a alteração de uma linha (ou todas)."""
+        if row_index is None:
+            self._changes.clear()
+        else:
+            self._changes.pop(row_index, None)
+
+    def overlay(self, row_index: int, columns: Sequence[str], values: Sequence[Any]) -> Tuple[list, Optional[str]]:
+        """Aplica os valores pendentes aos valores exibidos da linha; retorna (valores, tipo da alteração)."""
+        change = self._changes.get(row_index)
+        if change is None:
+            return list(values), None
+        values = list(values)
+        for col, value in change.values.items():
+            if col in columns:
+                values[columns.index(col)] = "" if value is None else value
+        return values, change.kind
+
+    # ------------------------------------------------------------------ gravação
+
+    def flush(self, engine, force: bool = False) -> FlushResult:
+        """
+        Grava as alterações em uma transação.
+
+        Sem `force`, verifica antes se as linhas alteradas ou excluídas ainda existem com os
+        valores carregados; havendo conflitos, nada é gravado e eles são retornados no resultado.
+        As linhas novas sem a chave completa são inseridas uma a uma, lendo a chave gerada pelo
+        servidor (RETURNING/OUTPUT ou o último id), que fica em `key_values` da alteração.
+        """
+        result = FlushResult()
+        with engine.begin() as conn:
+            if not force:
+                result.conflicts = self.find_conflicts(conn)
+                if result.conflicts:
+                    return result
+            sane_rowcount = getattr(engine.dialect, "supports_sane_multi_rowcount", False)
+            for kind, sql, batch in self._statements(result):
+                affected = conn.execute(text(sql), batch).rowcount
+                if kind != KIND_INSERT and not force and sane_rowcount and 0 <= affected < len(batch):
+                    # Outra sessão alterou as linhas entre a verificação e a gravação
+                    raise ChangeSetConflict(f"{len(batch) - affected} linhas não encontradas ao gravar; nada foi salvo.")
+                if kind == KIND_DELETE:
+                    result.deleted += len(batch)
+                elif kind == KIND_UPDATE:
+                    result.updated += len(batch)
+                else:
+                    result.inserted += len(batch)
+            self._insert_reading_keys(conn, result)
+        return result
+
+    def _has_full_key(self, change: RowChange) -> bool:
+        return all(change.values.get(col) is not None for col in self.key_columns)
+
+    def _insert_reading_keys(self, conn, result: FlushResult) -> None:
+        """Insere as linhas novas sem a chave completa, uma a uma, e lê a chave gerada pelo servidor."""
+        family = dialect_family(self.db_type)
+        # No Oracle, RETURNING exige parâmetros de saída: usa o caminho sem leitura da chave
+        returning = getattr(conn.dialect, "insert_returning", False) and family != "oracle"
+        table = quote_key_column(self.db_type, self.table_name)
+        quoted_keys = [quote_key_column(self.db_type, col) for col in self.key_columns]
+        for row_index, change in sorted(self._changes.items()):
+            if change.kind != KIND_INSERT or not change.values or self._has_full_key(change):
+                continue
+            columns = sorted(change.values)
+            names = ", ".join(quote_key_column(self.db_type, col) for col in columns)
+            placeholders = ", ".join(f":v{i}" for i in range(len(columns)))
+            params = {f"v{i}": to_db_value(change.values[col]) for i, col in enumerate(columns)}
+            if returning and family == "mssql":
+                output = ", ".join(f"INSERTED.{col}" for col in quoted_keys)
+                sql = f"INSERT INTO {table} ({names}) OUTPUT {output} VALUES ({placeholders})"
+            elif returning:
+                sql = f"INSERT INTO {table} ({names}) VALUES ({placeholders}) RETURNING {', '.join(quoted_keys)}"
+            else:
+                sql = f"INSERT INTO {table} ({names}) VALUES ({placeholders})"
+            cursor = conn.execute(text(sql), params)
+            result.inserted += 1
+
+            key_values = {col: to_db_value(change.values.get(col)) for col in self.key_columns}
+            missing = [col for col in self.key_columns if key_values[col] is None]
+            if returning:
+                row = cursor.fetchone()
+                if row is not None:
+                    key_values = dict(zip(self.key_columns, (to_db_value(value) for value in row)))
+                    missing = []
+            elif missing and len(self.key_columns) == 1 and cursor.lastrowid:
+                # MySQL e afins: o id gerado pela coluna auto incremento (só é a chave se ela tiver uma coluna)
+                key_values[missing[0]] = cursor.lastrowid
+                missing = []
+            if missing:
+                result.unknown_keys.append(row_index)
+            else:
+                change.key_values = key_values
+
+    def find_conflicts(self, conn) -> List[Conflict]:
+        """Compara as linhas a alterar/excluir com a versão atual no servidor."""
+        targets = [(i, c) for i, c in sorted(self._changes.items())
+                   if c.kind in (KIND_UPDATE, KIND_DELETE) and not c.new]
+        compared = sorted({col for _, change in targets for col in change.original})
+        select_cols = self.key_columns + [col for col in compared if col not in self.key_columns]
+        table = quote_key_column(self.db_type, self.table_name)
+        conflicts = []
+        for start in range(0, len(targets), CONFLICT_CHECK_CHUNK):
+            part = targets[start:start + CONFLICT_CHECK_CHUNK]
+            clauses, params = [], {}
+            for n, (_, change) in enumerate(part):
+                conditions = []
+                for j, col in enumerate(self.key_columns):
+                    conditions.append(f"{quote_key_column(self.db_type, col)} = :k{n}_{j}")
+                    params[f"k{n}_{j}"] = change.key_values[col]
+                clauses.append("(" + " AND ".join(conditions) + ")")
+            columns_sql = ", ".join(quote_key_column(self.db_type, col) for col in select_cols)
+            rows = conn.execute(text(f"SELECT {columns_sql} FROM {table} WHERE {' OR '.join(clauses)}"), params)
+            current = {}
+            for row in rows:
+                values = [to_db_value(value) for value in row]
+                current[tuple(values[:len(self.key_columns)])] = dict(zip(select_cols, values))
+
+            for row_index, change in part:
+                key = tuple(change.key_values[col] for col in self.key_columns)
+                server = current.get(key)
+                if server is None:
+                    # Chaves de ponto flutuante ou tipos diferentes do driver: compara com tolerância
+                    server = next((values for found, values in current.items()
+                                   if all(_same(x, y) for x, y in zip(found, key))), None)
+                if server is None:
+                    conflicts.append(Conflict(row_index, change, "o registro não existe mais no servidor."))
+                    continue
+                for col, expected in change.original.items():
+                    if not _same(expected, server[col]):
+                        conflicts.append(Conflict(row_index, change, f"'{col}' foi alterado no servidor "
+                                                                      f"(carregado: {expected!r}, atual: {server[col]!r})."))
+                        break
+        return conflicts
+
+    def _statements(self, result: FlushResult):
+        """Gera (tipo, SQL, lote de parâmetros): exclusões, atualizações e inserções, nesta ordem."""
+        table = quote_key_column(self.db_type, self.table_name)
+        key_condition = " AND ".join(f"{quote_key_column(self.db_type, col)} = :k{j}"
+                                     for j, col in enumerate(self.key_columns))
+
+        def key_params(change):
+            return {f"k{j}": change.key_values[col] for j, col in enumerate(self.key_columns)}
+
+        changes = [change for _, change in sorted(self._changes.items())]
+        deletes = [key_params(change) for change in changes if change.kind == KIND_DELETE and not change.new]
+        for batch in _batches(deletes):
+            yield KIND_DELETE, f"DELETE FROM {table} WHERE {key_condition}", batch
+
+        # Atualizações agrupadas pelo conjunto de colunas alteradas (um SQL por grupo)
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for change in changes:
+            if change.kind == KIND_UPDATE:
+                columns = tuple(sorted(change.values))
+                params = key_params(change)
+                params.update({f"v{i}": to_db_value(change.values[col]) for i, col in enumerate(columns)})
+                groups.setdefault(columns, []).append(params)
+        for columns, rows in groups.items():
+            set_clause = ", ".join(f"{quote_key_column(self.db_type, col)} = :v{i}" for i, col in enumerate(columns))
+            for batch in _batches(rows):
+                yield KIND_UPDATE, f"UPDATE {table} SET {set_clause} WHERE {key_condition}", batch
+
+        groups = {}
+        for change in changes:
+            if change.kind == KIND_INSERT:
+                if not change.values:
+                    result.skipped += 1
+                    continue
+                if not self._has_full_key(change):
+                    # Inseridas uma a uma em `_insert_reading_keys`, para ler a chave gerada
+                    continue
+                change.key_values = {col: to_db_value(change.values[col]) for col in self.key_columns}
+                columns = tuple(sorted(change.values))
+                groups.setdefault(columns, []).append(
+                    {f"v{i}": to_db_value(change.values[col]) for i, col in enumerate(columns)})
+        for columns, rows in groups.items():
+            names = ", ".join(quote_key_column(self.db_type, col) for col in columns)
+            placeholders = ", ".join(f":v{i}" for i in range(len(columns)))
+            for batch in _batches(rows):
+                yield KIND_INSERT, f"INSERT INTO {table} ({names}) VALUES ({placeholders})", batch
+
+    # ------------------------------------------------------------------ aplicação local
+
+    def apply_to(self, df: pd.DataFrame, drop_rows: Sequence[int] = ()) -> pd.DataFrame:
+        """
+        Reflete as alterações gravadas no DataFrame da tabela e retorna o DataFrame resultante.
+
+        As linhas inseridas recebem a chave gerada pelo servidor; `drop_rows` são linhas removidas
+        da tabela (ex: novas cuja chave não pôde ser lida, que precisam ser recarregadas).
+        """
+        for row_index, change in self._changes.items():
+            if change.kind == KIND_DELETE or row_index >= len(df):
+                continue
+            values = dict(change.values)
+            if change.kind == KIND_INSERT:
+                values.update(change.key_values)
+            for col, value in values.items():
+                if col in df.columns:
+                    df.iloc[row_index, df.columns.get_loc(col)] = value
+        deleted = [i for i, change in self._changes.items() if change.kind == KIND_DELETE and i < len(df)]
+        deleted = sorted(set(deleted) | {i for i in drop_rows if i < len(df)})
+        if deleted:
+            df = df.drop(df.index[deleted])
+        return df
+
+
+def _batches(rows: List[Dict[str, Any]]):
+    for start in range(0, len(rows), CHANGE_SET_BATCH_SIZE):
+        yield rows[start:start + CHANGE_SET_BATCH_SIZE]
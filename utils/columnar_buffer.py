@@ -0,0 +1,148 @@
+from bisect import bisect_right
+from typing import Any, Iterator, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+
+def _concat_column(parts: List[np.ndarray]) -> np.ndarray:
+    """Concatena os blocos de uma coluna; tipos incompatíveis viram object."""
+    try:
+        return np.concatenate(parts)
+    except (TypeError, ValueError):
+        return np.concatenate([part.astype(object) for part in parts])
+
+
+class ColumnarBuffer:
+    """
+    Armazena um resultado em blocos colunares (um array NumPy por coluna em cada bloco).
+
+    Anexar um bloco custa O(tamanho do bloco), sem copiar o que já foi carregado. A tabela lê
+    janelas de linhas como fatias (sem cópia quando a janela está em um único bloco) e o
+    DataFrame do pandas só é montado quando alguém realmente precisa dele (`to_pandas`).
+    Os blocos são NumPy, e não Arrow, porque a tabela e as análises consomem pandas/NumPy;
+    o pyarrow só é usado na exportação em Parquet.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None):
+        self.columns: List[str] = list(columns) if columns is not None else []
+        self._chunks: List[List[np.ndarray]] = []
+        # Posição inicial de cada bloco; o último elemento é o total de linhas
+        self._offsets: List[int] = [0]
+        self._df_cache: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_dataframe(cls, df: Optional[pd.DataFrame]) -> "ColumnarBuffer":
+        """Cria o buffer a partir de um DataFrame, reaproveitando-o como cache do pandas."""
+        df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+        buffer = cls(df.columns)
+        buffer.append_dataframe(df)
+        buffer._df_cache = df
+        return buffer
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> "ColumnarBuffer":
+        """Cria o buffer a partir de linhas retornadas pelo driver."""
+        buffer = cls(columns)
+        buffer.append_rows(rows)
+        return buffer
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def append_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Anexa um bloco de linhas (tuplas), convertendo-o para colunas."""
+        if rows:
+            self.append_dataframe(pd.DataFrame.from_records(rows, columns=self.columns))
+
+    def append_dataframe(self, df: pd.DataFrame) -> None:
+        """Anexa as linhas do DataFrame como um novo bloco."""
+        if not self.columns:
+            self.columns = list(df.columns)
+        if df.empty:
+            return
+        self._append([df.iloc[:, i].to_numpy() for i in range(df.shape[1])])
+
+    def extend(self, other: "ColumnarBuffer") -> None:
+        """Anexa os blocos de outro buffer (sem copiar os arrays)."""
+        if not self.columns:
+            self.columns = list(other.columns)
+        for chunk in other._chunks:
+            self._append(chunk)
+
+    def _append(self, arrays: List[np.ndarray]) -> None:
+        if not arrays or len(arrays[0]) == 0:
+            return
+        self._chunks.append(arrays)
+        self._offsets.append(self._offsets[-1] + len(arrays[0]))
+        self._df_cache = None
+
+    def iter_chunks(self) -> Iterator[List[np.ndarray]]:
+        """Gera os blocos (um array por coluna) sem copiá-los."""
+        return iter(self._chunks)
+
+    def slice_columns(self, start: int, stop: int) -> List[np.ndarray]:
+        """Retorna um array por coluna com as linhas [start, stop); sem cópia se couberem em um bloco."""
+        start, stop = max(0, start), min(stop, len(self))
+        if start >= stop:
+            return [np.empty(0, dtype=object) for _ in self.columns]
+
+        pieces = []
+        index = bisect_right(self._offsets, start) - 1
+        while start < stop:
+            base = self._offsets[index]
+            end = min(stop, self._offsets[index + 1])
+            pieces.append((index, start - base, end - base))
+            start = end
+            index += 1
+
+        if len(pieces) == 1:
+            index, begin, end = pieces[0]
+            return [array[begin:end] for array in self._chunks[index]]
+        return [_concat_column([self._chunks[i][col][begin:end] for i, begin, end in pieces])
+                for col in range(len(self.columns))]
+
+    def iter_rows(self, start: int, stop: int) -> Iterator[list]:
+        """Gera as linhas [start, stop) como listas de valores."""
+        arrays = self.slice_columns(start, stop)
+        count = len(arrays[0]) if arrays else 0
+        for i in range(count):
+            yield [array[i] for array in arrays]
+
+    def row(self, index: int) -> dict:
+        """Retorna a linha `index` como {coluna: valor}, localizando o bloco por busca binária."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Linha {index} fora do intervalo (0-{len(self) - 1}).")
+        chunk = bisect_right(self._offsets, index) - 1
+        position = index - self._offsets[chunk]
+        return {col: array[position] for col, array in zip(self.columns, self._chunks[chunk])}
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Monta (uma vez) o DataFrame do pandas sobre os arrays consolidados, sem cópia extra."""
+        if self._df_cache is None:
+            if not self._chunks:
+                self._df_cache = pd.DataFrame(columns=self.columns)
+            else:
+                arrays = self._consolidate()
+                df = pd.DataFrame({i: array for i, array in enumerate(arrays)}, copy=False)
+                df.columns = self.columns
+                self._df_cache = df
+        return self._df_cache
+
+    def _consolidate(self) -> List[np.ndarray]:
+        """Une os blocos em um único array por coluna (os blocos antigos são liberados)."""
+        if len(self._chunks) > 1:
+            merged = [_concat_column([chunk[col] for chunk in self._chunks]) for col in range(len(self.columns))]
+            self._chunks = [merged]
+            self._offsets = [0, len(merged[0])]
+        return self._chunks[0]
+
+
+def as_buffer(data: Union[ColumnarBuffer, pd.DataFrame, None]) -> ColumnarBuffer:
+    """Aceita um ColumnarBuffer ou um DataFrame e retorna um ColumnarBuffer."""
+    if isinstance(data, ColumnarBuffer):
+        return data
+    return ColumnarBuffer.from_dataframe(data)
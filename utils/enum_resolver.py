@@ -0,0 +1,155 @@
+import re
+from typing import Dict, List, Optional
+from sqlalchemy import text
+
+# Literais SQL entre aspas simples ('' representa uma aspa escapada)
+_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'")
+# CHECK (coluna IN (...)) dentro do CREATE TABLE do SQLite
+_SQLITE_CHECK_RE = re.compile(r"CHECK\s*\(\s*[`\"\[]?(\w+)[`\"\]]?\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+# Condições que não representam uma lista fechada de valores
+_NON_ENUM_CHECK_RE = re.compile(r"\b(LIKE|BETWEEN|NOT)\b|[<>]", re.IGNORECASE)
+# Literais numéricos sem aspas (não fazem parte de identificadores como col1 ou tabela.col)
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\s*\d+(?:\.\d+)?(?![\w.])")
+# Conversões de tipo do PostgreSQL (ex: ::numeric(10,2), ::character varying(20)), cujos números não são valores
+_CAST_RE = re.compile(r"::\s*\w+(?:\s+varying)?(?:\s*\([\d\s,]*\))?", re.IGNORECASE)
+# Chamadas de função (ex: length(col) = 3): a condição não é uma lista de valores da coluna
+_FUNCTION_CALL_RE = re.compile(r"\b(?!(?:IN|ANY|ARRAY|CHECK|AND|OR)\b)\w+\s*\(", re.IGNORECASE)
+
+
+def _literals(clause: str) -> List[str]:
+    """
+    Extrai os literais de uma cláusula SQL, sem duplicatas e na ordem em que aparecem.
+
+    Usa os literais de texto entre aspas; se não houver nenhum, usa os números sem aspas
+    (ex: `n IN (1, 2)`), devolvidos como texto.
+    """
+    clause = clause or ""
+    found = [value.replace("''", "'") for value in _LITERAL_RE.findall(clause)]
+    if not found:
+        clause = _CAST_RE.sub("", clause)
+        if not _FUNCTION_CALL_RE.search(clause):
+            found = [re.sub(r"\s+", "", value) for value in _NUMBER_RE.findall(clause)]
+    values = []
+    for value in found:
+        if value not in values:
+            values.append(value)
+    return values
+
+
+def parse_check_values(definition: str) -> List[str]:
+    """
+    Retorna os valores permitidos por uma restrição CHECK do tipo lista fechada.
+
+    Aceita as formas `col IN ('a', 'b')`, `col = ANY (ARRAY['a', 'b'])` (PostgreSQL) e
+    `(col = 'a' OR col = 'b')` (SQL Server), com valores de texto ou numéricos.
+    Outras condições retornam lista vazia.
+    """
+    if not definition or _NON_ENUM_CHECK_RE.search(definition):
+        return []
+    if "=" not in definition and not re.search(r"\bIN\s*\(", definition, re.IGNORECASE):
+        return []
+    return _literals(definition)
+
+
+def _normalize_oracle(name: str) -> str:
+    """Converte identificadores Oracle sem aspas (maiúsculos) para minúsculas, como o inspector."""
+    return name.lower() if name == name.upper() else name
+
+
+def _add(result: Dict[str, Dict[str, List[str]]], table: str, column: str, values: List[str]) -> None:
+    if values:
+        result.setdefault(table, {}).setdefault(column, [])
+        result[table][column].extend(v for v in values if v not in result[table][column])
+
+
+def fetch_enum_values(engine, table_name: Optional[str] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Descobre os valores de colunas ENUM/SET e de restrições CHECK em uma única consulta.
+
+    Args:
+        engine: Engine SQLAlchemy.
+        table_name (str, optional): Tabela a consultar; None consulta todo o esquema atual.
+
+    Returns:
+        dict: {tabela: {coluna: [valores]}} apenas para as colunas com lista fechada de valores.
+    """
+    dialect = engine.dialect.name
+    params = {"table_name": table_name} if table_name else {}
+    result: Dict[str, Dict[str, List[str]]] = {}
+
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            table_filter = "AND c.relname = :table_name" if table_name else ""
+            rows = conn.execute(text(f"""
+                SELECT c.relname, a.attname, a.attnum, e.enumsortorder AS ord, e.enumlabel::text AS label, NULL AS definition
+                FROM pg_attribute a
+                JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_type t ON t.oid = a.atttypid
+                JOIN pg_enum e ON e.enumtypid = CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE t.oid END
+                WHERE n.nspname = ANY (current_schemas(false)) AND c.relkind IN ('r', 'p')
+                  AND a.attnum > 0 AND NOT a.attisdropped {table_filter}
+                UNION ALL
+                SELECT c.relname, a.attname, a.attnum, 0, NULL, pg_get_constraintdef(con.oid)
+                FROM pg_constraint con
+                JOIN pg_class c ON c.oid = con.conrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+                WHERE con.contype = 'c' AND array_length(con.conkey, 1) = 1
+                  AND n.nspname = ANY (current_schemas(false)) {table_filter}
+                ORDER BY 1, 3, 4
+            """), params)
+            for table, column, _, _, label, definition in rows:
+                _add(result, table, column, [label] if label is not None else parse_check_values(definition))
+
+        elif dialect in ("mysql", "mariadb"):
+            table_filter = "AND TABLE_NAME = :table_name" if table_name else ""
+            rows = conn.execute(text(f"""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND DATA_TYPE IN ('enum', 'set') {table_filter}
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """), params)
+            for table, column, column_type in rows:
+                _add(result, table, column, _literals(column_type))
+
+        elif dialect == "mssql":
+            table_filter = "AND t.name = :table_name" if table_name else ""
+            rows = conn.execute(text(f"""
+                SELECT t.name, c.name, cc.definition
+                FROM sys.check_constraints cc
+                JOIN sys.tables t ON t.object_id = cc.parent_object_id
+                JOIN sys.columns c ON c.object_id = cc.parent_object_id AND c.column_id = cc.parent_column_id
+                WHERE cc.parent_column_id > 0 AND t.schema_id = SCHEMA_ID() {table_filter}
+                ORDER BY t.name, c.column_id
+            """), params)
+            for table, column, definition in rows:
+                # O SQL Server reescreve IN (...) como (col = 'b' OR col = 'a'): restaura a ordem declarada
+                _add(result, table, column, list(reversed(parse_check_values(definition))))
+
+        elif dialect == "sqlite":
+            table_filter = "AND name = :table_name" if table_name else ""
+            rows = conn.execute(text(f"""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%' {table_filter}
+            """), params)
+            for table, create_sql in rows:
+                for column, values in _SQLITE_CHECK_RE.findall(create_sql or ""):
+                    _add(result, table, column, _literals(values))
+
+        elif dialect == "oracle":
+            table_filter = "AND col.table_name = :table_name" if table_name else ""
+            if table_name and table_name == table_name.lower():
+                params["table_name"] = table_name.upper()
+            rows = conn.execute(text(f"""
+                SELECT col.table_name, col.column_name, con.search_condition
+                FROM user_constraints con
+                JOIN user_cons_columns col
+                  ON con.constraint_name = col.constraint_name AND con.table_name = col.table_name
+                WHERE con.constraint_type = 'C' {table_filter}
+                ORDER BY col.table_name, col.position
+            """), params)
+            for table, column, condition in rows:
+                _add(result, _normalize_oracle(table), _normalize_oracle(column), parse_check_values(str(condition or "")))
+
+    return result
@@ -0,0 +1,340 @@
+import csv
+import datetime
+import decimal
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from utils.keyset_pagination import quote_key_column
+from utils.query_stream import stream_query
+
+# Linhas lidas do cursor do servidor e gravadas por lote
+EXPORT_CHUNK_SIZE = 10_000
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho); além dele, nova planilha
+XLSX_MAX_ROWS = 1_048_576
+# Linhas acumuladas, no máximo, para inferir o esquema do Parquet enquanto houver colunas só com nulos
+PARQUET_SCHEMA_SAMPLE_ROWS = 100_000
+# Escala mínima das colunas decimais do Parquet (precisão 38): lotes seguintes podem ter mais casas
+PARQUET_DECIMAL_SCALE = 18
+
+FORMAT_CSV = "csv"
+FORMAT_CSV_GZ = "csv.gz"
+FORMAT_PARQUET = "parquet"
+FORMAT_JSONL = "jsonl"
+FORMAT_XLSX = "xlsx"
+
+EXPORT_FILE_TYPES = [("CSV", "*.csv"), ("CSV compactado (gzip)", "*.csv.gz"), ("Parquet", "*.parquet"),
+                     ("JSON Lines", "*.jsonl"), ("Excel", "*.xlsx")]
+
+
+def detect_format(path: str) -> str:
+    """Formato da exportação pela extensão do arquivo."""
+    lowered = path.lower()
+    if lowered.endswith((".csv.gz", ".gz")):
+        return FORMAT_CSV_GZ
+    extension = os.path.splitext(lowered)[1].lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return FORMAT_JSONL
+    if extension in (FORMAT_CSV, FORMAT_PARQUET, FORMAT_XLSX):
+        return extension
+    raise ValueError(f"Formato de exportação não suportado: {path}")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class ChunkWriter:
+    """Grava os lotes de linhas de uma exportação no formato do arquivo, sem acumulá-los."""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.path = path
+        self.columns = columns
+
+    def write(self, rows: list) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class CsvWriter(ChunkWriter):
+    def __init__(self, path: str, columns: List[str], compress: bool = False):
+        super().__init__(path, columns)
+        if compress:
+            self._file = gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows: list) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonLinesWriter(ChunkWriter):
+    def __init__(self, path: str, columns: List[str]):
+        super().__init__(path, columns)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: list) -> None:
+        columns = self.columns
+        self._file.write("".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n" for row in rows
+        ))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter(ChunkWriter):
+    """
+    Cada lote vira um row group. O esquema é inferido das primeiras linhas, acumuladas até que toda
+    coluna tenha algum valor (ou até PARQUET_SCHEMA_SAMPLE_ROWS); colunas sem valor na amostra são
+    gravadas como texto. Colunas decimais são alargadas para decimal128(38, escala), e valores
+    posteriores com mais casas que a escala são arredondados para ela.
+    """
+
+    def __init__(self, path: str, columns: List[str]):
+        super().__init__(path, columns)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("A exportação em Parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+        self._pa, self._pq = pa, pq
+        self._writer = None
+        self._schema = None
+        # Linhas guardadas até o esquema ser definido e índices das colunas que já tiveram valor
+        self._pending: list = []
+        self._seen: set = set()
+        # Colunas sem tipo na amostra (só nulos): gravadas como texto
+        self._as_text: List[str] = []
+        # Coluna decimal -> escala no arquivo
+        self._decimal_scales: Dict[str, int] = {}
+
+    def _frame(self, rows: list) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(rows, columns=self.columns)
+        for col in self._as_text:
+            # Lido das linhas originais: no DataFrame, inteiros com nulos já viraram float/NaN
+            index = self.columns.index(col)
+            df[col] = pd.Series([None if row[index] is None else str(row[index]) for row in rows], index=df.index, dtype=object)
+        return df
+
+    def _open(self, rows: list) -> None:
+        """Define o esquema a partir da amostra e abre o arquivo."""
+        pa = self._pa
+        table = pa.Table.from_pandas(self._frame(rows), preserve_index=False)
+        fields = []
+        for field in table.schema:
+            if pa.types.is_null(field.type):
+                self._as_text.append(field.name)
+                field = pa.field(field.name, pa.string())
+            elif pa.types.is_decimal128(field.type):
+                # A amostra define só um mínimo: outros lotes podem ter mais dígitos ou casas decimais
+                scale = min(38, max(field.type.scale, PARQUET_DECIMAL_SCALE))
+                self._decimal_scales[field.name] = scale
+                field = pa.field(field.name, pa.decimal128(38, scale))
+            fields.append(field)
+        self._schema = pa.schema(fields)
+        self._writer = self._pq.ParquetWriter(self.path, self._schema)
+
+    def _write_rows(self, rows: list) -> None:
+        pa = self._pa
+        df = self._frame(rows)
+        try:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        except pa.ArrowInvalid:
+            if not self._decimal_scales:
+                raise
+            # Valores com mais casas decimais que a coluna do arquivo: arredondados para a escala dela
+            context = decimal.Context(prec=76)
+            for col, scale in self._decimal_scales.items():
+                quantum = decimal.Decimal(1).scaleb(-scale)
+                df[col] = df[col].map(lambda value, q=quantum, s=scale: value.quantize(q, context=context)
+                                      if isinstance(value, decimal.Decimal) and value.is_finite()
+                                      and value.as_tuple().exponent < -s else value)
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def write(self, rows: list) -> None:
+        if self._writer is None:
+            self._pending.extend(rows)
+            for index in range(len(self.columns)):
+                if index not in self._seen and any(row[index] is not None for row in rows):
+                    self._seen.add(index)
+            if len(self._seen) < len(self.columns) and len(self._pending) < PARQUET_SCHEMA_SAMPLE_ROWS:
+                return
+            rows, self._pending = self._pending, []
+            self._open(rows)
+        self._write_rows(rows)
+
+    def close(self) -> None:
+        if self._writer is None:
+            rows, self._pending = self._pending, []
+            if rows:
+                self._open(rows)
+                self._write_rows(rows)
+            else:
+                # Resultado vazio: arquivo só com o esquema (colunas como texto)
+                pa = self._pa
+                self._writer = self._pq.ParquetWriter(self.path, pa.schema([pa.field(col, pa.string()) for col in self.columns]))
+        self._writer.close()
+
+
+class XlsxWriter(ChunkWriter):
+    """Planilha em modo de memória constante: cada linha é gravada em disco assim que escrita."""
+
+    def __init__(self, path: str, columns: List[str]):
+        super().__init__(path, columns)
+        try:
+            import xlsxwriter
+        except ImportError as e:
+            raise ImportError("A exportação em Excel requer o pacote 'xlsxwriter' (pip install xlsxwriter).") from e
+        self._workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "remove_timezone": True,
+                                                    "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+        self._sheet = None
+        self._row = XLSX_MAX_ROWS
+        self._sheets = 0
+
+    def _new_sheet(self) -> None:
+        self._sheets += 1
+        self._sheet = self._workbook.add_worksheet(f"Dados{self._sheets if self._sheets > 1 else ''}")
+        self._sheet.write_row(0, 0, self.columns)
+        self._row = 1
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        if value is None or isinstance(value, (str, bool, int, float, decimal.Decimal, datetime.date, datetime.time)):
+            return value
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).hex()
+        return json.dumps(value, ensure_ascii=False, default=_json_default) if isinstance(value, (dict, list)) else str(value)
+
+    def write(self, rows: list) -> None:
+        cell = self._cell
+        for row in rows:
+            if self._row >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.write_row(self._row, 0, [cell(value) for value in row])
+            self._row += 1
+
+    def close(self) -> None:
+        if self._sheet is None:
+            self._new_sheet()
+        self._workbook.close()
+
+
+def open_writer(path: str, columns: List[str], fmt: Optional[str] = None) -> ChunkWriter:
+    """Cria o gravador do formato (pela extensão do arquivo, se não informado)."""
+    fmt = fmt or detect_format(path)
+    if fmt == FORMAT_CSV:
+        return CsvWriter(path, columns)
+    if fmt == FORMAT_CSV_GZ:
+        return CsvWriter(path, columns, compress=True)
+    if fmt == FORMAT_JSONL:
+        return JsonLinesWriter(path, columns)
+    if fmt == FORMAT_PARQUET:
+        return ParquetWriter(path, columns)
+    if fmt == FORMAT_XLSX:
+        return XlsxWriter(path, columns)
+    raise ValueError(f"Formato de exportação não suportado: {fmt}")
+
+
+class ExportStats:
+    """Progresso e vazão de uma exportação."""
+
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.format = fmt
+        self.rows = 0
+        self.cancelled = False
+        self._started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def update(self, rows: int) -> None:
+        self.rows += rows
+        self.elapsed = time.perf_counter() - self._started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_written(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def describe(self) -> str:
+        return (f"{self.rows} linhas em {self.elapsed:.1f}s ({self.rows_per_second:,.0f} linhas/s, "
+                f"{self.bytes_written / (1024 * 1024):.1f} MB)")
+
+
+def export_query(engine, query: str, path: str, params: Optional[Dict[str, Any]] = None, fmt: Optional[str] = None,
+                 chunk_size: int = EXPORT_CHUNK_SIZE, stop_event: Optional[threading.Event] = None,
+                 on_progress: Optional[Callable[[ExportStats], None]] = None) -> ExportStats:
+    """
+    Executa a consulta com um cursor no servidor e grava o resultado no arquivo, lote a lote.
+
+    Apenas um lote fica em memória por vez, qualquer que seja o tamanho do resultado.
+
+    Args:
+        fmt (str, optional): csv, csv.gz, parquet, jsonl ou xlsx (padrão: pela extensão de `path`).
+        stop_event (threading.Event, optional): Interrompe a leitura; o arquivo fica com as linhas já gravadas.
+        on_progress (callable, optional): Recebe o ExportStats após cada lote (na thread da exportação).
+    """
+    fmt = fmt or detect_format(path)
+    stats = ExportStats(path, fmt)
+    writer = None
+    try:
+        for columns, rows in stream_query(engine, query, params, chunk_size, stop_event):
+            if writer is None:
+                writer = open_writer(path, columns, fmt)
+            if rows:
+                writer.write(rows)
+            stats.update(len(rows))
+            if on_progress:
+                on_progress(stats)
+    finally:
+        if writer is not None:
+            writer.close()
+    stats.cancelled = stop_event is not None and stop_event.is_set()
+    return stats
+
+
+def table_query(db_type: str, table_name: str) -> str:
+    """Consulta que lê a tabela inteira."""
+    return f"SELECT * FROM {quote_key_column(db_type, table_name)}"
+
+
+def export_dataframe(df: pd.DataFrame, path: str, fmt: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> ExportStats:
+    """Grava um DataFrame já carregado pelos mesmos gravadores (ex: Excel sem o openpyxl)."""
+    fmt = fmt or detect_format(path)
+    stats = ExportStats(path, fmt)
+    writer = open_writer(path, [str(col) for col in df.columns], fmt)
+    try:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size].astype(object)
+            rows = list(chunk.where(chunk.notna(), None).itertuples(index=False, name=None))
+            writer.write(rows)
+            stats.update(len(rows))
+    finally:
+        writer.close()
+    return stats
@@ -2,6 +2,9 @@ from tkinter import messagebox, simpledialog
 import tkinter as tk
 import traceback
 from DatabaseManager import DatabaseManager, DatabaseUtils
+from config.salavarInfoAllColumn import invalidate_metadata, metadata_profile, set_metadata_ttl
+from utils.job_scheduler import get_scheduler
+from utils.warmup import warm_up
 from utils.logger import log_message as logmessage
 
 def new_profile(self):
@@ -30,7 +33,12 @@ def delete_profile(self):
         return
     
     if messagebox.askyesno("Confirmar Exclusão", f"Tem certeza que deseja excluir o perfil '{profile_name}'?"):
+        profile = self.config_manager.get_profile(profile_name) or {}
         self.config_manager.delete_profile(profile_name)
+        # Os metadados em cache do perfil excluído não serão mais usados
+        if profile.get("db_type"):
+            invalidate_metadata(profile=metadata_profile(profile["db_type"], profile.get("database")),
+                                log_message=lambda message, level="info": log_message(self, message, level))
         self.log_message(f"Perfil '{profile_name}' excluído com sucesso.", "info")
         
         # Atualizar lista de perfis e limpar seleção atual
@@ -46,7 +54,8 @@ def test_connection(self):
         "port": self.port_var.get(),
         "user": self.user_var.get(),
         "password": self.password_var.get(),
-        "database": self.database_var.get()
+        "database": self.database_var.get(),
+        "pool": self.config_manager.get_pool_options(self.current_profile.get())
     }
     
     log_message(self,f"Testando conexão com {db_type}...")
@@ -75,6 +84,9 @@ def disconnect(self):
         try:
             self.connection.close()
             self.connection = None
+            # Fecha as conexões do pool e remove o engine do registro
+            DatabaseManager.dispose_engine(self.engine)
+            self.engine = None
             self.connection_status.set("Desconectado")
             self.button_mb.pack_forget()
             self.status_label.config(foreground="#dc3545")
@@ -146,9 +158,10 @@ def save_profile(self):
         "port": str(self.port_var.get()),  # Garantir que seja string
         "user": self.user_var.get(),
         "password": self.password_var.get(),
-        "database": self.database_var.get()
+        "database": self.database_var.get(),
+        "pool": self.config_manager.get_pool_options(profile_name),
+        "metadata_ttl": self.config_manager.get_metadata_ttl(profile_name)
     }
-    print(f'config = {config}')
     self.config_manager.save_profile(name=profile_name, config=config)
     log_message(self,f"Perfil '{profile_name}' salvo com sucesso.", "success")
     
@@ -168,6 +181,7 @@ def _connect_thread(self, db_type, config):
         
         # Conectar
         self.connection,self.engine = DatabaseManager.connect(db_type, config)
+        _warm_up_connection(self, db_type, config)
         # Atualizar UI
         self.root.after(0, lambda: _update_connection_status(self=self,success=True,message= f"Conectado ao {db_type} com sucesso!"))
         
@@ -183,6 +197,17 @@ def _connect_thread(self, db_type, config):
         error_msg = str(e)
         self.root.after(0, lambda: _update_connection_status(self=self,success=False, message=f"Erro ao conectar ao {db_type}: {error_msg}"))
 
+def _warm_up_connection(self, db_type, config):
+    """Aquece a conexão recém-aberta (pool, esquema e valores ENUM) e relata o progresso no log."""
+    def _report(message, level="info"):
+        # Chamado das tarefas de aquecimento: a mensagem é entregue na thread da interface
+        get_scheduler().call_in_ui(log_message, self, message, level)
+
+    profile = metadata_profile(db_type, config.get("database"))
+    # Validade dos metadados em cache do perfil (entradas mais antigas são descartadas ao ler)
+    set_metadata_ttl(profile, config.get("metadata_ttl", self.config_manager.DEFAULT_METADATA_TTL), log_message=_report)
+    warm_up(self.engine, profile=profile, on_progress=_report)
+
 def validate_connection_fields(self):
     """Validate connection fields before attempting to connect."""
     errors = []
@@ -0,0 +1,118 @@
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from utils.logger import logger
+
+# Intervalo (segundos) entre verificações com a conexão saudável
+HEALTH_CHECK_INTERVAL = 15.0
+# Espera máxima (segundos) entre tentativas após falhas consecutivas
+HEALTH_MAX_BACKOFF = 120.0
+# Latência (ms) acima da qual a conexão é considerada lenta
+HEALTH_SLOW_MS = 500.0
+
+STATE_CHECKING = "Verificando"
+STATE_CONNECTED = "Conectado"
+STATE_SLOW = "Lento"
+STATE_DISCONNECTED = "Desconectado"
+
+_PING_SQL = {"oracle": "SELECT 1 FROM DUAL"}
+
+
+class HealthStatus:
+    """Resultado de uma verificação de saúde da conexão."""
+
+    def __init__(self, state: str, latency_ms: Optional[float] = None, error: Optional[Exception] = None,
+                 failures: int = 0, next_check: float = 0.0):
+        self.state = state
+        self.latency_ms = latency_ms
+        self.error = error
+        # Falhas consecutivas e segundos até a próxima verificação
+        self.failures = failures
+        self.next_check = next_check
+
+    @property
+    def is_connected(self) -> bool:
+        return self.state in (STATE_CONNECTED, STATE_SLOW)
+
+
+class HealthMonitor:
+    """
+    Verifica periodicamente a conexão em uma thread de fundo, com um ping pelo pool do engine.
+
+    Mede a latência de ida e volta (checkout + consulta trivial). Após uma falha, o pool é
+    descartado (as conexões mortas são fechadas e novas são abertas na próxima verificação) e
+    o intervalo dobra a cada falha consecutiva, até `max_backoff`.
+    """
+
+    def __init__(self, engine, on_status: Callable[[HealthStatus], None], interval: float = HEALTH_CHECK_INTERVAL,
+                 max_backoff: float = HEALTH_MAX_BACKOFF, slow_ms: float = HEALTH_SLOW_MS):
+        self.engine = engine
+        # Chamado a cada verificação, na thread do monitor
+        self.on_status = on_status
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.slow_ms = slow_ms
+        self.status = HealthStatus(STATE_CHECKING)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def check_now(self) -> None:
+        """Antecipa a próxima verificação (sem bloquear quem chama)."""
+        self._wake.set()
+
+    def ping(self) -> float:
+        """Executa o ping pelo pool e retorna a latência em milissegundos."""
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            conn.execute(text(_PING_SQL.get(self.engine.dialect.name, "SELECT 1"))).scalar()
+        return (time.perf_counter() - started) * 1000
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                latency = self.ping()
+                failures = 0
+                delay = self.interval
+                state = STATE_SLOW if latency > self.slow_ms else STATE_CONNECTED
+                self.status = HealthStatus(state, latency_ms=latency, next_check=delay)
+            except PoolTimeoutError as e:
+                # Pool esgotado pelas consultas em andamento: o servidor responde, não há o que reiniciar
+                delay = self.interval
+                self.status = HealthStatus(STATE_SLOW, error=e, next_check=delay)
+            except Exception as e:
+                failures += 1
+                delay = min(self.interval * 2 ** (failures - 1), self.max_backoff)
+                self.status = HealthStatus(STATE_DISCONNECTED, error=e, failures=failures, next_check=delay)
+                self._reset_pool()
+            if self._stop.is_set():
+                break
+            try:
+                self.on_status(self.status)
+            except Exception as e:
+                logger.error(f"Erro ao notificar o estado da conexão: {e}\n{traceback.format_exc()}")
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _reset_pool(self) -> None:
+        """Fecha as conexões ociosas do pool (provavelmente mortas); as em uso são descartadas ao voltar."""
+        try:
+            self.engine.dispose()
+            logger.warning("Falha no ping da conexão: pool de conexões reiniciado.")
+        except Exception as e:
+            logger.error(f"Erro ao reiniciar o pool de conexões: {e}")
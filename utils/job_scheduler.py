@@ -0,0 +1,192 @@
+import heapq
+import itertools
+import queue
+import threading
+import traceback
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from utils.logger import logger
+
+# Prioridades: menor valor é executado primeiro
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+# Threads de trabalho (menor que o pool de conexões padrão do SQLAlchemy: 5 + overflow)
+MAX_WORKERS = 4
+# Tarefas simultâneas por grupo (aba); as demais aguardam na fila do grupo
+GROUP_MAX_RUNNING = 2
+# Intervalo (ms) de leitura da fila de resultados na thread da interface
+UI_POLL_MS = 30
+
+
+class ScheduledTask:
+    """Tarefa agendada no JobScheduler."""
+
+    def __init__(self, seq: int, fn: Callable, args: tuple, priority: int, group: Any,
+                 on_done: Optional[Callable[[Any], None]], on_error: Optional[Callable[[Exception], None]]):
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self.started = False
+        self.finished = threading.Event()
+
+    def __lt__(self, other: "ScheduledTask") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def cancel(self) -> bool:
+        """Descarta a tarefa se ainda não começou; retorna True se foi descartada."""
+        if self.started:
+            return False
+        self.cancelled = True
+        return True
+
+
+class JobScheduler:
+    """
+    Executor central das tarefas em segundo plano.
+
+    Um número limitado de threads atende uma fila de prioridades (interativas antes das de
+    carga em massa). Cada grupo (normalmente uma aba) tem no máximo `group_max_running`
+    tarefas em execução; as seguintes aguardam na fila do grupo. Os resultados e as
+    atualizações de widgets são entregues à thread do Tk por uma única fila lida com `after`.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, group_max_running: int = GROUP_MAX_RUNNING):
+        self.max_workers = max_workers
+        self.group_max_running = group_max_running
+        self._ready: list = []
+        self._groups_running: Dict[Any, int] = {}
+        self._groups_waiting: Dict[Any, deque] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._workers: list = []
+        self._idle = 0
+        self._ui_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._ui_widget = None
+
+    # ------------------------------------------------------------------ agendamento
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE, group: Any = None,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None) -> ScheduledTask:
+        """
+        Agenda `fn(*args)`.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE ou PRIORITY_BULK.
+            group (Any, optional): Chave do grupo (ex: a aba) para limitar a concorrência.
+            on_done (callable, optional): Recebe o retorno de `fn` na thread da interface.
+            on_error (callable, optional): Recebe a exceção na thread da interface.
+        """
+        task = ScheduledTask(next(self._seq), fn, args, priority, group, on_done, on_error)
+        with self._cond:
+            if group is not None and self._groups_running.get(group, 0) >= self.group_max_running:
+                self._groups_waiting.setdefault(group, deque()).append(task)
+            else:
+                self._make_ready(task)
+        return task
+
+    def _make_ready(self, task: ScheduledTask) -> None:
+        """Coloca a tarefa na fila de execução (chamado com o lock)."""
+        if task.group is not None:
+            self._groups_running[task.group] = self._groups_running.get(task.group, 0) + 1
+        heapq.heappush(self._ready, task)
+        if len(self._ready) > self._idle and len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{len(self._workers) + 1}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+        self._cond.notify()
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not self._ready:
+                    self._cond.wait()
+                self._idle -= 1
+                task = heapq.heappop(self._ready)
+                task.started = True
+            try:
+                if not task.cancelled:
+                    self._run(task)
+            finally:
+                task.finished.set()
+                self._release_group(task)
+
+    def _run(self, task: ScheduledTask) -> None:
+        try:
+            result = task.fn(*task.args)
+        except Exception as e:
+            if task.on_error:
+                self.call_in_ui(task.on_error, e)
+            else:
+                logger.error(f"Erro na tarefa em segundo plano: {e}\n{traceback.format_exc()}")
+            return
+        if task.on_done:
+            self.call_in_ui(task.on_done, result)
+
+    def _release_group(self, task: ScheduledTask) -> None:
+        """Libera a vaga do grupo e promove a próxima tarefa pendente dele."""
+        if task.group is None:
+            return
+        with self._cond:
+            self._groups_running[task.group] -= 1
+            waiting = self._groups_waiting.get(task.group)
+            while waiting:
+                candidate = waiting.popleft()
+                if not candidate.cancelled:
+                    self._make_ready(candidate)
+                    break
+                candidate.finished.set()
+            if not waiting:
+                self._groups_waiting.pop(task.group, None)
+            if self._groups_running[task.group] <= 0:
+                del self._groups_running[task.group]
+
+    # ------------------------------------------------------------------ thread da interface
+
+    def attach_ui(self, widget) -> None:
+        """Passa a entregar resultados na thread do Tk, lendo a fila com `widget.after`."""
+        self._ui_widget = widget
+        widget.after(UI_POLL_MS, self._poll_ui)
+
+    def call_in_ui(self, fn: Callable, *args) -> None:
+        """Executa `fn(*args)` na thread da interface (imediatamente, se não houver interface)."""
+        if self._ui_widget is None:
+            fn(*args)
+            return
+        self._ui_queue.put((fn, args))
+
+    def _poll_ui(self) -> None:
+        try:
+            while True:
+                fn, args = self._ui_queue.get_nowait()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    logger.error(f"Erro ao atualizar a interface: {e}\n{traceback.format_exc()}")
+        except queue.Empty:
+            pass
+        try:
+            self._ui_widget.after(UI_POLL_MS, self._poll_ui)
+        except Exception:
+            # Janela destruída: para de ler a fila
+            self._ui_widget = None
+
+
+_scheduler: Optional[JobScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Retorna o executor compartilhado pela aplicação."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
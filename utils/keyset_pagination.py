@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional, Sequence
+from config.SchemaSnapshot import SchemaSnapshot
+from utils.validarText import quote_identifier
+
+# Prefixo dos parâmetros vinculados do cursor (evita colisão com os parâmetros dos filtros)
+KEYSET_PARAM_PREFIX = "keyset_"
+
+
+def dialect_family(db_type: str) -> str:
+    """Normaliza o tipo de banco para a família de dialeto usada na geração de SQL."""
+    db_type = (db_type or "").strip().lower()
+    if db_type in ("postgresql", "postgres", "pg"):
+        return "postgresql"
+    if db_type in ("mysql", "mariadb"):
+        return "mysql"
+    if db_type in ("mssql", "sql server", "sqlserver"):
+        return "mssql"
+    if db_type == "oracle":
+        return "oracle"
+    return "sqlite"
+
+
+def quote_key_column(db_type: str, column: str) -> str:
+    """Aplica as aspas corretas a uma coluna chave conforme o dialeto."""
+    family = dialect_family(db_type)
+    if family == "oracle":
+        # O inspector normaliza identificadores sem aspas do Oracle para minúsculas
+        return column.upper() if column == column.lower() else f'"{column}"'
+    if family == "sqlite":
+        return f'"{column}"'
+    return quote_identifier(family, column)
+
+
+def get_primary_key_columns(engine, table_name: str) -> List[str]:
+    """
+    Retorna as colunas da chave primária real da tabela (em cache no retrato do esquema).
+
+    Sem chave primária, usa a primeira restrição (ou índice) única cujas colunas sejam NOT NULL.
+    Retorna lista vazia se nenhuma chave estável existir.
+    """
+    return SchemaSnapshot.for_engine(engine).get_key_columns(table_name)
+
+
+def last_key_values(df, key_columns: Sequence[str]) -> Optional[tuple]:
+    """Retorna os valores das colunas chave da última linha do DataFrame (cursor da próxima página)."""
+    if df is None or df.empty:
+        return None
+    last_row = df.iloc[-1]
+    values = []
+    for col in key_columns:
+        value = last_row[col]
+        # Converte escalares numpy para tipos Python aceitos pelos drivers
+        values.append(value.item() if hasattr(value, "item") else value)
+    return tuple(values)
+
+
+def _keyset_condition(family: str, quoted: List[str], names: List[str]) -> str:
+    """Gera a condição "linha > cursor" para chaves simples ou compostas."""
+    if len(quoted) == 1:
+        return f"{quoted[0]} > :{names[0]}"
+
+    if family in ("postgresql", "sqlite"):
+        # Comparação de valores de linha, resolvida como busca por intervalo no índice
+        return f"({', '.join(quoted)}) > ({', '.join(':' + n for n in names)})"
+
+    # Forma expandida com predicado inicial >= para manter o uso do índice (MySQL, SQL Server, Oracle)
+    def expand(i: int) -> str:
+        if i == len(quoted) - 1:
+            return f"{quoted[i]} > :{names[i]}"
+        return f"{quoted[i]} > :{names[i]} OR ({quoted[i]} = :{names[i]} AND ({expand(i + 1)}))"
+
+    return f"{quoted[0]} >= :{names[0]} AND ({expand(0)})"
+
+
+def build_keyset_query(base_query: str, filters: Optional[List[str]], key_columns: Sequence[str],
+                       last_values: Optional[Sequence[Any]], max_rows: int, db_type: str,
+                       params: Dict[str, Any]) -> str:
+    """
+    Gera a query de uma página por keyset (sem OFFSET), com cursor em parâmetros vinculados.
+
+    Args:
+        base_query (str): Query base (ex: 'SELECT * FROM tabela').
+        filters (list, optional): Condições de filtro já parametrizadas.
+        key_columns (list): Colunas da chave (simples ou composta) que definem a ordem estável.
+        last_values (tuple, optional): Valores da chave da última linha carregada; None para a primeira página.
+        max_rows (int): Número máximo de linhas da página.
+        db_type (str): Tipo de banco de dados.
+        params (dict): Parâmetros da query; os valores do cursor são adicionados aqui.
+
+    Returns:
+        str: Query SQL final formatada.
+    """
+    if not key_columns:
+        raise ValueError("Paginação por keyset requer ao menos uma coluna chave.")
+
+    family = dialect_family(db_type)
+    quoted = [quote_key_column(db_type, col) for col in key_columns]
+    conditions = [f"({condition})" for condition in (filters or [])]
+
+    if last_values is not None:
+        names = [f"{KEYSET_PARAM_PREFIX}{i}" for i in range(len(key_columns))]
+        for name, value in zip(names, last_values):
+            params[name] = value
+        conditions.append(f"({_keyset_condition(family, quoted, names)})")
+
+    query_string = base_query
+    if conditions:
+        query_string += f" WHERE {' AND '.join(conditions)}"
+
+    order_by = ", ".join(f"{col} ASC" for col in quoted)
+    max_rows = int(max_rows)
+
+    if family == "mssql":
+        return f"{query_string} ORDER BY {order_by} OFFSET 0 ROWS FETCH NEXT {max_rows} ROWS ONLY"
+    if family == "oracle":
+        return f"SELECT * FROM ({query_string} ORDER BY {order_by}) WHERE ROWNUM <= {max_rows}"
+    return f"{query_string} ORDER BY {order_by} LIMIT {max_rows}"
@@ -0,0 +1,275 @@
+import re
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, String, Time, and_, bindparam, cast, column, or_
+from sqlalchemy.dialects import mssql, mysql, oracle, postgresql, sqlite
+
+# Separador de listas de valores (IN) e de intervalos (BETWEEN)
+LIST_SEPARATOR = ","
+RANGE_SEPARATOR = ".."
+# Curinga usado pelo usuário nos filtros de texto (abc* = começa com, *abc = contém)
+WILDCARD = "*"
+# Caractere de escape dos padrões LIKE
+LIKE_ESCAPE = "/"
+
+_OPERATOR_RE = re.compile(r"^(>=|<=|<>|!=|>|<|=)\s*(.+)$")
+_BOOLEAN_MAP = {"true": True, "1": True, "yes": True, "sim": True,
+                "false": False, "0": False, "no": False, "não": False}
+
+# Formatos de data aceitos e a granularidade do intervalo que representam
+_DATE_FORMATS: List[Tuple[str, str]] = [
+    ("%Y-%m-%d %H:%M:%S.%f", "microsecond"),
+    ("%Y-%m-%d %H:%M:%S", "second"),
+    ("%Y-%m-%dT%H:%M:%S", "second"),
+    ("%Y-%m-%d %H:%M", "minute"),
+    ("%Y-%m-%d %H", "hour"),
+    ("%Y-%m-%d", "day"),
+    ("%m/%d/%y %H:%M:%S", "second"),
+    ("%m/%d/%y %H:%M", "minute"),
+    ("%m/%d/%y %H", "hour"),
+    ("%m/%d/%y", "day"),
+    ("%d/%m/%Y", "day"),
+    ("%Y-%m", "month"),
+    ("%m/%Y", "month"),
+    ("%Y", "year"),
+]
+_TIME_FORMATS: List[Tuple[str, str]] = [
+    ("%H:%M:%S", "second"),
+    ("%H:%M", "minute"),
+    ("%H", "hour"),
+]
+_STEPS = {
+    "microsecond": timedelta(microseconds=1),
+    "second": timedelta(seconds=1),
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def dialect_for(db_type: str):
+    """Retorna o dialeto SQLAlchemy do banco com parâmetros nomeados (:nome), compatíveis com text()."""
+    db_type = (db_type or "").strip().lower()
+    if db_type in ("postgresql", "postgres", "pg"):
+        # Driver fixo: o padrão do SQLAlchemy 2.1 (psycopg 3) renderiza `:nome::TIPO`, que text() não reconhece
+        dialect_cls = postgresql.psycopg2.dialect
+    elif db_type in ("mysql", "mariadb"):
+        dialect_cls = mysql.dialect
+    elif db_type in ("mssql", "sql server", "sqlserver"):
+        dialect_cls = mssql.dialect
+    elif db_type == "oracle":
+        dialect_cls = oracle.dialect
+    else:
+        dialect_cls = sqlite.dialect
+    return dialect_cls(paramstyle="named")
+
+
+def _interval_end(start: datetime, granularity: str) -> datetime:
+    """Retorna o fim (exclusivo) do intervalo que começa em `start` com a granularidade dada."""
+    if granularity == "year":
+        return start.replace(year=start.year + 1)
+    if granularity == "month":
+        return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start + _STEPS[granularity]
+
+
+def parse_date_interval(value: str, time_only: bool = False) -> Tuple[datetime, datetime]:
+    """
+    Converte o texto digitado em um intervalo semiaberto [início, fim).
+
+    Ex: '2024' cobre o ano inteiro, '2024-03' o mês, '2024-03-05' o dia e
+    '2024-03-05 10:30' o minuto.
+    """
+    for fmt, granularity in (_TIME_FORMATS if time_only else _DATE_FORMATS):
+        try:
+            start = datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+        return start, _interval_end(start, granularity)
+    formats = ", ".join(fmt for fmt, _ in (_TIME_FORMATS if time_only else _DATE_FORMATS))
+    raise ValueError(f"Formato inválido para '{value}'. Formatos permitidos: {formats}")
+
+
+class PredicateCompiler:
+    """
+    Converte o texto de um filtro em uma expressão SQLAlchemy Core que usa índices (sargable).
+
+    Sintaxe aceita no valor do filtro:
+        * `valor`            igualdade (datas viram o intervalo do dia/mês/ano digitado)
+        * `a, b, c`          lista (IN)
+        * `>= 10`, `< 2024`  comparação (também >, <=, <>)
+        * `10..20`           intervalo inclusivo (BETWEEN)
+        * `abc*` / `*abc`    texto que começa com / contém
+    """
+
+    def __init__(self, db_type: str):
+        self.db_type = db_type
+        self.dialect = dialect_for(db_type)
+        self._is_sqlite = self.dialect.name == "sqlite"
+
+    def compile(self, col_name: str, col_type: Any, value: str, params: Dict[str, Any],
+                enum_values: Optional[List[str]] = None) -> str:
+        """Retorna o predicado SQL renderizado para o dialeto e adiciona seus parâmetros em `params`."""
+        expression = self.build(col_name, col_type, value, enum_values, taken=params)
+        compiled = expression.compile(dialect=self.dialect)
+        params.update(compiled.params)
+        return str(compiled)
+
+    def build(self, col_name: str, col_type: Any, value: str, enum_values: Optional[List[str]] = None,
+              taken: Optional[Dict[str, Any]] = None):
+        """Monta a expressão Core do filtro da coluna; `taken` são os parâmetros já usados na consulta."""
+        value = (value or "").strip()
+        if value == "":
+            raise ValueError(f"Valor inválido para '{col_name}': campo não pode estar vazio.")
+
+        self._taken = taken if taken is not None else {}
+        self._bind_count = 0
+        col = column(col_name)
+        col_type_str = str(col_type).lower()
+
+        if enum_values:
+            return self._equality(col, value, str)
+        if "uuid" in col_type_str:
+            return self._equality(col, value, lambda v: str(uuid.UUID(v)))
+        if "bool" in col_type_str or isinstance(col_type, Boolean):
+            return self._equality(col, value, self._to_bool)
+        if isinstance(col_type, (Date, DateTime, Time)) or any(t in col_type_str for t in ("date", "timestamp", "time")):
+            return self._temporal(col, col_type, col_type_str, value)
+        if self._is_numeric(col_type, col_type_str):
+            is_integer = isinstance(col_type, Integer) or "int" in col_type_str
+            return self._comparison(col, value, lambda v: self._to_number(v, is_integer))
+        if "json" in col_type_str:
+            # JSON não tem índice B-tree utilizável: mantém a busca por conteúdo no texto
+            return cast(col, String).like(self._bind(f"%{self._escape_like(value.strip(WILDCARD))}%"), escape=LIKE_ESCAPE)
+        if any(t in col_type_str for t in ("text", "char", "clob", "string")) or isinstance(col_type, String):
+            return self._text(col, value)
+        raise TypeError(f"Tipo de coluna '{col_type}' não suportado para filtros.")
+
+    # ------------------------------------------------------------------ construtores
+
+    def _bind(self, value: Any):
+        """
+        Cria um parâmetro vinculado `f_<n>`, numerado sem depender do nome da coluna (colunas como
+        'a b' e 'a_b' gerariam o mesmo nome) e sem repetir os parâmetros já usados na consulta.
+        """
+        self._bind_count += 1
+        while f"f_{self._bind_count}" in self._taken:
+            self._bind_count += 1
+        return bindparam(f"f_{self._bind_count}", value)
+
+    def _split_list(self, value: str) -> List[str]:
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+    def _equality(self, col, value: str, convert):
+        items = self._split_list(value)
+        if len(items) > 1:
+            return col.in_([self._bind(convert(item)) for item in items])
+        return col == self._bind(convert(value))
+
+    def _comparison(self, col, value: str, convert):
+        """Igualdade, lista, operadores e BETWEEN para valores escalares (números)."""
+        match = _OPERATOR_RE.match(value)
+        if match:
+            operator, operand = match.groups()
+            bound = self._bind(convert(operand))
+            return {
+                ">=": col >= bound, "<=": col <= bound, ">": col > bound, "<": col < bound,
+                "=": col == bound, "<>": col != bound, "!=": col != bound,
+            }[operator]
+        if RANGE_SEPARATOR in value:
+            low, high = value.split(RANGE_SEPARATOR, 1)
+            return col.between(self._bind(convert(low.strip())), self._bind(convert(high.strip())))
+        return self._equality(col, value, convert)
+
+    def _temporal(self, col, col_type, col_type_str: str, value: str):
+        """Datas viram intervalos semiabertos (>= início AND < fim), que usam o índice da coluna."""
+        time_only = isinstance(col_type, Time) or col_type_str == "time"
+        date_only = isinstance(col_type, Date) or col_type_str == "date"
+
+        def bounds(text_value: str) -> Tuple[Any, Any]:
+            start, end = parse_date_interval(text_value, time_only)
+            return self._temporal_value(start, time_only, date_only), self._temporal_value(end, time_only, date_only)
+
+        match = _OPERATOR_RE.match(value)
+        if match:
+            operator, operand = match.groups()
+            start, end = bounds(operand)
+            if operator == ">=":
+                return col >= self._bind(start)
+            if operator == ">":
+                return col >= self._bind(end)
+            if operator == "<":
+                return col < self._bind(start)
+            if operator == "<=":
+                return col < self._bind(end)
+            if operator in ("<>", "!="):
+                return ~and_(col >= self._bind(start), col < self._bind(end))
+            value = operand
+
+        if RANGE_SEPARATOR in value:
+            low, high = value.split(RANGE_SEPARATOR, 1)
+            return and_(col >= self._bind(bounds(low)[0]), col < self._bind(bounds(high)[1]))
+
+        items = self._split_list(value)
+        if len(items) > 1:
+            return or_(*[and_(col >= self._bind(start), col < self._bind(end)) for start, end in map(bounds, items)])
+
+        start, end = bounds(value)
+        return and_(col >= self._bind(start), col < self._bind(end))
+
+    def _temporal_value(self, moment: datetime, time_only: bool, date_only: bool) -> Any:
+        """Converte o limite do intervalo no tipo adequado ao driver (texto ISO no SQLite)."""
+        if time_only:
+            if moment.date() != datetime(1900, 1, 1).date():
+                # Fim do intervalo além da meia-noite: limite superior do dia
+                return "24:00:00" if self._is_sqlite else time.max
+            return moment.strftime("%H:%M:%S") if self._is_sqlite else moment.time()
+        if self._is_sqlite:
+            # Datas no SQLite são texto ISO: a comparação lexicográfica preserva a ordem
+            if moment.time() == time(0, 0):
+                return moment.strftime("%Y-%m-%d")
+            return moment.isoformat(sep=" ")
+        return moment.date() if date_only else moment
+
+    def _text(self, col, value: str):
+        """Texto: igualdade e listas por padrão; `abc*` usa LIKE por prefixo (sargable)."""
+        if value.startswith(WILDCARD):
+            # Busca por conteúdo pedida explicitamente (não usa índice)
+            return col.like(self._bind(f"%{self._escape_like(value.strip(WILDCARD))}%"), escape=LIKE_ESCAPE)
+        if value.endswith(WILDCARD):
+            return col.like(self._bind(f"{self._escape_like(value.rstrip(WILDCARD))}%"), escape=LIKE_ESCAPE)
+        match = _OPERATOR_RE.match(value)
+        if match and match.group(1) != "=":
+            return self._comparison(col, value, str)
+        if match:
+            value = match.group(2)
+        return self._equality(col, value, str)
+
+    # ------------------------------------------------------------------ conversões
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", f"{LIKE_ESCAPE}%").replace("_", f"{LIKE_ESCAPE}_")
+
+    @staticmethod
+    def _is_numeric(col_type: Any, col_type_str: str) -> bool:
+        if isinstance(col_type, (Numeric, Integer)):
+            return True
+        return any(t in col_type_str for t in ("numeric", "int", "decimal", "float", "double", "real", "number", "money"))
+
+    def _to_number(self, value: str, is_integer: bool):
+        try:
+            if is_integer:
+                return int(value)
+            # O driver sqlite3 não aceita Decimal
+            return float(value) if self._is_sqlite else Decimal(value)
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Valor numérico inválido: '{value}'.")
+
+    @staticmethod
+    def _to_bool(value: str) -> bool:
+        if value.lower() not in _BOOLEAN_MAP:
+            raise ValueError(f"Valor inválido para booleano: '{value}'.")
+        return _BOOLEAN_MAP[value.lower()]
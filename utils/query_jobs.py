@@ -0,0 +1,245 @@
+import threading
+import traceback
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import event, text
+from utils.job_scheduler import PRIORITY_INTERACTIVE, ScheduledTask, get_scheduler
+from utils.logger import logger
+
+_local = threading.local()
+# Engines que já têm os eventos de rastreamento de conexões registrados
+_instrumented_engines: "weakref.WeakSet[Any]" = weakref.WeakSet()
+_instrument_lock = threading.Lock()
+# id da conexão DBAPI -> trabalho que a obteve do pool (até ela ser devolvida, em qualquer thread)
+_owners: Dict[int, "QueryJob"] = {}
+_owners_lock = threading.Lock()
+
+
+class QueryCancelled(Exception):
+    """Consulta recusada porque o trabalho que a executaria já foi cancelado."""
+
+
+def current_job() -> Optional["QueryJob"]:
+    """Retorna o trabalho em execução na thread atual, se houver."""
+    return getattr(_local, "job", None)
+
+
+def _instrument(engine) -> None:
+    """Registra (uma vez por engine) os eventos que associam conexões e cursores ao trabalho da thread."""
+    with _instrument_lock:
+        if engine in _instrumented_engines:
+            return
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            job = current_job()
+            if job is not None:
+                job._attach(dbapi_connection)
+
+        def on_checkin(dbapi_connection, connection_record):
+            # A conexão pode ser devolvida por outra thread (ex: resultado mantido aberto entre tarefas)
+            with _owners_lock:
+                job = _owners.pop(id(dbapi_connection), None)
+            if job is not None:
+                job._detach(dbapi_connection)
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            dbapi_connection = conn.connection.dbapi_connection
+            with _owners_lock:
+                job = _owners.get(id(dbapi_connection))
+            if job is not None:
+                if job.stop_event.is_set():
+                    # Cancelado antes de a consulta começar: nem a envia ao servidor
+                    raise QueryCancelled(f"Trabalho '{job.name}' cancelado.")
+                job._track_cursor(dbapi_connection, cursor)
+
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "checkin", on_checkin)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        _instrumented_engines.add(engine)
+
+
+class QueryJob:
+    """
+    Trabalho de consulta em segundo plano que pode ser cancelado de verdade.
+
+    As conexões obtidas do pool pelas threads do trabalho são rastreadas; ao cancelar, além de
+    sinalizar `stop_event`, a consulta em andamento é interrompida no servidor com o comando
+    nativo do dialeto (pg_cancel_backend, KILL QUERY, sqlite3 interrupt, cancelamento do cursor
+    no SQL Server/Oracle). As tarefas do trabalho rodam no JobScheduler, no grupo informado.
+    """
+
+    def __init__(self, engine, target: Callable, *args, name: str = "consulta", after: Optional["QueryJob"] = None,
+                 group: Any = None, priority: int = PRIORITY_INTERACTIVE):
+        self.engine = engine
+        self.name = name
+        self.group = group
+        self.priority = priority
+        self.stop_event = threading.Event()
+        self.done = threading.Event()
+        self.done.set()
+        self.cancelled = False
+        self.task: Optional[ScheduledTask] = None
+        self._target = target
+        self._args = args
+        self._after = after
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done_callbacks: List[Callable[["QueryJob"], None]] = []
+        # id da conexão DBAPI -> (conexão, identificador da sessão no servidor)
+        self._connections: Dict[int, tuple] = {}
+        self._cursors: Dict[int, Any] = {}
+        _instrument(engine)
+
+    def start(self) -> "QueryJob":
+        """Inicia o trabalho; se houver um trabalho anterior, ele é cancelado e a execução só começa após o fim dele."""
+        with self._lock:
+            self._pending += 1
+            self.done.clear()
+
+        def _submit(_previous=None):
+            if self.stop_event.is_set():
+                self._task_finished()
+                return
+            self.task = self._submit(self._target, self._args, self.priority, counted=True)
+
+        if self._after is not None and self._after.is_running:
+            self._after.cancel()
+            # Não ocupa uma thread do executor esperando: agenda quando o anterior terminar
+            self._after.add_done_callback(_submit)
+        else:
+            _submit()
+        return self
+
+    def spawn(self, target: Callable, *args, priority: Optional[int] = None) -> ScheduledTask:
+        """Agenda `target` como mais uma tarefa do trabalho (conexões também rastreadas)."""
+        return self._submit(target, args, self.priority if priority is None else priority)
+
+    def _submit(self, target: Callable, args: tuple, priority: int, counted: bool = False) -> ScheduledTask:
+        if not counted:
+            with self._lock:
+                self._pending += 1
+                self.done.clear()
+
+        def _run():
+            _local.job = self
+            try:
+                target(*args)
+            except Exception as e:
+                logger.error(f"Erro no trabalho '{self.name}': {e}\n{traceback.format_exc()}")
+            finally:
+                _local.job = None
+                self._task_finished()
+
+        return get_scheduler().submit(_run, priority=priority, group=self.group)
+
+    @property
+    def is_running(self) -> bool:
+        return not self.done.is_set()
+
+    def add_done_callback(self, callback: Callable[["QueryJob"], None]) -> None:
+        """Chama `callback(job)` (na thread que concluir o trabalho) quando todas as tarefas terminarem."""
+        with self._lock:
+            if not self.done.is_set():
+                self._done_callbacks.append(callback)
+                return
+        callback(self)
+
+    def cancel(self, on_cancelled: Optional[Callable[["QueryJob"], None]] = None) -> None:
+        """
+        Cancela o trabalho sem bloquear a thread chamadora.
+
+        Interrompe as consultas em andamento no servidor e chama `on_cancelled(job)` (em uma
+        thread de fundo) quando todas as tarefas do trabalho tiverem terminado.
+        """
+        already_cancelled = self.cancelled
+        self.cancelled = True
+        self.stop_event.set()
+        if on_cancelled:
+            self.add_done_callback(on_cancelled)
+        if not already_cancelled:
+            # Thread própria: o cancelamento não pode esperar vaga no executor ocupado pelo próprio trabalho
+            threading.Thread(target=self._interrupt_queries, daemon=True).start()
+
+    # ------------------------------------------------------------------ rastreamento
+
+    def _task_finished(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending > 0:
+                return
+            self.done.set()
+            callbacks, self._done_callbacks = self._done_callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Erro ao concluir o trabalho '{self.name}': {e}\n{traceback.format_exc()}")
+
+    def _attach(self, dbapi_connection) -> None:
+        session_id = None
+        try:
+            dialect = self.engine.dialect.name
+            if dialect == "postgresql" and hasattr(dbapi_connection, "get_backend_pid"):
+                session_id = dbapi_connection.get_backend_pid()
+            elif dialect in ("mysql", "mariadb") and hasattr(dbapi_connection, "thread_id"):
+                session_id = dbapi_connection.thread_id()
+        except Exception:
+            session_id = None
+        with self._lock:
+            self._connections[id(dbapi_connection)] = (dbapi_connection, session_id)
+        with _owners_lock:
+            _owners[id(dbapi_connection)] = self
+        # Cancelado antes de a conexão ser obtida: nada a interromper ainda (a sessão não tem consulta);
+        # before_cursor_execute recusa as consultas do trabalho com QueryCancelled
+
+    def _detach(self, dbapi_connection) -> None:
+        with self._lock:
+            self._connections.pop(id(dbapi_connection), None)
+            self._cursors.pop(id(dbapi_connection), None)
+
+    def _track_cursor(self, dbapi_connection, cursor) -> None:
+        with self._lock:
+            self._cursors[id(dbapi_connection)] = cursor
+
+    # ------------------------------------------------------------------ cancelamento nativo
+
+    def _interrupt_queries(self) -> None:
+        with self._lock:
+            connections = list(self._connections.items())
+            cursors = dict(self._cursors)
+        for key, (dbapi_connection, session_id) in connections:
+            try:
+                self._interrupt(dbapi_connection, session_id, cursors.get(key))
+            except Exception as e:
+                logger.warning(f"Não foi possível interromper a consulta de '{self.name}': {e}")
+
+    def _interrupt(self, dbapi_connection, session_id, cursor) -> None:
+        """Envia o cancelamento nativo do dialeto para a consulta da conexão."""
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            if hasattr(dbapi_connection, "cancel"):
+                dbapi_connection.cancel()
+            elif session_id is not None:
+                self._execute_admin("SELECT pg_cancel_backend(:pid)", {"pid": session_id})
+        elif dialect in ("mysql", "mariadb"):
+            if session_id is not None:
+                self._execute_admin(f"KILL QUERY {int(session_id)}")
+        elif dialect == "sqlite":
+            dbapi_connection.interrupt()
+        elif dialect == "oracle" and hasattr(dbapi_connection, "cancel"):
+            dbapi_connection.cancel()
+        elif cursor is not None and hasattr(cursor, "cancel"):
+            # SQL Server (pyodbc) e demais drivers com cancelamento por cursor
+            cursor.cancel()
+        logger.info(f"Cancelamento enviado ao servidor para '{self.name}'.")
+
+    def _execute_admin(self, statement: str, params: Optional[dict] = None) -> None:
+        """Executa o comando de cancelamento em outra conexão, não rastreada por nenhum trabalho."""
+        previous = getattr(_local, "job", None)
+        # Sem o trabalho na thread, o checkout desta conexão não a associa a ele
+        _local.job = None
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(statement), params or {})
+        finally:
+            _local.job = previous
@@ -0,0 +1,243 @@
+import json
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+
+# Varreduras completas estimadas acima deste número de linhas geram alerta
+SEQ_SCAN_WARN_ROWS = 10_000
+
+_SHOWPLAN_NS = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+
+
+class PlanNode:
+    """Nó do plano de execução (operação, custo, estimativas e alertas)."""
+
+    def __init__(self, operation: str, relation: Optional[str] = None, cost: Optional[float] = None,
+                 rows: Optional[float] = None, actual_rows: Optional[float] = None,
+                 actual_time: Optional[float] = None, details: Optional[Dict[str, Any]] = None):
+        self.operation = operation
+        self.relation = relation
+        self.cost = cost
+        self.rows = rows
+        self.actual_rows = actual_rows
+        # Tempo real em milissegundos (apenas com ANALYZE)
+        self.actual_time = actual_time
+        self.details = details or {}
+        self.children: List["PlanNode"] = []
+        self.warnings: List[str] = []
+
+    @property
+    def label(self) -> str:
+        if self.relation and self.relation not in self.operation:
+            return f"{self.operation} em {self.relation}"
+        return self.operation
+
+    def walk(self):
+        """Percorre o nó e seus descendentes (pré-ordem)."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def warn_full_scan(self) -> None:
+        """Registra alerta de varredura completa quando a estimativa de linhas é alta (ou desconhecida)."""
+        if self.rows is None or self.rows >= SEQ_SCAN_WARN_ROWS:
+            estimate = "desconhecida" if self.rows is None else f"{int(self.rows)} linhas"
+            self.warnings.append(f"Varredura completa de '{self.relation or '?'}' (estimativa: {estimate}); "
+                                 f"considere um índice nas colunas filtradas.")
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def explain_query(engine, query: str, params: Optional[Dict[str, Any]] = None, analyze: bool = False) -> PlanNode:
+    """
+    Executa o EXPLAIN do dialeto e devolve o plano como árvore de PlanNode.
+
+    PostgreSQL: EXPLAIN (FORMAT JSON[, ANALYZE]); MySQL/MariaDB: EXPLAIN FORMAT=JSON; SQLite:
+    EXPLAIN QUERY PLAN; SQL Server: SHOWPLAN_XML; Oracle: EXPLAIN PLAN FOR + PLAN_TABLE.
+    `analyze` (apenas PostgreSQL) executa a consulta de fato, dentro de uma transação desfeita no fim.
+    """
+    params = params or {}
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        try:
+            if dialect == "postgresql":
+                options = "FORMAT JSON, ANALYZE, BUFFERS" if analyze else "FORMAT JSON"
+                raw = conn.execute(text(f"EXPLAIN ({options}) {query}"), params).scalar()
+                plan = json.loads(raw) if isinstance(raw, str) else raw
+                return _parse_postgres(plan[0]["Plan"])
+            if dialect in ("mysql", "mariadb"):
+                raw = conn.execute(text(f"EXPLAIN FORMAT=JSON {query}"), params).scalar()
+                return _parse_mysql(json.loads(raw))
+            if dialect == "sqlite":
+                rows = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params).fetchall()
+                return _parse_sqlite(rows)
+            if dialect == "mssql":
+                conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+                try:
+                    raw = conn.execute(text(query), params).scalar()
+                finally:
+                    conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+                return _parse_showplan(raw)
+            if dialect == "oracle":
+                statement_id = uuid.uuid4().hex[:30]
+                conn.execute(text(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {query}"), params)
+                rows = conn.execute(text("""
+                    SELECT id, parent_id, operation, options, object_name, cost, cardinality
+                    FROM plan_table WHERE statement_id = :statement_id ORDER BY id
+                """), {"statement_id": statement_id}).fetchall()
+                return _parse_oracle(rows)
+            raise ValueError(f"EXPLAIN não suportado para o dialeto '{dialect}'.")
+        finally:
+            # EXPLAIN ANALYZE executa a consulta e o Oracle grava no PLAN_TABLE: nada é confirmado
+            conn.rollback()
+
+
+def _parse_postgres(plan: Dict[str, Any]) -> PlanNode:
+    node = PlanNode(
+        operation=plan.get("Node Type", "?"),
+        relation=plan.get("Relation Name") or plan.get("Index Name"),
+        cost=_number(plan.get("Total Cost")),
+        rows=_number(plan.get("Plan Rows")),
+        actual_rows=_number(plan.get("Actual Rows")),
+        actual_time=_number(plan.get("Actual Total Time")),
+        details={key: value for key, value in plan.items()
+                 if key in ("Filter", "Index Cond", "Hash Cond", "Join Type", "Sort Key", "Rows Removed by Filter")},
+    )
+    if node.operation == "Seq Scan":
+        node.warn_full_scan()
+    if node.actual_rows is not None and node.rows and node.actual_rows > node.rows * 10:
+        node.warnings.append(f"Estimativa de linhas muito baixa ({int(node.rows)} estimadas, "
+                             f"{int(node.actual_rows)} reais); execute ANALYZE na tabela.")
+    for child in plan.get("Plans", []):
+        node.children.append(_parse_postgres(child))
+    return node
+
+
+def _parse_mysql(plan: Dict[str, Any]) -> PlanNode:
+    block = plan.get("query_block", plan)
+    root = PlanNode("Consulta", cost=_number(block.get("cost_info", {}).get("query_cost")))
+    _walk_mysql(block, root)
+    return root
+
+
+def _walk_mysql(value: Any, parent: PlanNode) -> None:
+    """Percorre o JSON do MySQL/MariaDB criando nós para tabelas e operações."""
+    if isinstance(value, list):
+        for item in value:
+            _walk_mysql(item, parent)
+        return
+    if not isinstance(value, dict):
+        return
+    for key, child in value.items():
+        if key == "table" and isinstance(child, dict):
+            cost_info = child.get("cost_info", {})
+            node = PlanNode(
+                operation=f"Acesso {child.get('access_type', '?')}",
+                relation=child.get("table_name"),
+                cost=_number(cost_info.get("prefix_cost") or cost_info.get("read_cost")),
+                rows=_number(child.get("rows_examined_per_scan", child.get("rows"))),
+                details={k: child[k] for k in ("key", "possible_keys", "attached_condition", "filtered") if k in child},
+            )
+            if child.get("access_type") == "ALL":
+                node.warn_full_scan()
+            parent.children.append(node)
+            _walk_mysql(child, node)
+        elif key in ("ordering_operation", "grouping_operation", "duplicates_removal", "nested_loop",
+                     "materialized_from_subquery", "attached_subqueries", "union_result", "query_specifications",
+                     "query_block", "filesort", "temporary_table", "read_sorted_file", "windowing"):
+            if key in ("nested_loop", "query_specifications", "attached_subqueries", "query_block"):
+                _walk_mysql(child, parent)
+            else:
+                node = PlanNode(key.replace("_", " ").capitalize())
+                if isinstance(child, dict) and child.get("using_filesort"):
+                    node.details["using_filesort"] = True
+                parent.children.append(node)
+                _walk_mysql(child, node)
+
+
+def _parse_sqlite(rows) -> PlanNode:
+    root = PlanNode("Consulta")
+    nodes: Dict[int, PlanNode] = {0: root}
+    for row in rows:
+        node_id, parent_id, detail = row[0], row[1], row[-1]
+        node = PlanNode(detail)
+        words = detail.split()
+        if words and words[0] == "SCAN" and "INDEX" not in detail:
+            node.relation = words[1] if len(words) > 1 and words[1] != "TABLE" else (words[2] if len(words) > 2 else None)
+            node.warn_full_scan()
+        nodes[node_id] = node
+        nodes.get(parent_id, root).children.append(node)
+    return root
+
+
+def _parse_showplan(raw: str) -> PlanNode:
+    root = PlanNode("Consulta")
+    tree = ET.fromstring(raw)
+    statement = tree.find(f".//{_SHOWPLAN_NS}StmtSimple")
+    if statement is not None:
+        root.cost = _number(statement.get("StatementSubTreeCost"))
+        root.rows = _number(statement.get("StatementEstRows"))
+    first = tree.find(f".//{_SHOWPLAN_NS}QueryPlan/{_SHOWPLAN_NS}RelOp")
+    if first is not None:
+        root.children.append(_parse_relop(first))
+    for missing in tree.iter(f"{_SHOWPLAN_NS}MissingIndexGroup"):
+        root.warnings.append(f"SQL Server sugere um índice ausente (impacto estimado: {missing.get('Impact')}%).")
+    return root
+
+
+def _parse_relop(element) -> PlanNode:
+    obj = next(_own_elements(element, f"{_SHOWPLAN_NS}Object"), None)
+    node = PlanNode(
+        operation=element.get("PhysicalOp", "?"),
+        relation=obj.get("Table", "").strip("[]") if obj is not None else None,
+        cost=_number(element.get("EstimatedTotalSubtreeCost")),
+        rows=_number(element.get("EstimateRows")),
+        details={"LogicalOp": element.get("LogicalOp")},
+    )
+    if node.operation in ("Table Scan", "Clustered Index Scan", "Index Scan"):
+        node.warn_full_scan()
+    # RelOp filhos: os primeiros encontrados abaixo deste, sem descer em outros RelOp
+    for child in _child_relops(element):
+        node.children.append(_parse_relop(child))
+    return node
+
+
+def _child_relops(element):
+    for child in element:
+        if child.tag == f"{_SHOWPLAN_NS}RelOp":
+            yield child
+        else:
+            yield from _child_relops(child)
+
+
+def _own_elements(element, tag):
+    """Elementos `tag` do operador, sem descer nos RelOp filhos."""
+    for child in element:
+        if child.tag == tag:
+            yield child
+        elif child.tag != f"{_SHOWPLAN_NS}RelOp":
+            yield from _own_elements(child, tag)
+
+
+def _parse_oracle(rows) -> PlanNode:
+    nodes: Dict[int, PlanNode] = {}
+    root = None
+    for node_id, parent_id, operation, options, object_name, cost, cardinality in rows:
+        node = PlanNode(f"{operation} {options or ''}".strip(), relation=object_name,
+                        cost=_number(cost), rows=_number(cardinality))
+        if operation == "TABLE ACCESS" and options == "FULL":
+            node.warn_full_scan()
+        nodes[node_id] = node
+        if parent_id is None or parent_id not in nodes:
+            root = root or node
+            if root is not node:
+                root.children.append(node)
+        else:
+            nodes[parent_id].children.append(node)
+    return root or PlanNode("Consulta")
@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+
+# Quantidade máxima de lotes entregues à interface e ainda não processados
+STREAM_MAX_IN_FLIGHT = 4
+# Limite de lotes agrupados antes de enviar para a interface
+STREAM_MAX_BATCH_CHUNKS = 50
+
+
+def stream_query(engine, query: str, params: Optional[Dict[str, Any]] = None, chunk_size: int = 1000,
+                 stop_event: Optional[threading.Event] = None) -> Iterator[Tuple[List[str], list]]:
+    """
+    Executa a consulta com um único cursor no servidor e gera lotes de linhas de tamanho fixo.
+
+    Args:
+        engine: Engine SQLAlchemy.
+        query (str): Query SQL completa (sem LIMIT para carregar tudo).
+        params (dict, optional): Parâmetros vinculados da query.
+        chunk_size (int): Número de linhas por lote.
+        stop_event (threading.Event, optional): Interrompe a leitura quando sinalizado.
+
+    Yields:
+        tuple: (nomes das colunas, lista de linhas do lote).
+    """
+    with engine.connect() as conn:
+        # yield_per ativa stream_results (cursor do lado do servidor) e mantém apenas um lote em memória
+        result = conn.execution_options(yield_per=chunk_size).execute(text(query), params or {})
+        try:
+            columns = list(result.keys())
+            yielded = False
+            for rows in result.partitions(chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                yielded = True
+                yield columns, rows
+            if not yielded and not (stop_event is not None and stop_event.is_set()):
+                # Resultado vazio: entrega apenas as colunas
+                yield columns, []
+        finally:
+            result.close()
+
+
+def batch_chunks(chunks: Iterator[Tuple[List[str], list]], chunk_size: int = 1000,
+                 max_batch_chunks: int = STREAM_MAX_BATCH_CHUNKS) -> Iterator[Tuple[List[str], list]]:
+    """
+    Agrupa lotes consecutivos para reduzir o número de atualizações da interface.
+
+    O tamanho do grupo cresce com o total já entregue (metade do carregado), limitado a
+    `max_batch_chunks` lotes, de modo que o número de atualizações cresce de forma logarítmica
+    no início e linear depois, sem acumular mais que um grupo em memória.
+    """
+    delivered = 0
+    pending: list = []
+    columns: List[str] = []
+    for columns, rows in chunks:
+        pending.extend(rows)
+        target = min(max(chunk_size, delivered // 2), chunk_size * max_batch_chunks)
+        if len(pending) >= target:
+            delivered += len(pending)
+            yield columns, pending
+            pending = []
+    if pending or not delivered:
+        yield columns, pending
+
+
+class InFlightLimiter:
+    """Limita a quantidade de lotes enviados à thread da interface e ainda não aplicados."""
+
+    def __init__(self, limit: int = STREAM_MAX_IN_FLIGHT):
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self, stop_event: Optional[threading.Event] = None, poll: float = 0.2) -> bool:
+        """Bloqueia até haver espaço; retorna False se o carregamento foi cancelado."""
+        while not self._semaphore.acquire(timeout=poll):
+            if stop_event is not None and stop_event.is_set():
+                return False
+        return True
+
+    def release(self) -> None:
+        """Libera um espaço após a interface aplicar o lote."""
+        try:
+            self._semaphore.release()
+        except ValueError:
+            pass
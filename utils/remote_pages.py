@@ -0,0 +1,139 @@
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import pandas as pd
+from sqlalchemy import text
+from utils.job_scheduler import PRIORITY_BULK, get_scheduler
+from utils.keyset_pagination import build_keyset_query, last_key_values, quote_key_column
+from utils.logger import logger
+from utils.validarText import get_query_string
+
+# Linhas por página no modo de páginas remotas
+REMOTE_PAGE_SIZE = 50
+# Páginas recentes mantidas em memória
+REMOTE_PAGE_LRU_SIZE = 8
+
+
+class RemotePageSource:
+    """
+    Fornece páginas de uma consulta buscando-as sob demanda no servidor.
+
+    Cada página é uma consulta pequena: por keyset quando o cursor da página anterior é
+    conhecido (navegação sequencial) e por OFFSET caso contrário. As páginas vistas
+    recentemente ficam em um cache LRU e a página seguinte é pré-buscada em segundo plano.
+
+    O OFFSET só é estável com ORDER BY: sem chave, as páginas são ordenadas por `order_columns`
+    (ex: todas as colunas comparáveis da tabela). Sem chave nem colunas de ordenação, ValueError.
+    """
+
+    def __init__(self, engine, base_query: str, filters: Optional[List[str]], params: Optional[Dict[str, Any]],
+                 db_type: str, key_columns: Optional[Sequence[str]] = None, page_size: int = REMOTE_PAGE_SIZE,
+                 lru_size: int = REMOTE_PAGE_LRU_SIZE, order_columns: Optional[Sequence[str]] = None):
+        self.engine = engine
+        self.base_query = base_query
+        self.filters = list(filters or [])
+        self.params = dict(params or {})
+        self.db_type = db_type
+        self.key_columns = list(key_columns or [])
+        self.order_columns = self.key_columns or list(order_columns or [])
+        if not self.order_columns:
+            raise ValueError("Paginação remota requer uma chave ou colunas de ordenação estáveis.")
+        self.page_size = page_size
+        self._lru_size = lru_size
+        self._pages: "OrderedDict[int, pd.DataFrame]" = OrderedDict()
+        # Cursor (valores da chave da última linha) de cada página já buscada
+        self._cursors: Dict[int, tuple] = {}
+        self._inflight: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        # Última página conhecida (resultado terminou antes de completar a página)
+        self.last_page: Optional[int] = None
+        # Incrementada a cada invalidação: páginas buscadas antes dela não entram no cache
+        self._generation = 0
+
+    def get_page(self, page: int) -> pd.DataFrame:
+        """Retorna a página (a partir de 0), do cache ou do servidor."""
+        while True:
+            with self._lock:
+                if page in self._pages:
+                    self._pages.move_to_end(page)
+                    return self._pages[page]
+                pending = self._inflight.get(page)
+                if pending is None:
+                    pending = self._inflight[page] = threading.Event()
+                    generation = self._generation
+                    break
+            # A página já está sendo buscada (ex: pela pré-busca): aguarda o resultado
+            pending.wait()
+
+        try:
+            df = self._fetch(page)
+            with self._lock:
+                if generation == self._generation:
+                    self._store(page, df)
+            return df
+        finally:
+            with self._lock:
+                # Após uma invalidação, a entrada pode já ser de uma nova busca da mesma página
+                if self._inflight.get(page) is pending:
+                    del self._inflight[page]
+            pending.set()
+
+    def prefetch(self, page: int) -> None:
+        """Busca a página em segundo plano, se ainda não estiver em cache."""
+        if page < 0 or (self.last_page is not None and page > self.last_page):
+            return
+        with self._lock:
+            if page in self._pages or page in self._inflight:
+                return
+
+        def _run():
+            try:
+                self.get_page(page)
+            except Exception as e:
+                logger.warning(f"Erro na pré-busca da página {page + 1}: {e}\n{traceback.format_exc()}")
+
+        # Pré-busca é carga de fundo: cede a vez às ações interativas
+        get_scheduler().submit(_run, priority=PRIORITY_BULK, group=self)
+
+    def invalidate(self) -> None:
+        """Descarta as páginas em cache (ex: após editar registros)."""
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+            self._cursors.clear()
+            # Buscas em andamento terminam sem gravar; novos pedidos da mesma página buscam de novo
+            self._inflight.clear()
+            self.last_page = None
+
+    def _store(self, page: int, df: pd.DataFrame) -> None:
+        self._pages[page] = df
+        self._pages.move_to_end(page)
+        while len(self._pages) > self._lru_size:
+            self._pages.popitem(last=False)
+        if len(df) < self.page_size:
+            self.last_page = page if len(df) or page == 0 else page - 1
+        elif self.key_columns:
+            self._cursors[page] = last_key_values(df, self.key_columns)
+
+    def _fetch(self, page: int) -> pd.DataFrame:
+        params = dict(self.params)
+        offset_query = False
+        if self.key_columns and (page == 0 or page - 1 in self._cursors):
+            cursor = self._cursors.get(page - 1) if page else None
+            query_string = build_keyset_query(self.base_query, self.filters, self.key_columns, cursor,
+                                              self.page_size, self.db_type, params)
+        else:
+            order_by = ", ".join(f"{quote_key_column(self.db_type, col)} ASC" for col in self.order_columns)
+            query_string = get_query_string(self.base_query, self.filters, self.page_size, self.db_type,
+                                            offset=page * self.page_size, order_by=order_by)
+            offset_query = True
+
+        with self.engine.connect() as conn:
+            result = conn.execute(text(query_string), params)
+            df = pd.DataFrame(result.fetchall(), columns=result.keys())
+
+        if offset_query and self.db_type == "oracle":
+            # Coluna auxiliar do ROWNUM usada na paginação por OFFSET do Oracle
+            df = df.drop(columns=["rnum"], errors="ignore")
+        return df
@@ -0,0 +1,127 @@
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from utils.columnar_buffer import ColumnarBuffer, as_buffer
+
+# Orçamento de memória do cache de resultados (por engine)
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Tempo de vida de um resultado em cache (segundos)
+RESULT_CACHE_TTL = 300
+
+# Literais entre aspas simples (preservados na normalização)
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*')")
+
+
+def normalize_sql(query: str) -> str:
+    """Normaliza a query para a chave do cache: espaços colapsados fora dos literais, sem ';' final."""
+    parts = _LITERAL_RE.split(query.strip().rstrip(";"))
+    return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+
+
+def make_cache_key(query: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Tuple]:
+    """Chave do cache: SQL normalizado + parâmetros vinculados (ordenados pelo nome)."""
+    return normalize_sql(query), tuple(sorted((name, repr(value)) for name, value in (params or {}).items()))
+
+
+def estimate_size(buffer: ColumnarBuffer) -> int:
+    """Estimativa em bytes do resultado (arrays + objetos Python das colunas object, por amostragem)."""
+    total = 0
+    for chunk in buffer.iter_chunks():
+        for column in chunk:
+            total += column.nbytes
+            if column.dtype == object and len(column):
+                sample = column[:: max(1, len(column) // 100)]
+                total += int(sum(sys.getsizeof(value) for value in sample) / len(sample) * len(column))
+    return total
+
+
+class _Entry:
+    __slots__ = ("buffer", "tables", "size", "created")
+
+    def __init__(self, buffer: ColumnarBuffer, tables: Iterable[str], size: int):
+        self.buffer = buffer
+        self.tables = {table.lower() for table in tables}
+        self.size = size
+        self.created = time.monotonic()
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados de consultas, com orçamento de memória e tempo de vida.
+
+    As entradas são chaveadas pelo SQL normalizado e pelos parâmetros; cada uma registra as
+    tabelas lidas, para que gravações nessas tabelas (edição, exclusão, criação) a invalidem.
+    """
+
+    _registry: "weakref.WeakKeyDictionary[Any, ResultCache]" = weakref.WeakKeyDictionary()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES, ttl: float = RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_engine(cls, engine) -> "ResultCache":
+        """Retorna o cache de resultados associado ao engine (um por conexão)."""
+        with cls._registry_lock:
+            cache = cls._registry.get(engine)
+            if cache is None:
+                cache = cls._registry[engine] = cls()
+            return cache
+
+    def get(self, key: Tuple) -> Optional[ColumnarBuffer]:
+        """Retorna uma cópia rasa do resultado (os blocos são compartilhados), ou None se ausente/expirado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            # Novo buffer sobre os mesmos blocos: anexar linhas na tabela não altera a entrada
+            copy = ColumnarBuffer(entry.buffer.columns)
+            copy.extend(entry.buffer)
+            return copy
+
+    def put(self, key: Tuple, data, tables: Iterable[str]) -> bool:
+        """Guarda o resultado; retorna False se ele sozinho excede o orçamento de memória."""
+        buffer = as_buffer(data)
+        size = estimate_size(buffer)
+        if size > self.max_bytes:
+            return False
+        snapshot = ColumnarBuffer(buffer.columns)
+        snapshot.extend(buffer)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(snapshot, tables, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate_table(self, table_name: str) -> int:
+        """Remove os resultados que leram a tabela; retorna quantos foram removidos."""
+        table_name = table_name.lower()
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if table_name in entry.tables]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,75 @@
+import threading
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+
+# Linhas lidas do cursor por vez ao carregar mais resultados
+RESULT_STREAM_CHUNK_SIZE = 1000
+
+
+class ResultStream:
+    """
+    Resultado de uma consulta com o cursor do servidor mantido aberto.
+
+    A primeira leitura executa a consulta; as seguintes continuam do ponto em que o cursor
+    parou, de modo que só as linhas pedidas são trazidas do servidor. A conexão fica reservada
+    até o resultado se esgotar ou `close` ser chamado. As leituras são serializadas, mas podem
+    acontecer em threads diferentes (uma de cada vez).
+    """
+
+    def __init__(self, engine, query: str, params: Optional[Dict[str, Any]] = None,
+                 chunk_size: int = RESULT_STREAM_CHUNK_SIZE):
+        self.engine = engine
+        self.query = query
+        self.params = dict(params or {})
+        self.chunk_size = chunk_size
+        self.columns: List[str] = []
+        self.fetched_rows = 0
+        self.exhausted = False
+        self._conn = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    def fetch_next(self, max_rows: Optional[int] = None) -> list:
+        """Lê as próximas `max_rows` linhas (padrão: chunk_size); lista vazia quando esgotado."""
+        max_rows = max_rows or self.chunk_size
+        with self._lock:
+            if self.exhausted:
+                return []
+            if self._result is None:
+                self._open()
+            try:
+                rows = self._result.fetchmany(max_rows)
+            except Exception:
+                self._close()
+                raise
+            self.fetched_rows += len(rows)
+            if len(rows) < max_rows:
+                self._close()
+            return rows
+
+    def close(self) -> None:
+        """Fecha o cursor e devolve a conexão ao pool."""
+        with self._lock:
+            self._close()
+
+    def _open(self) -> None:
+        self._conn = self.engine.connect()
+        try:
+            # yield_per ativa stream_results: o driver mantém apenas um lote em memória
+            self._result = self._conn.execution_options(yield_per=self.chunk_size).execute(text(self.query), self.params)
+            self.columns = list(self._result.keys())
+        except Exception:
+            self._close()
+            raise
+
+    def _close(self) -> None:
+        self.exhausted = True
+        result, conn = self._result, self._conn
+        self._result = self._conn = None
+        try:
+            if result is not None:
+                result.close()
+        finally:
+            if conn is not None:
+                conn.close()
+
@@ -0,0 +1,127 @@
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import text
+from utils.logger import logger
+from utils.validarText import get_query_string
+
+# Acima desta estimativa o COUNT(*) exato não é executado (varredura cara demais)
+EXACT_COUNT_MAX_ESTIMATE = 5_000_000
+
+
+def estimate_row_count(engine, table_name: str) -> Optional[int]:
+    """
+    Retorna o número aproximado de linhas da tabela a partir das estatísticas do catálogo.
+
+    Usa pg_class.reltuples (PostgreSQL), information_schema.TABLES.TABLE_ROWS (MySQL/MariaDB),
+    sys.partitions (SQL Server), user_tables.num_rows (Oracle) e sqlite_stat1 (SQLite, se o
+    ANALYZE já foi executado). Retorna None quando não há estatística disponível.
+    """
+    dialect = engine.dialect.name
+    params = {"table_name": table_name}
+    if dialect == "postgresql":
+        query = """
+            SELECT c.reltuples::bigint FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = :table_name AND n.nspname = ANY (current_schemas(false))
+            LIMIT 1
+        """
+    elif dialect in ("mysql", "mariadb"):
+        query = """
+            SELECT TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+        """
+    elif dialect == "mssql":
+        query = """
+            SELECT SUM(p.rows) FROM sys.partitions p
+            JOIN sys.tables t ON t.object_id = p.object_id
+            WHERE t.name = :table_name AND t.schema_id = SCHEMA_ID() AND p.index_id IN (0, 1)
+        """
+    elif dialect == "oracle":
+        query = "SELECT num_rows FROM user_tables WHERE table_name = :table_name"
+        if table_name == table_name.lower():
+            params["table_name"] = table_name.upper()
+    elif dialect == "sqlite":
+        query = "SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name LIMIT 1"
+    else:
+        return None
+
+    try:
+        with engine.connect() as conn:
+            value = conn.execute(text(query), params).scalar()
+    except Exception:
+        # sqlite_stat1 inexistente, permissão negada etc.: sem estimativa
+        return None
+
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # sqlite_stat1.stat: "<linhas> <linhas por valor> ..."
+        value = value.split()[0] if value.split() else None
+        if value is None or not value.isdigit():
+            return None
+    value = int(value)
+    # reltuples = -1 indica tabela nunca analisada (PostgreSQL 14+)
+    return value if value >= 0 else None
+
+
+def count_rows(engine, base_query: str, filters: Optional[List[str]], params: Optional[Dict[str, Any]], db_type: str) -> int:
+    """Executa o COUNT(*) exato da consulta com os mesmos filtros."""
+    inner_query = get_query_string(base_query, filters, None, db_type)
+    with engine.connect() as conn:
+        return int(conn.execute(text(f"SELECT COUNT(*) FROM ({inner_query}) row_count_query"), params or {}).scalar() or 0)
+
+
+class RowCounter:
+    """
+    Calcula o total de linhas de uma consulta em segundo plano.
+
+    Sem filtros, entrega primeiro a estimativa do catálogo (imediata); em seguida executa o
+    COUNT(*) exato com os mesmos filtros, a menos que a estimativa indique uma tabela grande
+    demais para ser varrida.
+    """
+
+    def __init__(self, engine, db_type: str, exact_max_estimate: int = EXACT_COUNT_MAX_ESTIMATE):
+        self.engine = engine
+        self.db_type = db_type
+        self.exact_max_estimate = exact_max_estimate
+
+    def start(self, table_name: str, base_query: str, filters: Optional[List[str]], params: Optional[Dict[str, Any]],
+              on_total: Callable[[int, bool], None], stop_event: Optional[threading.Event] = None,
+              job=None) -> threading.Thread:
+        """
+        Inicia a contagem em uma thread de fundo.
+
+        Args:
+            on_total (callable): Chamado com (total, estimado) a cada resultado disponível.
+            stop_event (threading.Event, optional): Descarta os resultados se a carga for cancelada.
+            job (QueryJob, optional): Executa a contagem como parte do trabalho, para que o
+                cancelamento também interrompa o COUNT(*) no servidor.
+        """
+        params = dict(params or {})
+
+        def cancelled() -> bool:
+            return stop_event is not None and stop_event.is_set()
+
+        def _run():
+            try:
+                estimate = None
+                if not filters:
+                    estimate = estimate_row_count(self.engine, table_name)
+                    if estimate is not None and not cancelled():
+                        on_total(estimate, True)
+                if estimate is not None and estimate > self.exact_max_estimate:
+                    return
+                total = count_rows(self.engine, base_query, filters, params, self.db_type)
+                if not cancelled():
+                    on_total(total, False)
+            except Exception as e:
+                if cancelled():
+                    return
+                logger.warning(f"Erro ao contar linhas de '{table_name}': {e}\n{traceback.format_exc()}")
+
+        if job is not None:
+            return job.spawn(_run)
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Callable, List, Optional
+import pandas as pd
+import sqlparse
+from sqlalchemy import text
+
+# Linhas lidas de cada conjunto de resultados de um script
+SCRIPT_MAX_ROWS = 1000
+
+
+def split_statements(script: str) -> List[str]:
+    """Divide o script em comandos com o sqlparse, descartando trechos vazios ou só com comentários."""
+    statements = []
+    for statement in sqlparse.split(script):
+        stripped = sqlparse.format(statement, strip_comments=True).strip().rstrip(";").strip()
+        if stripped:
+            statements.append(statement.strip().rstrip(";").strip())
+    return statements
+
+
+class StatementResult:
+    """Resultado e tempos de um comando do script."""
+
+    def __init__(self, index: int, statement: str):
+        self.index = index
+        self.statement = statement
+        self.df: Optional[pd.DataFrame] = None
+        # Linhas afetadas (DML) ou retornadas (consultas); None se o driver não informar
+        self.rowcount: Optional[int] = None
+        self.truncated = False
+        # Tempo de execução até o servidor responder e tempo de leitura das linhas (segundos)
+        self.exec_time = 0.0
+        self.fetch_time = 0.0
+        self.error: Optional[Exception] = None
+
+    @property
+    def wall_time(self) -> float:
+        return self.exec_time + self.fetch_time
+
+    @property
+    def returns_rows(self) -> bool:
+        return self.df is not None
+
+
+def run_script(engine, statements: List[str], transactional: bool = False,
+               on_statement: Optional[Callable[[StatementResult], None]] = None,
+               stop_event: Optional[threading.Event] = None, max_rows: int = SCRIPT_MAX_ROWS) -> List[StatementResult]:
+    """
+    Executa os comandos em sequência na mesma conexão.
+
+    Args:
+        transactional (bool): Executa tudo em uma transação; qualquer erro desfaz o script inteiro.
+            Sem transação, cada comando é confirmado logo após executar e o script para no primeiro erro.
+        on_statement (callable, optional): Chamado com o StatementResult de cada comando concluído.
+        stop_event (threading.Event, optional): Interrompe antes do próximo comando.
+        max_rows (int): Máximo de linhas lidas de cada conjunto de resultados.
+    """
+    results: List[StatementResult] = []
+    with engine.connect() as conn:
+        transaction = conn.begin() if transactional else None
+        try:
+            for index, statement in enumerate(statements, start=1):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                item = StatementResult(index, statement)
+                results.append(item)
+                try:
+                    _execute(conn, item, max_rows)
+                    if transaction is None:
+                        conn.commit()
+                except Exception as e:
+                    item.error = e
+                    if on_statement:
+                        on_statement(item)
+                    raise
+                if on_statement:
+                    on_statement(item)
+            if transaction is not None:
+                if stop_event is not None and stop_event.is_set():
+                    transaction.rollback()
+                else:
+                    transaction.commit()
+        except Exception:
+            if transaction is not None and transaction.is_active:
+                transaction.rollback()
+            elif transaction is None:
+                conn.rollback()
+            raise
+    return results
+
+
+def _execute(conn, item: StatementResult, max_rows: int) -> None:
+    started = time.perf_counter()
+    result = conn.execute(text(item.statement))
+    item.exec_time = time.perf_counter() - started
+    if result.returns_rows:
+        started = time.perf_counter()
+        rows = result.fetchmany(max_rows + 1)
+        item.truncated = len(rows) > max_rows
+        item.df = pd.DataFrame(rows[:max_rows], columns=list(result.keys()))
+        result.close()
+        item.fetch_time = time.perf_counter() - started
+        item.rowcount = len(item.df)
+    else:
+        item.rowcount = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else None
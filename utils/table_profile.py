@@ -0,0 +1,223 @@
+import math
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from sqlalchemy import text
+from config.SchemaSnapshot import SchemaSnapshot
+from utils.keyset_pagination import dialect_family, quote_key_column
+from utils.validarText import get_query_string
+
+# Colunas por consulta de agregação (mantém a lista do SELECT em um tamanho aceito por todos os bancos)
+PROFILE_COLUMNS_PER_QUERY = 40
+# Grupos duplicados e linhas mal formadas retornados como amostra
+PROFILE_SAMPLE_ROWS = 100
+
+# Tipos que não podem ser comparados/agrupados no servidor (LOBs, JSON, XML, espaciais)
+_NOT_COMPARABLE = ("blob", "clob", "bytea", "binary", "image", "json", "xml", "geometry", "geography", "bfile")
+_NUMERIC = ("int", "float", "real", "double", "decimal", "numeric", "number", "money", "serial")
+_TEXT = ("char", "text", "string", "clob")
+# Tipos sem MIN/MAX em algum dialeto (boolean no PostgreSQL, bit no SQL Server, uuid)
+_NO_MIN_MAX = ("bool", "bit", "uuid", "uniqueidentifier")
+
+
+def _type_name(column: Dict[str, Any]) -> str:
+    return str(column.get("type", "")).lower()
+
+
+def is_comparable(column: Dict[str, Any], family: str) -> bool:
+    """Se a coluna pode entrar em GROUP BY, DISTINCT, MIN e MAX no dialeto."""
+    col_type = _type_name(column)
+    if any(t in col_type for t in _NOT_COMPARABLE):
+        return False
+    # TEXT/NTEXT legados do SQL Server não aceitam comparação
+    return not (family == "mssql" and col_type in ("text", "ntext"))
+
+
+def is_numeric(column: Dict[str, Any]) -> bool:
+    col_type = _type_name(column)
+    return any(t in col_type for t in _NUMERIC) and "interval" not in col_type and "point" not in col_type
+
+
+def is_text(column: Dict[str, Any]) -> bool:
+    return any(t in _type_name(column) for t in _TEXT)
+
+
+def _alias(index: int, metric: str) -> str:
+    """Apelido da métrica da coluna no SELECT (curto e sem aspas, válido em todos os dialetos)."""
+    return f"c{index}_{metric}"
+
+
+class TableProfiler:
+    """
+    Análise de qualidade da tabela inteira com consultas de agregação no servidor.
+
+    Em vez de baixar as linhas, cada verificação é compilada em SQL do dialeto: contagens de
+    nulos e vazios por coluna, distintos, mínimo/máximo/média/desvio padrão e grupos duplicados
+    (GROUP BY ... HAVING COUNT(*) > 1). Apenas os totais e pequenas amostras voltam ao cliente.
+    """
+
+    def __init__(self, engine, table_name: str, columns: List[Dict[str, Any]]):
+        self.engine = engine
+        self.family = dialect_family(engine.dialect.name)
+        self.table_name = table_name
+        self.table = quote_key_column(self.family, table_name)
+        self.columns = columns
+
+    def _q(self, column: str) -> str:
+        return quote_key_column(self.family, column)
+
+    def _empty_check(self, column: Dict[str, Any]) -> Optional[str]:
+        """Condição de texto vazio/só espaços (o Oracle já trata '' como NULL)."""
+        if not is_text(column) or self.family == "oracle" or not is_comparable(column, self.family):
+            return None
+        trim = "LTRIM(RTRIM({}))" if self.family == "mssql" else "TRIM({})"
+        return f"{trim.format(self._q(column['name']))} = ''"
+
+    def _stddev(self, expression: str) -> Optional[str]:
+        if self.family == "mssql":
+            return f"STDEV({expression})"
+        if self.family == "oracle":
+            return f"STDDEV({expression})"
+        if self.family in ("postgresql", "mysql"):
+            return f"STDDEV_SAMP({expression})"
+        # SQLite não tem desvio padrão: calculado a partir de SUM(x) e SUM(x*x)
+        return None
+
+    def _numeric_expression(self, column: str) -> str:
+        # Evita a média inteira do SQL Server e o overflow de SUM(x*x) em colunas inteiras
+        if self.family == "mssql":
+            return f"CAST({self._q(column)} AS FLOAT)"
+        if self.family == "postgresql":
+            return f"CAST({self._q(column)} AS DOUBLE PRECISION)"
+        if self.family == "sqlite":
+            return f"CAST({self._q(column)} AS REAL)"
+        return self._q(column)
+
+    def _fetch_one(self, conn, query: str) -> Dict[str, Any]:
+        row = conn.execute(text(query)).mappings().first()
+        return dict(row) if row is not None else {}
+
+    def profile(self) -> pd.DataFrame:
+        """
+        Uma linha por coluna: total, nulos, vazios, não nulos, distintos, repetidos (linhas além da
+        primeira ocorrência de cada valor), mínimo, máximo, média e desvio padrão.
+        """
+        records = []
+        with self.engine.connect() as conn:
+            for start in range(0, len(self.columns), PROFILE_COLUMNS_PER_QUERY):
+                batch = self.columns[start:start + PROFILE_COLUMNS_PER_QUERY]
+                expressions = ["COUNT(*) AS total_rows"]
+                for i, column in enumerate(batch):
+                    name, q = column["name"], self._q(column["name"])
+                    expressions.append(f"SUM(CASE WHEN {q} IS NULL THEN 1 ELSE 0 END) AS {_alias(i, 'nulls')}")
+                    empty = self._empty_check(column)
+                    if empty:
+                        expressions.append(f"SUM(CASE WHEN {empty} THEN 1 ELSE 0 END) AS {_alias(i, 'empty')}")
+                    if is_comparable(column, self.family):
+                        expressions.append(f"COUNT(DISTINCT {q}) AS {_alias(i, 'distinct')}")
+                        if not any(t in _type_name(column) for t in _NO_MIN_MAX):
+                            expressions.append(f"MIN({q}) AS {_alias(i, 'min')}")
+                            expressions.append(f"MAX({q}) AS {_alias(i, 'max')}")
+                    if is_numeric(column):
+                        value = self._numeric_expression(name)
+                        expressions.append(f"AVG({value}) AS {_alias(i, 'avg')}")
+                        stddev = self._stddev(value)
+                        if stddev:
+                            expressions.append(f"{stddev} AS {_alias(i, 'std')}")
+                        else:
+                            expressions.append(f"SUM({value}) AS {_alias(i, 'sum')}")
+                            expressions.append(f"SUM({value} * {value}) AS {_alias(i, 'sumsq')}")
+                row = {key.lower(): value for key, value in
+                       self._fetch_one(conn, f"SELECT {', '.join(expressions)} FROM {self.table}").items()}
+                total = int(row.get("total_rows") or 0)
+                for i, column in enumerate(batch):
+                    records.append(self._record(column, row, i, total))
+        return pd.DataFrame(records)
+
+    def _record(self, column: Dict[str, Any], row: Dict[str, Any], index: int, total: int) -> Dict[str, Any]:
+        def get(metric):
+            return row.get(_alias(index, metric))
+
+        nulls = int(get("nulls") or 0)
+        non_null = total - nulls
+        distinct = get("distinct")
+        std = get("std")
+        if std is None and get("sumsq") is not None and non_null > 1:
+            # Variância amostral: (Σx² - (Σx)²/n) / (n - 1)
+            s, sq = float(get("sum")), float(get("sumsq"))
+            std = math.sqrt(max(0.0, (sq - s * s / non_null) / (non_null - 1)))
+        return {
+            "coluna": column["name"],
+            "tipo": str(column.get("type", "")),
+            "total": total,
+            "nulos": nulls,
+            "vazios": int(get("empty") or 0),
+            "preenchidos": non_null,
+            "distintos": None if distinct is None else int(distinct),
+            "repetidos": None if distinct is None else non_null - int(distinct),
+            "mínimo": get("min"),
+            "máximo": get("max"),
+            "média": None if get("avg") is None else float(get("avg")),
+            "desvio padrão": None if std is None else float(std),
+        }
+
+    def comparable_columns(self) -> List[str]:
+        return [col["name"] for col in self.columns if is_comparable(col, self.family)]
+
+    def duplicate_columns(self) -> List[str]:
+        """Colunas comparadas na busca de duplicados: as comparáveis, exceto as da chave (únicas por definição)."""
+        key_columns = set(SchemaSnapshot.for_engine(self.engine).get_key_columns(self.table_name))
+        return [col for col in self.comparable_columns() if col not in key_columns]
+
+    def duplicate_groups(self, limit: int = PROFILE_SAMPLE_ROWS):
+        """
+        Linhas duplicadas (todas as colunas comparadas iguais), agrupadas no servidor.
+
+        As colunas da chave primária (ou única) ficam fora do GROUP BY: com elas nenhuma linha
+        se repetiria.
+
+        Returns:
+            tuple: (grupos duplicados, total de linhas duplicadas, amostra dos maiores grupos com a coluna
+            'ocorrencias', colunas comparadas).
+        """
+        columns = self.duplicate_columns()
+        if not columns:
+            return 0, 0, pd.DataFrame(), columns
+        group_by = ", ".join(self._q(col) for col in columns)
+        grouped = f"SELECT {group_by}, COUNT(*) AS ocorrencias FROM {self.table} GROUP BY {group_by} HAVING COUNT(*) > 1"
+        with self.engine.connect() as conn:
+            summary = self._fetch_one(conn, f"SELECT COUNT(*) AS grupos, SUM(ocorrencias) AS linhas FROM ({grouped}) d")
+            summary = {key.lower(): value for key, value in summary.items()}
+            result = conn.execute(text(get_query_string(grouped, None, limit, self.family, order_by="COUNT(*) DESC")))
+            sample = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        return int(summary.get("grupos") or 0), int(summary.get("linhas") or 0), sample, columns
+
+    def malformed_condition(self) -> Optional[str]:
+        """Condição das linhas com algum nulo ou texto vazio."""
+        conditions = []
+        for column in self.columns:
+            conditions.append(f"{self._q(column['name'])} IS NULL")
+            empty = self._empty_check(column)
+            if empty:
+                conditions.append(empty)
+        return " OR ".join(conditions) or None
+
+    def malformed_query(self) -> Optional[str]:
+        """Consulta de todas as linhas mal formadas (para exportar direto do servidor)."""
+        condition = self.malformed_condition()
+        return get_query_string(f"SELECT * FROM {self.table}", [f"({condition})"], None, self.family) if condition else None
+
+    def malformed_rows(self, limit: int = PROFILE_SAMPLE_ROWS):
+        """
+        Linhas com algum nulo ou texto vazio: total no servidor e uma amostra.
+
+        Returns:
+            tuple: (total de linhas mal formadas, amostra).
+        """
+        condition = self.malformed_condition()
+        if not condition:
+            return 0, pd.DataFrame()
+        with self.engine.connect() as conn:
+            total = conn.execute(text(f"SELECT COUNT(*) FROM {self.table} WHERE {condition}")).scalar()
+            result = conn.execute(text(get_query_string(f"SELECT * FROM {self.table}", [f"({condition})"], limit, self.family)))
+            sample = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        return int(total or 0), sample
@@ -5,6 +5,7 @@ import uuid
 from sqlalchemy import text
 
 from config.salavarInfoAllColumn import get_columns_by_table, save_columns_to_file
+from utils.enum_resolver import fetch_enum_values
 
 def validar_numero(valor, allow_float=False):
     if valor == "":
@@ -25,7 +26,7 @@ def validar_numero_float(s, allow_float=False):
     return s.isdigit()
 
 def _fetch_enum_values(self, columns, text, traceback):
-    """Obtém valores ENUM do banco de dados, se disponíveis."""
+    """Obtém valores ENUM/CHECK da tabela com uma única consulta ao catálogo, usando o cache quando disponível."""
     
     try:
         self.enum_values = get_columns_by_table(self.db_type+self.database_name+self.table_name, "tables_columns_enum.pkl", log_message=self.log_message)
@@ -34,77 +35,9 @@ def _fetch_enum_values(self, columns, text, traceback):
         else:
              self.log_message(f"Valores ENUM obtidos caregado do ficheiro: {self.enum_values}", level="info")
              return
-        # Verifica se a tabela contém colunas ENUM
-        for col in columns:
-            
-            col_name = col["name"]
-            col_type = str(col["type"]).lower()
-            query = None
-            # print(f"col_name={col_name} col_type={col_type} self.table_name={self.table_name} self.db_type={self.db_type}")
-            if self.db_type == "postgresql":
-                query = text(f"""
-                    SELECT e.enumlabel 
-                    FROM pg_type t
-                    JOIN pg_enum e ON t.oid = e.enumtypid
-                    WHERE t.typname = '{col_name}';
-                """)
-
-            elif self.db_type in ("mysql", "mariadb"):
-                query = text(f"SHOW COLUMNS FROM {self.table_name} LIKE '{col_name}'")
-
-            elif self.db_type in ("mssql", "sql server"):
-                query = text(f"""
-                    SELECT definition 
-                    FROM sys.check_constraints con
-                    JOIN sys.columns col ON con.parent_object_id = col.object_id
-                    JOIN sys.tables tab ON col.object_id = tab.object_id
-                    WHERE tab.name = '{self.table_name}' 
-                    AND col.name = '{col_name}' 
-                    AND con.definition LIKE 'IN (%)';
-                """)
-
-            elif self.db_type == "sqlite":
-                query = text(f"PRAGMA table_info({self.table_name})")
-            elif self.db_type == "oracle":
-                # Verifica CHECK CONSTRAINTS
-                query = text(f"""
-                    SELECT con.search_condition 
-                    FROM user_constraints con
-                    JOIN user_cons_columns col ON con.constraint_name = col.constraint_name
-                    WHERE con.constraint_type = 'C'
-                    AND col.table_name = '{self.table_name.upper()}'
-                    AND col.column_name = '{col_name.upper()}';
-                """)
-
-            if query is not None:
-                with self.engine.connect() as conn:
-                    result = conn.execute(query).fetchall()
-                    if result:
-                        if self.db_type == "postgresql":
-                            self.enum_values[col_name] = [row[0] for row in result]
-
-                        elif self.db_type in ("mysql", "mariadb"):
-                            enum_text = result[0][1]
-                            if "enum(" in enum_text:
-                                self.enum_values[col_name] = enum_text.replace("enum(", "").replace(")", "").replace("'", "").split(",")
-
-                        elif self.db_type in ("mssql", "sql server"):
-                            check_clause = result[0][0]
-                            if "IN (" in check_clause:
-                                self.enum_values[col_name] = [v.strip().replace("'", "") for v in check_clause.split("IN (")[1].replace(")", "").split(",")]
-
-                        elif self.db_type == "sqlite":
-                            for row in result:
-                                if row[1] == col_name and "CHECK" in row[5]:
-                                    values = row[5].split("IN (")[1].replace(")", "").replace("'", "").split(",")
-                                    self.enum_values[col_name] = [v.strip() for v in values]
-                        elif self.db_type == "oracle":
-                            check_clause = result[0]
-                            if "IN (" in check_clause:
-                                self.enum_values[col_name] = [
-                                    v.strip().replace("'", "") for v in check_clause.split("IN (")[1].replace(")", "").split(",")
-                                ]
-        if save_columns_to_file({self.db_type+self.database_name+self.table_name: self.enum_values}, "tables_columns_enum.pkl", log_message=self.log_message):
+        # Uma consulta para a tabela inteira (em vez de uma por coluna)
+        self.enum_values = fetch_enum_values(self.engine, self.table_name).get(self.table_name, {})
+        if save_columns_to_file({self.db_type+self.database_name+self.table_name: self.enum_values}, "tables_columns_enum.pkl", log_message=self.log_message, profile=self.db_type+self.database_name):
             self.log_message(f"Valores ENUM obtidos: {self.enum_values}", level="info")
 
     except Exception as e:
@@ -241,16 +174,17 @@ def get_valor_idependente_entry(entry, tk, ttk):
     if entry is None:
         print("é none")
     return ""
-def get_query_string(base_query, filters=None, max_rows=1000, db_type="mysql", offset=None) -> str:
+def get_query_string(base_query, filters=None, max_rows=1000, db_type="mysql", offset=None, order_by=None) -> str:
     """
     Gera uma query SQL ajustada para diferentes bancos de dados, incluindo filtros, limite e paginação.
     
     Args:
         base_query (str): Query base (ex: 'SELECT * FROM tabela').
         filters (list, optional): Lista de condições de filtro. Exemplo: ["idade > 30", "cidade = 'SP'"].
-        max_rows (int): Número máximo de linhas a serem retornadas.
+        max_rows (int, optional): Número máximo de linhas a serem retornadas (None para não limitar).
         db_type (str): Tipo de banco de dados ('mysql', 'sqlite', 'postgresql', 'mssql', 'oracle').
         offset (int, optional): Número de linhas a serem ignoradas para paginação.
+        order_by (str, optional): Expressão ORDER BY (sem a palavra-chave) que torna a paginação estável.
 
     Returns:
         str: Query SQL final formatada.
@@ -261,6 +195,13 @@ def get_query_string(base_query, filters=None, max_rows=1000, db_type="mysql", o
     if filters:
         query_string += f" WHERE {' AND '.join(filters)}"
 
+    if order_by and db_type not in ["mssql", "sql server"]:
+        query_string += f" ORDER BY {order_by}"
+
+    # Sem limite: usado pelo carregamento em streaming
+    if max_rows is None:
+        return query_string
+
     # Ajusta o limite e offset conforme o tipo de banco de dados
     if db_type in ["mysql", "sqlite", "postgresql"]:
         query_string += f" LIMIT {max_rows}"
@@ -269,7 +210,7 @@ def get_query_string(base_query, filters=None, max_rows=1000, db_type="mysql", o
 
     elif db_type in ["mssql", "sql server"]:  # Microsoft SQL Server
         # SQL Server usa uma sintaxe diferente para LIMIT e OFFSET
-        query_string = f"{query_string} ORDER BY (SELECT NULL) OFFSET {offset or 0} ROWS FETCH NEXT {max_rows} ROWS ONLY"
+        query_string = f"{query_string} ORDER BY {order_by or '(SELECT NULL)'} OFFSET {offset or 0} ROWS FETCH NEXT {max_rows} ROWS ONLY"
 
     elif db_type == "oracle":
         if offset is not None:
@@ -294,55 +235,6 @@ def quote_identifier(db_type, identifier):
     else:
         return identifier  # Padrão sem aspas
 
-def get_query_string_threads(base_query, filters=None, max_rows=1000, db_type="mysql", campo_chave="id", valor_ultima_linha=None) -> str:
-    """
-    Gera uma query SQL ajustada para diferentes bancos de dados, incluindo filtros, limite e paginação sem OFFSET.
-    
-    Args:
-        base_query (str): Query base (ex: 'SELECT * FROM tabela').
-        filters (list, optional): Lista de condições de filtro. Exemplo: ["idade > 30", "cidade = 'SP'"].
-        max_rows (int): Número máximo de linhas a serem retornadas.
-        db_type (str): Tipo de banco de dados ('mysql', 'sqlite', 'postgresql', 'mssql', 'oracle').
-        campo_chave (str): Nome do campo utilizado para paginação (ex: 'id').
-        valor_ultima_linha (int, optional): Último valor do campo chave carregado.
-
-    Returns:
-        str: Query SQL final formatada.
-    """
-    query_string = base_query
-
-    # Adiciona filtros, se houver
-    filtros = filters[:] if filters else []  # Evita modificar a lista original
-    if valor_ultima_linha is not None:
-        if isinstance(valor_ultima_linha, (int, float)):  # Se for número, não precisa de aspas
-            filtros.append(f"{campo_chave} > {valor_ultima_linha}")
-        else:  # Se for string ou data, precisa de aspas simples
-            filtros.append(f"{campo_chave} > '{valor_ultima_linha}'") 
-
-    # Aplicando filtros na query
-    if filters:
-        # Para outros bancos de dados, não é necessário o uso de aspas duplas
-        query_string += f" WHERE {' AND '.join(filters)}"
-
-    # Ordenação e Limite
-    if db_type in ["mysql", "sqlite", "postgresql"]:
-        query_string += f" ORDER BY {campo_chave} ASC LIMIT {max_rows}"
-
-    elif db_type in ["mssql", "sql server"]:
-        query_string += f" ORDER BY {campo_chave} ASC OFFSET 0 ROWS FETCH NEXT {max_rows} ROWS ONLY"
-
-    elif db_type == "oracle":
-        inner_query = f"{query_string} ORDER BY {campo_chave} ASC"
-        query_string = f"""
-            SELECT * FROM (
-                SELECT a.*, ROWNUM rnum FROM ({inner_query}) a 
-                WHERE ROWNUM <= {max_rows}
-            ) WHERE rnum > {valor_ultima_linha if valor_ultima_linha else 0}
-        """
-
-    return query_string
-
-
 def _is_system_field(col_name: str, col_type: str, columns: list, db_type: str, table_name: str, engine, database_name, log_message) -> bool:
     """Determina se um campo é do sistema e deve ser ignorado."""
     
@@ -355,7 +247,7 @@ def _is_system_field(col_name: str, col_type: str, columns: list, db_type: str,
             return result
 
         def cache_result(value: bool):
-            save_columns_to_file({table_key: value}, ficheiro_name="tables_columns_system_field.pkl", log_message=log_message)
+            save_columns_to_file({table_key: value}, ficheiro_name="tables_columns_system_field.pkl", log_message=log_message, profile=f"{db_type}{database_name}")
 
         # Palavras-chave para identificar colunas auto-incrementáveis
         auto_increment_keywords = {
@@ -0,0 +1,103 @@
+import time
+import traceback
+from typing import Callable, Optional
+from sqlalchemy.pool import QueuePool
+from config.SchemaSnapshot import SchemaSnapshot
+from config.salavarInfoAllColumn import save_columns_to_file
+from utils.enum_resolver import fetch_enum_values
+from utils.job_scheduler import MAX_WORKERS, PRIORITY_BULK, get_scheduler
+
+# Conexões abertas no aquecimento: uma por worker do agendador e uma para a thread da interface
+WARMUP_CONNECTIONS = MAX_WORKERS + 1
+
+
+def warm_pool(engine, count: int = WARMUP_CONNECTIONS) -> int:
+    """
+    Abre até `count` conexões e as devolve ao pool, prontas para reuso.
+
+    As conexões são abertas em sequência, na mesma tarefa, e mantidas até a última: assim cada
+    uma volta ao pool como conexão distinta, sem ocupar outras threads do agendador.
+    O número é limitado ao pool_size (conexões além dele seriam overflow, fechadas ao devolver).
+    Pools que não são QueuePool (ex: SQLite) não são aquecidos. Retorna quantas ficaram prontas.
+    """
+    if not isinstance(engine.pool, QueuePool):
+        return 0
+    count = min(count, engine.pool.size())
+    connections, error = [], None
+    try:
+        for _ in range(count):
+            try:
+                connections.append(engine.connect())
+            except Exception as e:
+                error = e
+                break
+    finally:
+        for conn in connections:
+            conn.close()
+    if error is not None and not connections:
+        raise error
+    return len(connections)
+
+
+def prefetch_enum_values(engine, table_names, profile: str) -> int:
+    """
+    Busca os valores ENUM/CHECK de todo o esquema em uma consulta e grava no catálogo, uma entrada
+    por tabela (vazia quando não há listas fechadas), com as mesmas chaves usadas pelos filtros.
+    Retorna o número de tabelas com valores ENUM/CHECK.
+    """
+    enum_values = fetch_enum_values(engine)
+    save_columns_to_file({f"{profile}{table}": enum_values.get(table, {}) for table in table_names},
+                         "tables_columns_enum.pkl", profile=profile)
+    return sum(1 for table in table_names if enum_values.get(table))
+
+
+def warm_up(engine, profile: str, on_progress: Optional[Callable[[str, str], None]] = None,
+            connections: int = WARMUP_CONNECTIONS) -> None:
+    """
+    Aquecimento logo após conectar, em segundo plano: enche o pool com conexões prontas e
+    carrega o esquema (tabelas, colunas, chaves) e os valores ENUM/CHECK de todas as tabelas.
+
+    Args:
+        engine: Engine SQLAlchemy recém-conectado.
+        profile (str): Prefixo das chaves do catálogo (tipo do banco em minúsculas + nome do banco).
+        on_progress (callable, optional): Recebe (mensagem, nível) a cada etapa; chamado de threads de fundo
+            (use `call_in_ui` para atualizar widgets).
+        connections (int): Conexões a deixar prontas no pool.
+    """
+    report = on_progress or (lambda message, level="info": None)
+    snapshot = SchemaSnapshot.for_engine(engine)
+    # O engine pode ser reaproveitado do registro: descarta o retrato anterior
+    snapshot.invalidate()
+    started = time.perf_counter()
+
+    def _prefetch_enums(table_names):
+        try:
+            with_enums = prefetch_enum_values(engine, table_names, profile)
+            report(f"Valores ENUM/CHECK carregados ({with_enums} tabelas com listas fechadas).", "info")
+        except Exception as e:
+            report(f"Erro ao carregar valores ENUM/CHECK: {e} {traceback.format_exc()}", "warning")
+
+    def _schema_loaded(error):
+        if error:
+            report(f"Erro ao carregar o esquema: {error}", "warning")
+            return
+        table_names = list(snapshot.table_names)
+        report(f"Esquema carregado em memória ({len(table_names)} tabelas, "
+               f"{time.perf_counter() - started:.1f}s).", "info")
+        get_scheduler().submit(_prefetch_enums, table_names, priority=PRIORITY_BULK)
+
+    # O esquema começa primeiro, em thread própria do retrato: quem pedir a lista de tabelas
+    # (inclusive de uma tarefa do agendador) aguarda este carregamento sem disputar vaga com ele
+    report("Aquecendo a conexão: carregando esquema e abrindo conexões do pool...", "info")
+    snapshot.load_async(on_done=_schema_loaded)
+
+    def _fill_pool():
+        try:
+            ready = warm_pool(engine, connections)
+            if ready:
+                report(f"Pool aquecido: {ready} conexões prontas.", "info")
+        except Exception as e:
+            report(f"Erro ao aquecer o pool de conexões: {e}", "warning")
+
+    # Carga de fundo: cede a vez às tarefas interativas no agendador
+    get_scheduler().submit(_fill_pool, priority=PRIORITY_BULK)